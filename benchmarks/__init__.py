@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# Offline benchmarks and stress checks. Run from the repository root, e.g.
+#   python -m benchmarks.stress_leave_submission
@@ -0,0 +1,142 @@
+# benchmarks/bench_agent_prompt.py
+"""
+Per-turn prompt overhead and cached-token ratio of the agent prompt.
+
+Compares the old agent_node behaviour (prompt template rebuilt and formatted
+on every turn, user name and date inside the system prompt) with the prebuilt
+leave_graph.agent_prompt (static prefix, per-session suffix) that every tier of
+the model router pipes into its model. Both run against FakeToolChatModel, so
+no OpenAI client is built and no API key is needed.
+
+The cached-token ratio simulates provider-side prefix caching the way OpenAI
+documents it: prompts of at least 1024 tokens, cached in 128-token steps of
+the longest prefix seen before.
+
+    python -m benchmarks.bench_agent_prompt --turns 2000
+"""
+import argparse
+import json
+import time
+from datetime import date, timedelta
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+import leave_graph
+from benchmarks.fake_llm import FakeToolChatModel
+
+# The system prompt as it was before the context moved to a suffix
+LEGACY_SYSTEM_PROMPT = leave_graph.SYSTEM_PROMPT.replace(
+    "The current date and the user you are speaking with are given in the session context message at the end of the conversation.\n",
+    "Current date: {current_date} \nThe user you are speaking with is {employee_name} (Employee ID: {employee_id}).\n",
+)
+
+MIN_CACHEABLE_TOKENS = 1024
+CACHE_INCREMENT = 128
+
+USERS = [("E001", "Alice Smith"), ("E002", "Bob Johnson"), ("E003", "Carol White"), ("E004", "Dan Brown")]
+
+
+def legacy_turn(llm_with_tools, messages, employee_id, employee_name, current_date):
+    """agent_node before the runnable was prebuilt."""
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", LEGACY_SYSTEM_PROMPT.format(current_date=current_date, employee_name=employee_name,
+                                               employee_id=employee_id)),
+        MessagesPlaceholder(variable_name="messages"),
+    ])
+    return (prompt | llm_with_tools).invoke({"messages": messages})
+
+
+def prebuilt_turn(agent_runnable, messages, employee_id, employee_name, current_date):
+    return agent_runnable.invoke({
+        "messages": messages,
+        "current_date": current_date,
+        "employee_name": employee_name,
+        "employee_id": employee_id,
+    })
+
+
+def make_tokenizer():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base").encode
+    except Exception:
+        import re
+        pattern = re.compile(r"\w+|[^\w\s]|\s+")
+        return pattern.findall
+
+
+class PrefixCacheSimulator:
+    def __init__(self):
+        self.seen = set()
+
+    def request(self, tokens):
+        """Return the number of cached tokens for this request, then remember its prefixes."""
+        cached = 0
+        boundaries = range(MIN_CACHEABLE_TOKENS, len(tokens) + 1, CACHE_INCREMENT)
+        for boundary in boundaries:
+            if hash(tuple(tokens[:boundary])) not in self.seen:
+                break
+            cached = boundary
+        for boundary in boundaries:
+            self.seen.add(hash(tuple(tokens[:boundary])))
+        return cached
+
+
+def serialize_request(fake_llm, tokenize):
+    """Tokens of the last request the fake model saw: tool schemas first, then messages."""
+    text = json.dumps(fake_llm.last_tools, sort_keys=True)
+    for message in fake_llm.last_messages:
+        text += f"\n<{message.type}>{message.content}"
+    return tokenize(text)
+
+
+def run(turn_fn, runnable, fake_llm, turns, tokenize):
+    cache = PrefixCacheSimulator()
+    histories = {employee_id: [] for employee_id, _ in USERS}
+    total_tokens = cached_tokens = 0
+    elapsed = 0.0
+    start_day = date(2025, 5, 1)
+    for turn in range(turns):
+        employee_id, employee_name = USERS[turn % len(USERS)]
+        # A new day every 200 turns; sessions restart with the new day
+        current_date = (start_day + timedelta(days=turn // 200)).isoformat()
+        if turn % 200 == 0:
+            histories = {employee_id: [] for employee_id, _ in USERS}
+        history = histories[employee_id]
+        history.append(HumanMessage(content=f"Question {len(history) // 2 + 1}: how much annual leave do I have?"))
+
+        t0 = time.perf_counter()
+        turn_fn(runnable, history, employee_id, employee_name, current_date)
+        elapsed += time.perf_counter() - t0
+
+        tokens = serialize_request(fake_llm, tokenize)
+        total_tokens += len(tokens)
+        cached_tokens += cache.request(tokens)
+        history.append(AIMessage(content="You have 14 days of annual leave remaining."))
+        del history[:-20]  # keep sessions from growing without bound
+    return elapsed / turns, cached_tokens / total_tokens, total_tokens / turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent prompt overhead and cached-token ratio")
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    tokenize = make_tokenizer()
+    fake_llm = FakeToolChatModel()
+    llm_with_tools = fake_llm.bind_tools(leave_graph.tools)
+    # What a model router tier runs (leave_graph._tier_runnable), with the fake model in place of ChatOpenAI
+    agent_runnable = leave_graph.agent_prompt | llm_with_tools
+
+    print(f"{'variant':<10} {'overhead/turn':>14} {'tokens/turn':>12} {'cached ratio':>13}")
+    for name, turn_fn, runnable in [
+        ("before", legacy_turn, llm_with_tools),
+        ("after", prebuilt_turn, agent_runnable),
+    ]:
+        per_turn, ratio, tokens = run(turn_fn, runnable, fake_llm, args.turns, tokenize)
+        print(f"{name:<10} {per_turn * 1e6:>11.0f} us {tokens:>12.0f} {ratio:>12.1%}")
+
+
+if __name__ == "__main__":
+    main()
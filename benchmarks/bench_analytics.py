@@ -0,0 +1,107 @@
+# benchmarks/bench_analytics.py
+"""
+Latency of the leave analytics reports on a large store.
+
+Fills a store with generated employees (benchmarks/workload.py), builds the
+columnar view once, then interleaves leave submissions with reports, so every
+report first refreshes the employees changed since the previous one. Reports
+the build time, the mean/p99 latency per report, and the time a full rebuild
+per query would take instead. At the end the incrementally maintained view is
+checked against a fresh build.
+
+    python -m benchmarks.bench_analytics --employees 100000
+    python -m benchmarks.bench_analytics --backend sqlite --employees 20000 --writes-per-report 50
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from benchmarks.stats import percentile
+from benchmarks.workload import generate_employees
+from leave_analytics import LeaveAnalytics
+from leave_store import MemoryStore, SQLiteStore, set_store
+from leave_tools import check_and_process_leave, update_leave_status
+
+REPORTS = {
+    "utilization": lambda a: a.utilization(),
+    "balance_summary": lambda a: a.balance_summary(),
+    "upcoming_absences": lambda a: a.upcoming_absences(30),
+    "absence_count": lambda a: a.absence_count(30),
+    "monthly_trend": lambda a: a.monthly_trend(12),
+}
+
+
+def write(rng: random.Random, employee_ids, submitted) -> None:
+    employee_id = rng.choice(employee_ids)
+    if submitted and rng.random() < 0.3:
+        employee_id, request_id = rng.choice(submitted)
+        update_leave_status(employee_id, request_id, rng.choice(("approved", "rejected")))
+        return
+    start = date.today() + timedelta(days=rng.randrange(60))
+    result = check_and_process_leave(employee_id, rng.choice(("annual", "sick", "personal")), start.isoformat(),
+                                     (start + timedelta(days=rng.randrange(4))).isoformat(), "Benchmark")
+    # Overlapping requests are refused and have no request ID
+    if result.data.get("request_id"):
+        submitted.append((employee_id, result.data["request_id"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leave analytics reports on a large store")
+    parser.add_argument("--employees", type=int, default=100000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--reports", type=int, default=200, help="rounds of all reports")
+    parser.add_argument("--writes-per-report", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        store = SQLiteStore(os.path.join(tempfile.mkdtemp(prefix="leave-analytics-"), "leave.db"))
+    else:
+        store = MemoryStore({})
+    set_store(store)
+    store.add_employees(generate_employees(args.employees, args.years, seed=args.seed))
+    employee_ids = store.employee_ids()
+
+    analytics = LeaveAnalytics(store, max_age=float("inf"))
+    start = time.perf_counter()
+    analytics.refresh()
+    build = time.perf_counter() - start
+    print(f"built view of {args.employees} employees, {analytics._rows} records ({args.backend}) in {build:.2f}s")
+
+    rng = random.Random(args.seed)
+    submitted = []
+    latencies = {name: [] for name in REPORTS}
+    refreshes = []
+    for _ in range(args.reports):
+        for _ in range(args.writes_per_report):
+            write(rng, employee_ids, submitted)
+        start = time.perf_counter()
+        analytics.refresh()
+        refreshes.append(time.perf_counter() - start)
+        for name, report in REPORTS.items():
+            start = time.perf_counter()
+            report(analytics)
+            latencies[name].append(time.perf_counter() - start)
+
+    print(f"\n{args.reports} rounds, {args.writes_per_report} writes before each")
+    print(f"{'step':<22} {'mean ms':>9} {'p99 ms':>9}")
+    for name, values in [("refresh", refreshes)] + list(latencies.items()):
+        values.sort()
+        print(f"{name:<22} {sum(values) / len(values) * 1000:>9.2f} {percentile(values, 99) * 1000:>9.2f}")
+    print(f"full rebuild per query instead: {build * 1000:.0f} ms")
+    print(f"stats: {analytics.stats}")
+
+    fresh = LeaveAnalytics(store)
+    for name, report in REPORTS.items():
+        pd.testing.assert_frame_equal(pd.DataFrame(report(analytics)), pd.DataFrame(report(fresh)), obj=name)
+    print("incremental view matches a fresh build")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_async.py
+"""
+Sessions per second per core: process_message on a thread pool vs aprocess_message
+on one event loop.
+
+Each session is one turn that goes through the agent, one tool call and a
+second agent call against a fake model with simulated provider latency, so the
+work is dominated by waiting, as it is with gpt-4o.
+
+    python -m benchmarks.bench_async --sessions 500 --latency 0.2 --threads 16
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import leave_graph
+from benchmarks.fake_llm import FakeToolChatModel
+
+# Each session runs on its own conversation thread (S<n> / A<n>); the tool call is for E001
+MESSAGE = "I'd like to take annual leave from 2025-07-07 to 2025-07-08, do I have enough days?"
+
+
+def use_fake_model(latency):
+    fake_llm = FakeToolChatModel(
+        reply="You have enough annual leave for those dates.",
+        tool_call={"name": "check_leave_balance", "args": {"employee_id": "E001"}},
+        latency=latency,
+    )
+    leave_graph.set_agent_runnable(leave_graph.agent_prompt | fake_llm.bind_tools(leave_graph.tools))
+
+
+def run_sync(sessions, threads):
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        responses = list(pool.map(lambda i: leave_graph.process_message(f"S{i}", [], MESSAGE)[0], range(sessions)))
+    return responses
+
+
+async def run_async(sessions, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_session(i):
+        async with semaphore:
+            return (await leave_graph.aprocess_message(f"A{i}", [], MESSAGE))[0]
+
+    return await asyncio.gather(*(one_session(i) for i in range(sessions)))
+
+
+def measure(label, fn, sessions):
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        responses = fn()
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    assert all(r == responses[0] for r in responses), "sessions returned different answers"
+    # CPU seconds approximate cores used; sessions per CPU-second is sessions/s per fully used core
+    print(f"{label:<28} {sessions / wall:8.1f} sessions/s  {sessions / cpu:8.1f} sessions/s/core  "
+          f"(wall {wall:.2f}s, cpu {cpu:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async graph throughput")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated LLM latency in seconds")
+    parser.add_argument("--threads", type=int, default=16, help="worker threads for the sync run")
+    parser.add_argument("--concurrency", type=int, default=500, help="concurrent sessions for the async run")
+    args = parser.parse_args()
+
+    use_fake_model(args.latency)
+    measure(f"sync, {args.threads} threads", lambda: run_sync(args.sessions, args.threads), args.sessions)
+    measure(f"async, {args.concurrency} concurrent",
+            lambda: asyncio.run(run_async(args.sessions, args.concurrency)), args.sessions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_business_days.py
+"""
+Business-day counting over millions of leave ranges.
+
+Generates random (start, end) ranges over several years and counts the
+business days in each with:
+
+- BusinessDayCalendar.count_many (one vectorized np.busday_count call)
+- BusinessDayCalendar.count, once per range (what a single request costs)
+- a plain Python loop over the days of each range, as the reference
+
+The holidays are fixed-date ones for every year, so ranges can span years.
+Results of all three are compared on a sample.
+
+    python -m benchmarks.bench_business_days --ranges 5000000
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from business_days import BusinessDayCalendar
+from holiday_calendar import HolidayCalendar
+
+FIXED_HOLIDAYS = ("01-01", "07-04", "11-11", "12-25", "12-26")
+
+
+def holidays(first_year, last_year):
+    return [f"{year}-{day}" for year in range(first_year, last_year + 1) for day in FIXED_HOLIDAYS]
+
+
+def python_count(start, end, holiday_set):
+    count = 0
+    day = start
+    while day <= end:
+        if day.weekday() < 5 and day not in holiday_set:
+            count += 1
+        day += timedelta(days=1)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized business-day counting")
+    parser.add_argument("--ranges", type=int, default=5_000_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--max-length", type=int, default=30, help="longest range in days")
+    parser.add_argument("--sample", type=int, default=100_000, help="ranges for the per-range and Python timings")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    first_day = np.datetime64(f"{date.today().year - args.years + 1}-01-01")
+    starts = first_day + rng.integers(0, 365 * args.years, args.ranges).astype("timedelta64[D]")
+    ends = starts + rng.integers(0, args.max_length, args.ranges).astype("timedelta64[D]")
+    first_year, last_year = first_day.astype(object).year, ends.max().astype(object).year
+    calendar = BusinessDayCalendar(HolidayCalendar(
+        {"date": day, "name": "Holiday", "region": "*"} for day in holidays(first_year, last_year)))
+    start = time.perf_counter()
+    calendar.calendar(first_year, last_year)
+    print(f"calendar for {first_year}-{last_year} built in {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+    start = time.perf_counter()
+    counts = calendar.count_many(starts, ends)
+    vectorized = time.perf_counter() - start
+
+    sample = min(args.sample, args.ranges)
+    sample_starts, sample_ends = starts[:sample].tolist(), ends[:sample].tolist()
+    start = time.perf_counter()
+    single = [calendar.count(s, e) for s, e in zip(sample_starts, sample_ends)]
+    per_range = (time.perf_counter() - start) / sample
+
+    holiday_set = {date.fromisoformat(day) for day in holidays(first_year, last_year)}
+    start = time.perf_counter()
+    reference = [python_count(s, e, holiday_set) for s, e in zip(sample_starts, sample_ends)]
+    python_per_range = (time.perf_counter() - start) / sample
+    assert counts[:sample].tolist() == single == reference
+
+    print(f"\n{'method':<34} {'ranges':>10} {'total s':>9} {'ns/range':>9}")
+    print(f"{'count_many (vectorized)':<34} {args.ranges:>10} {vectorized:>9.3f} {vectorized / args.ranges * 1e9:>9.1f}")
+    print(f"{'count (one call per range)':<34} {sample:>10} {per_range * sample:>9.3f} {per_range * 1e9:>9.1f}")
+    print(f"{'Python loop over days':<34} {sample:>10} {python_per_range * sample:>9.3f} {python_per_range * 1e9:>9.1f}")
+    print(f"\nvectorized is {python_per_range * args.ranges / vectorized:,.0f}x the Python loop; "
+          f"{counts.sum():,} business days of {(ends - starts).astype(np.int64).sum() + args.ranges:,} calendar days; "
+          f"results match on {sample:,} ranges")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# benchmarks/bench_e2e.py
+"""
+End-to-end throughput and latency of process_message, fully offline.
+
+The agent's LLM is replaced by ScriptedChatModel, which plays the scripted
+scenarios in benchmarks/scenarios.py (balance check, multi-step leave request,
+status update). Each session is one scenario for a fresh employee. Reports:
+
+- turns/s and p50/p95/p99 turn latency per scenario
+- memory retained per session (checkpoint, history summary, caches), via tracemalloc
+- mean time per turn spent in each graph node, tool and LLM call (from tracing spans)
+
+Results are written as JSON (default benchmarks/results/e2e-<commit>.json);
+pass --compare with an earlier file to print the change.
+
+    python -m benchmarks.bench_e2e --sessions 200
+    python -m benchmarks.bench_e2e --compare benchmarks/results/e2e-<older commit>.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List
+
+import leave_graph
+from benchmarks.fake_llm import ScriptedChatModel
+from benchmarks.scenarios import SCENARIOS, benchmark_store, build_script
+from benchmarks.stats import percentile
+from leave_store import set_store
+from tool_cache import tool_cache
+from tracing import tracer
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit() -> Dict[str, Any]:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "unknown", "dirty": False}
+    return {"commit": sha, "dirty": dirty}
+
+
+def setup(employee_count: int, latency: float) -> None:
+    """Fresh store, caches and sessions, with the scripted model in place of gpt-4o."""
+    model = ScriptedChatModel(script=build_script(), reply="Is there anything else I can help with?",
+                              latency=latency)
+    leave_graph.set_agent_runnable(leave_graph.agent_prompt | model.bind_tools(leave_graph.tools))
+    leave_graph.set_checkpointer(leave_graph.create_checkpointer())
+    leave_graph.get_graph()
+    leave_graph.history_manager.reset()
+    set_store(benchmark_store(employee_count))
+    tool_cache.clear()
+
+
+def run_sessions(scenario: str, employee_ids: List[str]) -> List[float]:
+    """Run the scenario once per employee; returns the latency of every turn."""
+    latencies = []
+    for employee_id in employee_ids:
+        history: List[Dict[str, Any]] = []
+        for turn in SCENARIOS[scenario]:
+            start = time.perf_counter()
+            _, history = leave_graph.process_message(employee_id, history, turn["user"])
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def measure_throughput(sessions: int, latency: float) -> Dict[str, Any]:
+    setup(sessions * len(SCENARIOS), latency)
+    tracer.configure()
+    tracer.reset()
+    results = {}
+    all_latencies: List[float] = []
+    total_seconds = 0.0
+    for index, scenario in enumerate(SCENARIOS):
+        employee_ids = [f"B{i:05d}" for i in range(index * sessions, (index + 1) * sessions)]
+        start = time.perf_counter()
+        latencies = sorted(run_sessions(scenario, employee_ids))
+        elapsed = time.perf_counter() - start
+        total_seconds += elapsed
+        all_latencies.extend(latencies)
+        results[scenario] = summarize(latencies, elapsed)
+    all_latencies.sort()
+    results["all"] = summarize(all_latencies, total_seconds)
+    node_metrics = tracer.metrics()
+    tracer.configure(enabled=False)
+    return {"scenarios": results, "spans": node_metrics}
+
+
+def summarize(sorted_latencies: List[float], seconds: float) -> Dict[str, float]:
+    return {
+        "turns": len(sorted_latencies),
+        "turns_per_s": len(sorted_latencies) / seconds if seconds else 0.0,
+        "p50_ms": percentile(sorted_latencies, 50) * 1000,
+        "p95_ms": percentile(sorted_latencies, 95) * 1000,
+        "p99_ms": percentile(sorted_latencies, 99) * 1000,
+    }
+
+
+def measure_session_memory(sessions: int) -> Dict[str, float]:
+    """Bytes still allocated after running sessions of every scenario, per session."""
+    total = sessions * len(SCENARIOS)
+    setup(total + 1, 0.0)
+    # Warm up imports and lazily built objects so they don't count as session memory
+    warmup_id = f"B{total:05d}"
+    run_sessions(next(iter(SCENARIOS)), [warmup_id])
+    leave_graph.reset_session(warmup_id)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for index, scenario in enumerate(SCENARIOS):
+        run_sessions(scenario, [f"B{i:05d}" for i in range(index * sessions, (index + 1) * sessions)])
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"sessions": total, "bytes_per_session": (after - before) / total}
+
+
+def node_overhead(spans: Dict[str, Dict[str, Any]], turns: int) -> Dict[str, float]:
+    """Mean microseconds per turn for each span, plus derived framework overhead."""
+    per_turn = {key: m["total_seconds"] / turns * 1e6 for key, m in spans.items() if not key.startswith("turn:")}
+    turn_total = sum(m["total_seconds"] for key, m in spans.items() if key.startswith("turn:")) / turns * 1e6
+    nodes = sum(v for key, v in per_turn.items() if key.startswith("node:"))
+    if "node:agent" in per_turn and "llm:agent" in per_turn:
+        per_turn["agent excl. llm"] = per_turn["node:agent"] - per_turn["llm:agent"]
+    per_turn["graph runtime (outside nodes)"] = turn_total - nodes
+    per_turn["turn total"] = turn_total
+    return per_turn
+
+
+def print_report(result: Dict[str, Any], baseline: Dict[str, Any] = None) -> None:
+    header = f"{'scenario':<26} {'turns':>6} {'turns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header)
+    for name, s in result["scenarios"].items():
+        line = (f"{name:<26} {s['turns']:>6} {s['turns_per_s']:>9.1f} "
+                f"{s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f}")
+        old = (baseline or {}).get("scenarios", {}).get(name)
+        if old:
+            line += (f"   vs {baseline['commit']}: turns/s {s['turns_per_s'] / old['turns_per_s'] - 1:+.1%}, "
+                     f"p95 {s['p95_ms'] / old['p95_ms'] - 1:+.1%}")
+        print(line)
+    memory = result["memory"]
+    print(f"\nretained memory: {memory['bytes_per_session'] / 1024:.1f} KiB per session ({memory['sessions']} sessions)")
+    if baseline and "memory" in baseline:
+        print(f"  vs {baseline['commit']}: {memory['bytes_per_session'] / baseline['memory']['bytes_per_session'] - 1:+.1%}")
+    print(f"\n{'time per turn':<32} {'us':>9}")
+    for name, micros in sorted(result["overhead_us_per_turn"].items(), key=lambda item: -item[1]):
+        print(f"{name:<32} {micros:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of process_message")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions per scenario")
+    parser.add_argument("--memory-sessions", type=int, default=100, help="sessions per scenario for the memory pass")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated LLM latency in seconds")
+    parser.add_argument("--output", help="result file (default benchmarks/results/e2e-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    throughput = measure_throughput(args.sessions, args.latency)
+    result = {
+        **git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {"sessions": args.sessions, "memory_sessions": args.memory_sessions, "latency": args.latency},
+        "scenarios": throughput["scenarios"],
+        "memory": measure_session_memory(args.memory_sessions),
+        "overhead_us_per_turn": node_overhead(throughput["spans"], throughput["scenarios"]["all"]["turns"]),
+        "spans": throughput["spans"],
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e-{result['commit']}{'-dirty' if result['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nresults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_history_window.py
+"""
+Tokens sent per turn over a long synthetic session, with and without windowing.
+
+Runs process_message for a 100-turn session against an offline fake model and
+counts the tokens of every request the model receives (system prompt included).
+
+    python -m benchmarks.bench_history_window --turns 100
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import leave_graph
+from benchmarks.fake_llm import FakeToolChatModel
+from history_manager import HistoryManager, count_message_tokens
+
+REPLY = ("Thanks, I have noted that. Based on your current annual leave balance and the team calendar, "
+         "those dates look fine. Let me know the exact start and end dates and whether you want me to "
+         "submit the request now, and I will take care of the rest.")
+
+
+def run_session(manager, turns):
+    fake_llm = FakeToolChatModel(reply=REPLY)
+    leave_graph.set_agent_runnable(leave_graph.agent_prompt | fake_llm.bind_tools(leave_graph.tools))
+    leave_graph.history_manager = manager
+    leave_graph.reset_session("E001")
+    history = []
+    sent = []
+    start = time.perf_counter()
+    for turn in range(1, turns + 1):
+        message = (f"Turn {turn}: I am thinking about annual leave around 2025-07-{turn % 28 + 1:02d} "
+                   f"for a family trip, what would you suggest?")
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, history = leave_graph.process_message("E001", history, message)
+        sent.append(count_message_tokens(fake_llm.last_messages))
+    return sent, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokens sent per turn with and without history windowing")
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--max-turns", type=int, default=6)
+    parser.add_argument("--token-budget", type=int, default=1500)
+    args = parser.parse_args()
+
+    full, full_time = run_session(HistoryManager(max_turns=10**9, token_budget=10**9), args.turns)
+    windowed, windowed_time = run_session(HistoryManager(args.max_turns, args.token_budget), args.turns)
+
+    print(f"{'turn':>5} {'full history':>13} {'windowed':>9}")
+    for turn in [1, 2, 5] + list(range(10, args.turns + 1, 10)):
+        if turn <= args.turns:
+            print(f"{turn:>5} {full[turn - 1]:>13} {windowed[turn - 1]:>9}")
+    print(f"{'total':>5} {sum(full):>13} {sum(windowed):>9}  "
+          f"({1 - sum(windowed) / sum(full):.0%} fewer input tokens)")
+    print(f"wall time: full {full_time:.2f}s, windowed {windowed_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_holidays.py
+"""
+Holiday calendar lookups on a large multi-region calendar.
+
+Generates a calendar of --regions regions with --per-year holidays each over
+--years years, then times, against a linear scan over all holiday records:
+
+- the next 5 holidays after a random day in a random region
+- the holidays of a random 30-day range
+- get_holidays answers: formatted once, then served from the response cache
+
+Every indexed result is compared with the scan.
+
+    python -m benchmarks.bench_holidays --regions 200 --years 50
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.stats import percentile
+from holiday_calendar import HolidayCalendar
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def report(name, values, baseline=None, than="scanning"):
+    values = sorted(values)
+    mean = sum(values) / len(values)
+    line = f"{name:<30} {len(values):>7} {mean * 1e6:>10.2f} {percentile(values, 99) * 1e6:>10.2f}"
+    if baseline:
+        line += f"   {sum(baseline) / len(baseline) / mean:>6.0f}x faster than {than}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Holiday calendar lookups")
+    parser.add_argument("--regions", type=int, default=200)
+    parser.add_argument("--years", type=int, default=50)
+    parser.add_argument("--per-year", type=int, default=12, help="holidays per region and year")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    first_year = date.today().year - args.years // 2
+    regions = [f"R{i:03d}" for i in range(args.regions)]
+    records = [{"date": (date(year, 1, 1) + timedelta(days=rng.randrange(365))).isoformat(),
+                "name": f"Holiday {n}", "region": region}
+               for region in regions for year in range(first_year, first_year + args.years)
+               for n in range(args.per_year)]
+    calendar, build = timed(HolidayCalendar, records)
+    print(f"indexed {len(records):,} holidays of {args.regions} regions, {args.years} years in {build * 1e3:.0f} ms")
+
+    def random_day():
+        return date(first_year, 1, 1) + timedelta(days=rng.randrange(365 * args.years))
+
+    def scan_upcoming(day, region):
+        return sorted((h for h in records if h["region"] == region and h["date"] >= day), key=lambda h: h["date"])[:5]
+
+    def scan_between(start, end, region):
+        return sorted((h for h in records if h["region"] == region and start <= h["date"] <= end),
+                      key=lambda h: h["date"])
+
+    print(f"\n{'lookup':<30} {'count':>7} {'mean us':>10} {'p99 us':>10}")
+    indexed, scanned = [], []
+    for _ in range(args.queries // 10):
+        day, region = random_day().isoformat(), rng.choice(regions)
+        found, seconds = timed(calendar.upcoming, day, 5, region)
+        expected, scan_seconds = timed(scan_upcoming, day, region)
+        assert [h["date"] for h in found] == [h["date"] for h in expected]
+        indexed.append(seconds)
+        scanned.append(scan_seconds)
+    report("next 5 holidays", indexed, scanned)
+
+    indexed, scanned = [], []
+    for _ in range(args.queries // 10):
+        start, region = random_day(), rng.choice(regions)
+        first, last = start.isoformat(), (start + timedelta(days=29)).isoformat()
+        found, seconds = timed(calendar.between, first, last, region)
+        expected, scan_seconds = timed(scan_between, first, last, region)
+        assert [h["date"] for h in found] == [h["date"] for h in expected]
+        indexed.append(seconds)
+        scanned.append(scan_seconds)
+    report("holidays in 30 days", indexed, scanned)
+
+    # A working set of questions asked over and over, as a chat service would see
+    questions = [(random_day(), rng.choice(regions)) for _ in range(50)]
+    first_answers, cached = [], []
+    for i in range(args.queries):
+        today, region = questions[i % len(questions)]
+        _, seconds = timed(calendar.format_upcoming, 5, region, today)
+        (first_answers if i < len(questions) else cached).append(seconds)
+    report("get_holidays answer, first", first_answers)
+    report("get_holidays answer, cached", cached, first_answers, "formatting")
+
+
+if __name__ == "__main__":
+    main()
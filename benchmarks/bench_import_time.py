@@ -0,0 +1,103 @@
+# benchmarks/bench_import_time.py
+"""
+Startup cost of leave_graph, checked against a budget.
+
+Imports the module in fresh interpreters with -X importtime, reports the
+median wall time and the slowest imports, and checks that the heavy
+dependencies (langgraph, langchain_openai, openai, pandas) are not loaded until the
+graph is first used. Also times that first use (prompt, LLM client, graph
+compile). Exits with status 1 when the import exceeds the budget or a
+deferred dependency is imported eagerly, so it can run in CI.
+
+    python -m benchmarks.bench_import_time --budget-ms 800
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+DEFERRED_MODULES = ("langgraph", "langchain_openai", "openai", "pandas")
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(",".join(m for m in {deferred!r} if m in sys.modules))
+"""
+
+FIRST_USE_SCRIPT = """
+import os, time
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+import leave_graph
+start = time.perf_counter()
+leave_graph.get_agent_runnable()
+leave_graph.get_graph()
+print(time.perf_counter() - start)
+"""
+
+
+def run_python(args, script):
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    return subprocess.run([sys.executable, *args, "-c", script], capture_output=True, text=True,
+                          check=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def slowest_imports(importtime_output: str, top: int):
+    """(cumulative us, module) for the top-level and first-level imports, slowest first."""
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of leave_graph against a startup budget")
+    parser.add_argument("--module", default="leave_graph")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=800.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    script = IMPORT_SCRIPT.format(module=args.module, deferred=DEFERRED_MODULES)
+    times, eager = [], set()
+    importtime_output = ""
+    for _ in range(args.runs):
+        result = run_python(["-X", "importtime"], script)
+        seconds, loaded = result.stdout.splitlines()[:2]
+        times.append(float(seconds))
+        eager.update(filter(None, loaded.split(",")))
+        importtime_output = result.stderr
+    # -X importtime adds its own overhead; the wall time of a plain run is what users see
+    plain = statistics.median(float(run_python([], script).stdout.splitlines()[0]) for _ in range(args.runs))
+
+    print(f"import {args.module}: median {plain * 1000:.0f} ms over {args.runs} runs "
+          f"({statistics.median(times) * 1000:.0f} ms with -X importtime), budget {args.budget_ms:.0f} ms")
+    print(f"\n{'slowest imports':<50} {'ms':>8}")
+    for cumulative, name in slowest_imports(importtime_output, args.top):
+        print(f"{name:<50} {cumulative / 1000:>8.1f}")
+
+    if args.module == "leave_graph":
+        first_use = float(run_python([], FIRST_USE_SCRIPT).stdout.strip())
+        print(f"\nfirst use (prompt, LLM client, graph compile): {first_use * 1000:.0f} ms")
+
+    failures = []
+    if plain * 1000 > args.budget_ms:
+        failures.append(f"import took {plain * 1000:.0f} ms, budget is {args.budget_ms:.0f} ms")
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(sorted(eager))}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
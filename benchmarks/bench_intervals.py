@@ -0,0 +1,144 @@
+# benchmarks/bench_intervals.py
+"""
+Overlap checks and team absence queries with the leave interval index.
+
+Fills a store with generated employees (benchmarks/workload.py) and builds
+the index, then times:
+
+- per-employee overlap checks, against reading and scanning the history
+- "who is away" queries over 1, 7 and 30 days, against scanning every history
+- check_and_process_leave with the overlap check, interleaved with
+  get_team_absences, so the index keeps absorbing writes (and merging its delta)
+
+Every query result is compared with the brute-force answer.
+
+    python -m benchmarks.bench_intervals --employees 100000
+    python -m benchmarks.bench_intervals --backend sqlite --employees 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.stats import percentile
+from benchmarks.workload import generate_employees
+from leave_intervals import INDEXED_STATUSES, LeaveIntervalIndex
+from leave_store import MemoryStore, SQLiteStore, set_store
+from leave_tools import check_and_process_leave, get_team_absences
+
+
+def scan_overlapping(store, employee_id, first, last):
+    return sorted((r["start_date"], r["end_date"]) for r in store.get_leave_history(employee_id)
+                  if r["status"] in INDEXED_STATUSES and r["start_date"] <= last and r["end_date"] >= first)
+
+
+def scan_absences(store, first, last):
+    return sorted((r["start_date"], employee_id, r["end_date"]) for employee_id, _, _, history in store.iter_leave_data()
+                  for r in history
+                  if r["status"] in INDEXED_STATUSES and r["start_date"] <= last and r["end_date"] >= first)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def report(name, values, baseline=None):
+    values = sorted(values)
+    line = (f"{name:<34} {len(values):>6} {sum(values) / len(values) * 1e3:>9.3f} "
+            f"{percentile(values, 50) * 1e3:>9.3f} {percentile(values, 99) * 1e3:>9.3f}")
+    if baseline:
+        line += f"   {sum(baseline) / sum(values):>7.1f}x the speed of scanning"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leave interval index: overlap checks and absence queries")
+    parser.add_argument("--employees", type=int, default=100000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--checks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=20, help="absence queries per range length")
+    parser.add_argument("--writes", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        store = SQLiteStore(os.path.join(tempfile.mkdtemp(prefix="leave-intervals-"), "leave.db"))
+    else:
+        store = MemoryStore({})
+    set_store(store)
+    store.add_employees(generate_employees(args.employees, args.years, seed=args.seed))
+    # The first generated employee is a manager, who sees the whole list
+    employee_ids = store.employee_ids()
+
+    index = LeaveIntervalIndex(store)
+    _, build = timed(index.refresh)
+    print(f"indexed {len(index)} intervals of {args.employees} employees ({args.backend}) in {build:.2f}s")
+
+    rng = random.Random(args.seed)
+    today = date.today()
+    first_day = date(today.year - args.years + 1, 1, 1)
+    span = (today - first_day).days + 180
+
+    def random_range(length):
+        start = first_day + timedelta(days=rng.randrange(span))
+        return start.isoformat(), (start + timedelta(days=length - 1)).isoformat()
+
+    print(f"\n{'operation':<34} {'count':>6} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    indexed, scanned = [], []
+    for _ in range(args.checks):
+        employee_id = rng.choice(employee_ids)
+        first, last = random_range(rng.randint(1, 10))
+        found, seconds = timed(index.overlapping, employee_id, first, last)
+        expected, scan_seconds = timed(scan_overlapping, store, employee_id, first, last)
+        assert sorted((r["start_date"], r["end_date"]) for r in found) == expected, (employee_id, first, last)
+        indexed.append(seconds)
+        scanned.append(scan_seconds)
+    report("overlap check (one employee)", indexed, scanned)
+
+    for length in (1, 7, 30):
+        indexed, limited, scanned, rows = [], [], [], 0
+        for _ in range(args.queries):
+            first, last = random_range(length)
+            found, seconds = timed(index.absences, first, last)
+            expected, scan_seconds = timed(scan_absences, store, first, last)
+            assert [(r["start_date"], r["employee_id"], r["end_date"]) for r in found] == expected, (first, last)
+            # What get_team_absences does: count, then the first 50
+            (count, first_50), limited_seconds = timed(
+                lambda: (index.absence_count(first, last), index.absences(first, last, limit=50)))
+            assert count == len(found) and first_50 == found[:50]
+            indexed.append(seconds)
+            limited.append(limited_seconds)
+            scanned.append(scan_seconds)
+            rows += len(found)
+        report(f"who is away, {length:>2} day(s), all rows", indexed, scanned)
+        report(f"  count + first 50 (~{rows // args.queries} rows)", limited, scanned)
+
+    # Writes through the tools, which check for overlaps first; index the tools' store
+    from leave_intervals import get_interval_index
+    index.close()
+    index = get_interval_index()
+    index.refresh()
+    submits, queries = [], []
+    for i in range(args.writes):
+        start = today + timedelta(days=rng.randrange(120))
+        _, seconds = timed(check_and_process_leave, rng.choice(employee_ids), rng.choice(("annual", "sick")),
+                           start.isoformat(), (start + timedelta(days=rng.randrange(5))).isoformat(), "Benchmark")
+        submits.append(seconds)
+        if i % 100 == 0:
+            _, seconds = timed(get_team_absences, employee_ids[0], *random_range(7))
+            queries.append(seconds)
+    report("check_and_process_leave", submits)
+    report("get_team_absences, 7 days", queries)
+    first, last = random_range(30)
+    assert [(r["start_date"], r["employee_id"], r["end_date"]) for r in index.absences(first, last)] == \
+        scan_absences(store, first, last)
+    print(f"\nindex stats: {index.stats}; results match a full scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_leave_import.py
+"""
+Throughput of the bulk leave import (leave_import.py).
+
+Fills a store with generated employees (benchmarks/workload.py), builds a
+batch of random leave requests (with a share of invalid rows) and times
+import_leave_requests on it, next to a loop of check_and_process_leave calls
+over a sample of the same rows.
+
+    python -m benchmarks.bench_leave_import --rows 50000
+    python -m benchmarks.bench_leave_import --backend sqlite --employees 20000
+"""
+import argparse
+import copy
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from benchmarks.workload import generate_employees
+from leave_import import import_leave_requests
+from leave_store import MemoryStore, SQLiteStore, set_store
+from leave_tools import check_and_process_leave
+
+
+def make_store(backend: str, employees):
+    if backend == "sqlite":
+        store = SQLiteStore(os.path.join(tempfile.mkdtemp(prefix="leave-import-"), "leave.db"))
+    else:
+        store = MemoryStore({})
+    store.add_employees(employees)
+    return store
+
+
+def make_requests(rows: int, employee_ids, invalid_share: float, seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    first_day = date.today() + timedelta(days=1)
+    records = []
+    for _ in range(rows):
+        start = first_day + timedelta(days=rng.randrange(365))
+        end = start + timedelta(days=rng.choice((0, 0, 1, 2, 4)))
+        record = {
+            "employee_id": rng.choice(employee_ids),
+            "leave_type": rng.choice(("annual", "sick", "personal")),
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "reason": "Bulk import",
+        }
+        if rng.random() < invalid_share:
+            field, value = rng.choice((("employee_id", "X0"), ("leave_type", "vacation"),
+                                       ("start_date", "01/02/2025"), ("end_date", "2000-01-01")))
+            record[field] = value
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk leave import vs. per-request submission")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--invalid-share", type=float, default=0.05)
+    parser.add_argument("--baseline-rows", type=int, default=2000, help="rows submitted one by one for comparison")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    employees = list(generate_employees(args.employees, years=1, seed=args.seed))
+    employee_ids = [employee_id for employee_id, _ in employees]
+    requests = make_requests(args.rows, employee_ids, args.invalid_share, args.seed)
+
+    store = make_store(args.backend, copy.deepcopy(employees))
+    start = time.perf_counter()
+    results = import_leave_requests(requests, store)
+    elapsed = time.perf_counter() - start
+    print(f"bulk import ({args.backend}): {len(results)} rows in {elapsed:.2f}s "
+          f"({len(results) / elapsed:,.0f} rows/s)")
+    for status, count in results["status"].value_counts().items():
+        print(f"  {status}: {count}")
+
+    sample = requests.head(args.baseline_rows)
+    set_store(make_store(args.backend, employees))
+    start = time.perf_counter()
+    for row in sample.itertuples(index=False):
+        check_and_process_leave(row.employee_id, row.leave_type, row.start_date, row.end_date, row.reason)
+    baseline = time.perf_counter() - start
+    print(f"check_and_process_leave loop ({args.backend}): {len(sample)} rows in {baseline:.2f}s "
+          f"({len(sample) / baseline:,.0f} rows/s)")
+    print(f"speedup: {len(results) / elapsed / (len(sample) / baseline):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
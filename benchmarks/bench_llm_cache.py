@@ -0,0 +1,74 @@
+# benchmarks/bench_llm_cache.py
+"""
+LLM response cache hit rate and latency saved, offline.
+
+Several employees ask a mix of general questions (shared across employees),
+paraphrases that only differ in case/punctuation, and personal questions that
+make the model call a tool (cached per employee). The fake model sleeps to
+simulate gpt-4o latency.
+
+    python -m benchmarks.bench_llm_cache --backend memory --turns 300
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+import leave_graph
+from benchmarks.fake_llm import FakeToolChatModel
+from leave_data import EMPLOYEE_DB
+from llm_cache import LLMResponseCache, MemoryCacheBackend, SQLiteCacheBackend
+
+GENERAL_QUESTIONS = [
+    "Can I carry over unused annual leave to next year?",
+    "can i carry over unused annual leave to next year",
+    "Do I need a doctor's note for a single sick day?",
+    "Do I need a doctor's note for a single sick day??",
+    "How much notice do I need to give for a long vacation?",
+]
+PERSONAL_QUESTION = "I want to take annual leave from 2025-08-04 to 2025-08-05, is that ok?"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM response cache benchmark")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated LLM latency in seconds")
+    args = parser.parse_args()
+
+    fake_llm = FakeToolChatModel(reply="Here is what the policy says.", latency=args.latency)
+    general_runnable = leave_graph.agent_prompt | fake_llm.bind_tools(leave_graph.tools)
+    # Personal questions make the model look up the balance first
+    tool_llm = FakeToolChatModel(reply="Yes, you have enough balance.", latency=args.latency,
+                                 tool_call={"name": "check_leave_balance", "args": {"employee_id": "E001"}})
+    personal_runnable = leave_graph.agent_prompt | tool_llm.bind_tools(leave_graph.tools)
+    backend = (MemoryCacheBackend() if args.backend == "memory"
+               else SQLiteCacheBackend(os.path.join(tempfile.mkdtemp(), "llm_cache.db")))
+    leave_graph.set_llm_cache(LLMResponseCache(backend, [leave_graph.SYSTEM_PROMPT, "fake", fake_llm.reply]))
+
+    rng = random.Random(0)
+    employees = list(EMPLOYEE_DB)
+    start = time.perf_counter()
+    for _ in range(args.turns):
+        employee_id = rng.choice(employees)
+        personal = rng.random() < 0.2
+        question = PERSONAL_QUESTION if personal else rng.choice(GENERAL_QUESTIONS)
+        leave_graph.set_agent_runnable(personal_runnable if personal else general_runnable)
+        # Every question starts a new conversation
+        leave_graph.reset_session(employee_id)
+        with contextlib.redirect_stdout(io.StringIO()):
+            leave_graph.process_message(employee_id, [], question)
+    elapsed = time.perf_counter() - start
+
+    stats = leave_graph.llm_cache.stats()
+    print(f"backend={args.backend} turns={args.turns} wall={elapsed:.2f}s "
+          f"(uncached would be ~{args.turns * args.latency:.2f}s of LLM time)")
+    for key, value in stats.items():
+        print(f"  {key:<16} {value:.3f}" if isinstance(value, float) else f"  {key:<16} {value}")
+
+
+if __name__ == "__main__":
+    main()
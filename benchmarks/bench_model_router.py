@@ -0,0 +1,129 @@
+# benchmarks/bench_model_router.py
+"""
+Tiered model routing (model_router.py) against sending every turn to gpt-4o,
+fully offline.
+
+Both runs play the benchmark scenarios and read-only lookup turns
+(benchmarks/scenarios.py) through process_message, with ScriptedChatModel on
+every tier: the same script everywhere, a shorter simulated latency on the
+cheaper tiers, and --malformed-rate of their tool calls cut off mid-JSON so
+the router has to escalate them. Reports per run:
+
+- turn latency (mean / p95), LLM calls and escalations
+- tokens and estimated spend per tier (--prices, USD per million tokens)
+
+and checks that both runs gave the same answers.
+
+    python -m benchmarks.bench_model_router --sessions 50
+    python -m benchmarks.bench_model_router --ladder "gpt-4o-mini:0.3,gpt-4o" --malformed-rate 0.2
+"""
+import argparse
+import os
+import time
+from typing import Dict, List, Tuple
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+import leave_graph
+from benchmarks.fake_llm import ScriptedChatModel
+from benchmarks.scenarios import LOOKUP_TURNS, SCENARIOS, benchmark_store, build_script
+from benchmarks.stats import percentile
+from leave_store import set_store
+from model_router import DEFAULT_LADDER, ModelRouter, ModelRouterStats, ModelTier, parse_ladder
+from tool_cache import tool_cache
+
+WORKLOAD = {**SCENARIOS, "lookups": LOOKUP_TURNS}
+
+# List prices, USD per million input / output tokens
+DEFAULT_PRICES = "gpt-4o-mini=0.15/0.60,gpt-4o=2.50/10.00"
+
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    prices = {}
+    for part in spec.split(","):
+        model, _, price = part.partition("=")
+        input_price, _, output_price = price.partition("/")
+        prices[model.strip()] = (float(input_price), float(output_price))
+    return prices
+
+
+def build_router(ladder: List[ModelTier], args, stats: ModelRouterStats) -> ModelRouter:
+    script = build_script()
+
+    def build(tier: ModelTier, tools):
+        top = tier is ladder[-1]
+        model = ScriptedChatModel(script=script, reply="Is there anything else I can help with?",
+                                  latency=args.large_latency if top else args.small_latency,
+                                  malformed_rate=0.0 if top else args.malformed_rate)
+        return leave_graph.agent_prompt | model.bind_tools(tools)
+
+    return ModelRouter(ladder, build, leave_graph.tools, stats)
+
+
+def run(router: ModelRouter, sessions: int) -> Tuple[List[float], List[str]]:
+    """Play every workload scenario once per session; return turn latencies and answers."""
+    leave_graph.set_agent_runnable(router)
+    leave_graph.set_checkpointer(leave_graph.create_checkpointer())
+    leave_graph.history_manager.reset()
+    set_store(benchmark_store(sessions * len(WORKLOAD)))
+    tool_cache.clear()
+    latencies, answers = [], []
+    for index, turns in enumerate(WORKLOAD.values()):
+        for session in range(sessions):
+            employee_id = f"B{index * sessions + session:05d}"
+            history = []
+            for turn in turns:
+                start = time.perf_counter()
+                answer, history = leave_graph.process_message(employee_id, history, turn["user"])
+                latencies.append(time.perf_counter() - start)
+                answers.append(answer)
+    return latencies, answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiered model routing with fake models")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions per scenario")
+    parser.add_argument("--ladder", default=DEFAULT_LADDER)
+    parser.add_argument("--small-latency", type=float, default=0.008, help="seconds per call below the top tier")
+    parser.add_argument("--large-latency", type=float, default=0.02, help="seconds per call on the top tier")
+    parser.add_argument("--malformed-rate", type=float, default=0.1,
+                        help="share of tool calls the cheaper tiers get wrong")
+    parser.add_argument("--prices", default=DEFAULT_PRICES, help="model=input/output USD per 1M tokens")
+    args = parser.parse_args()
+
+    ladder = parse_ladder(args.ladder)
+    prices = parse_prices(args.prices)
+    runs = {
+        f"{ladder[-1].model} only": [ladder[-1]],
+        "ladder": ladder,
+    }
+    print(f"ladder: {', '.join(f'{tier.model} (score <= {tier.max_score:g})' for tier in ladder)}; "
+          f"{args.sessions} sessions of {len(WORKLOAD)} scenarios")
+    print(f"\n{'run':<14} {'turns':>6} {'mean ms':>8} {'p95 ms':>8} {'calls':>6} {'escal.':>6} {'est. $':>9}")
+    answers_by_run = {}
+    tier_reports = {}
+    for name, tiers in runs.items():
+        stats = ModelRouterStats()
+        latencies, answers_by_run[name] = run(build_router(tiers, args, stats), args.sessions)
+        report = tier_reports[name] = stats.report()
+        cost = sum(entry["input_tokens"] * prices.get(tier, (0.0, 0.0))[0] +
+                   entry["output_tokens"] * prices.get(tier, (0.0, 0.0))[1]
+                   for tier, entry in report.items()) / 1e6
+        latencies.sort()
+        print(f"{name:<14} {len(latencies):>6} {sum(latencies) / len(latencies) * 1000:>8.2f} "
+              f"{percentile(latencies, 95) * 1000:>8.2f} {sum(e['calls'] for e in report.values()):>6} "
+              f"{sum(e['escalations'] for e in report.values()):>6} {cost:>9.4f}")
+
+    print(f"\nper tier (ladder run); escalations by reason: {dict(stats.reasons)}")
+    print(f"{'tier':<14} {'calls':>6} {'routed':>7} {'escal.':>6} {'mean ms':>8} {'in tok':>9} {'out tok':>8}")
+    for tier, entry in tier_reports["ladder"].items():
+        print(f"{tier:<14} {entry['calls']:>6} {entry['routed_share']:>7.0%} {entry['escalations']:>6} "
+              f"{entry['avg_latency_ms']:>8.2f} {entry['input_tokens']:>9,} {entry['output_tokens']:>8,}")
+
+    baseline, routed = answers_by_run.values()
+    assert baseline == routed, "the ladder changed some answers"
+    print("\nanswers are the same in both runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_policy_search.py
+"""
+Policy search on a large generated handbook.
+
+Writes --documents Markdown policy documents (sections of generated text, each
+document with a few distinctive facts) to a temporary LEAVE_POLICY_DIR-style
+directory, indexes them with policy_search, then asks one question per planted
+fact and reports:
+
+- index build time and passage count
+- query latency (mean / p99)
+- tokens the search tool returns, against returning the whole corpus (what
+  get_leave_policy() without a leave type does with the built-in policies)
+- recall: how often the passage holding the fact is among the results
+
+    python -m benchmarks.bench_policy_search --documents 1000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.stats import percentile
+from history_manager import count_tokens
+from policy_search import PolicyIndex, format_passages, load_documents
+
+TOPICS = ["annual leave", "sick leave", "parental leave", "remote work", "overtime", "travel", "expenses",
+          "public holidays", "bereavement", "jury duty", "sabbatical", "training", "equipment", "security",
+          "onboarding", "performance reviews", "benefits", "pensions", "relocation", "conduct"]
+WORDS = ("employee manager request approval notice period week month year days form portal policy team "
+         "document record payroll entitlement balance carry over accrual schedule exception review submit "
+         "confirm eligible service contract probation part time full time region office payment claim receipt "
+         "deadline escalation committee handbook compliance audit training course certificate").split()
+
+
+def paragraph(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def write_corpus(directory, documents, rng):
+    """Write the documents; return (question, document title, fact) per planted fact."""
+    facts = []
+    for number in range(documents):
+        topic = TOPICS[number % len(TOPICS)]
+        title = f"{topic.title()} Policy {number:04d}"
+        lines = [f"# {title}", ""]
+        for section in range(rng.randint(3, 6)):
+            lines += [f"## {topic.capitalize()} part {section + 1}", ""]
+            for _ in range(rng.randint(2, 4)):
+                lines += [paragraph(rng, rng.randint(40, 90)), ""]
+        # A distinctive fact per document, phrased the way an employee would ask about it
+        code = f"hr{number:04d}"
+        fact = f"Form {code} must be filed with the {topic} coordinator before the quarterly cutoff."
+        lines += ["## Forms", "", fact, ""]
+        facts.append((f"which form for {topic} is {code}", title, fact))
+        with open(os.path.join(directory, f"policy_{number:04d}.md"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+    return facts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 policy search on a generated handbook")
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    directory = tempfile.mkdtemp(prefix="leave-policies-")
+    facts = write_corpus(directory, args.documents, rng)
+
+    start = time.perf_counter()
+    documents = load_documents(directory)
+    index = PolicyIndex(documents)
+    build = time.perf_counter() - start
+    corpus_tokens = count_tokens("\n\n".join(f"{title}\n{text}" for title, text in documents))
+    print(f"indexed {len(documents)} documents, {len(index.passages):,} passages in {build:.2f}s; "
+          f"whole corpus {corpus_tokens:,} tokens")
+
+    latencies, returned, found = [], [], 0
+    for question, title, fact in rng.sample(facts, min(args.queries, len(facts))) * (args.queries // len(facts) or 1):
+        start = time.perf_counter()
+        results = index.search(question, args.top_k)
+        latencies.append(time.perf_counter() - start)
+        returned.append(count_tokens(format_passages(question, results)))
+        found += any(passage["title"] == title and fact in passage["text"] for _, passage in results)
+
+    latencies.sort()
+    returned.sort()
+    print(f"\n{len(latencies)} queries, top {args.top_k}")
+    print(f"latency: mean {sum(latencies) / len(latencies) * 1e3:.3f} ms, p99 {percentile(latencies, 99) * 1e3:.3f} ms")
+    print(f"tokens returned: mean {sum(returned) / len(returned):.0f}, p99 {percentile(returned, 99):.0f} "
+          f"({corpus_tokens / (sum(returned) / len(returned)):,.0f}x fewer than the whole corpus)")
+    print(f"recall@{args.top_k}: {found / len(latencies):.1%}")
+
+
+if __name__ == "__main__":
+    main()
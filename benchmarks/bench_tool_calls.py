@@ -0,0 +1,98 @@
+# benchmarks/bench_tool_calls.py
+"""
+Tool calls per conversation with lossy vs lossless history.
+
+A scripted multi-turn conversation asks several follow-up questions that need
+the employee's balance or leave history. The fake model calls a tool only when
+that tool's result is not already in the context it receives, the way gpt-4o
+behaves when the data is in front of it.
+
+"before" strips tool calls and tool results from earlier turns, as the old
+dict round trip in process_message did; "after" sends the window built by
+HistoryManager, which keeps them (older results as digests).
+
+    python -m benchmarks.bench_tool_calls
+"""
+import contextlib
+import io
+from typing import List
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import leave_graph
+from benchmarks.fake_llm import FakeToolChatModel
+from history_manager import HistoryManager
+
+# (keyword in the user message, tool the model needs for it)
+TOOL_RULES = [
+    ("balance", "check_leave_balance"),
+    ("days", "check_leave_balance"),
+    ("history", "view_leave_history"),
+    ("taken", "view_leave_history"),
+]
+
+CONVERSATION = [
+    "I'm planning some time off in 2025-08, how many annual days do I have to plan with?",
+    "And how many sick days do I have left in that case?",
+    "What leave have I taken so far this year according to my history?",
+    "Given what I've taken, would 3 more annual days still leave me some balance?",
+    "Could you also remind me how many personal days I have?",
+    "Was my February leave in my history approved?",
+]
+
+
+class ContextAwareFakeModel(FakeToolChatModel):
+    """Calls the tool a question needs unless that tool's result is already in the context."""
+
+    tool_calls_made: int = 0
+
+    def _respond(self, messages: List[BaseMessage], **kwargs) -> ChatResult:
+        self.last_messages = messages
+        question = next(m for m in reversed(messages) if isinstance(m, HumanMessage)).content.lower()
+        seen_tools = {m.name for m in messages if isinstance(m, ToolMessage)}
+        for keyword, tool in TOOL_RULES:
+            if keyword in question and tool not in seen_tools:
+                self.tool_calls_made += 1
+                message = AIMessage(content="", tool_calls=[{
+                    "name": tool, "args": {"employee_id": "E001"}, "id": f"call_{self.tool_calls_made}",
+                }])
+                return ChatResult(generations=[ChatGeneration(message=message)])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Here you go."))])
+
+
+class LossyHistoryManager(HistoryManager):
+    """Drops tool calls and results from earlier turns, like the old dict conversion."""
+
+    def window(self, session_id, messages):
+        last_human = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        earlier = [
+            AIMessage(content=m.content) if isinstance(m, AIMessage) else m
+            for m in messages[:last_human]
+            if not isinstance(m, ToolMessage) and (not isinstance(m, AIMessage) or m.content)
+        ]
+        return super().window(session_id, earlier + list(messages[last_human:]))
+
+
+def run(manager) -> int:
+    model = ContextAwareFakeModel()
+    leave_graph.set_agent_runnable(leave_graph.agent_prompt | model.bind_tools(leave_graph.tools))
+    leave_graph.history_manager = manager
+    leave_graph.reset_session("E001")
+    history = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for message in CONVERSATION:
+            _, history = leave_graph.process_message("E001", history, message)
+    return model.tool_calls_made
+
+
+def main():
+    before = run(LossyHistoryManager())
+    after = run(HistoryManager())
+    print(f"{len(CONVERSATION)}-turn conversation")
+    print(f"  before (tool traffic dropped): {before} tool calls")
+    print(f"  after  (tool traffic kept):    {after} tool calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_tool_output_tokens.py
+"""
+Tokens the LLM reads per tool result: the English text the tools used to
+return against the compact content they return now (tool_output.py): JSON,
+or plain lines for the policy text.
+
+Runs every tool call of the benchmark scenarios (benchmarks/scenarios.py), each
+scenario on a fresh employee, then the tools whose results grow with the data
+on a store of --employees generated employees with --years of history:
+a long leave history, a month of team absences, the analytics reports, the
+full policy list, a policy search and a year of holidays. Counts tokens with
+history_manager.count_tokens (tiktoken when installed) for the rendered text
+and for the ToolMessage content.
+
+    python -m benchmarks.bench_tool_output_tokens --employees 2000
+"""
+import argparse
+import re
+from datetime import date, timedelta
+
+import leave_tools
+from benchmarks.scenarios import SCENARIOS, benchmark_store
+from benchmarks.workload import generate_employees
+from history_manager import count_tokens
+from leave_store import set_store
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def fill(value, values):
+    if isinstance(value, str):
+        return _PLACEHOLDER.sub(lambda match: values[match.group(1)], value)
+    return value
+
+
+def measure(result):
+    return count_tokens(result.text), count_tokens(result.content())
+
+
+def report(name, text_tokens, json_tokens, calls=1):
+    saved = 1 - json_tokens / text_tokens if text_tokens else 0.0
+    print(f"{name:<40} {calls:>5} {text_tokens:>10,} {json_tokens:>10,} {saved:>9.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tool result tokens: text against compact JSON")
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--records-per-year", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    store = benchmark_store(len(SCENARIOS))
+    store.add_employees(generate_employees(args.employees, args.years, args.records_per_year, seed=args.seed))
+    set_store(store)
+
+    print(f"{'tool result':<40} {'calls':>5} {'text tok':>10} {'llm tok':>10} {'saved':>9}")
+    totals = [0, 0, 0]
+    for number, (name, turns) in enumerate(SCENARIOS.items()):
+        values = {"employee_id": f"B{number:05d}"}
+        text_tokens = json_tokens = calls = 0
+        for turn in turns:
+            for step in turn["steps"]:
+                if "tool" not in step:
+                    continue
+                result = getattr(leave_tools, step["tool"])(**{key: fill(value, values)
+                                                              for key, value in step["args"].items()})
+                assert not result.error, f"{name}: {step['tool']} failed: {result.error}"
+                if result.data.get("request_id"):
+                    values["request_id"] = result.data["request_id"]
+                text, content = measure(result)
+                text_tokens, json_tokens, calls = text_tokens + text, json_tokens + content, calls + 1
+        report(f"scenario {name}", text_tokens, json_tokens, calls)
+        totals[0] += text_tokens
+        totals[1] += json_tokens
+        totals[2] += calls
+    report("all scenarios", *totals)
+
+    today = date.today()
+    longest = max(store.employee_ids(), key=lambda employee_id: len(store.get_leave_history(employee_id)))
+    # Managers get the full team reports
+    manager = next(employee_id for employee_id in store.employee_ids() if store.is_manager(employee_id))
+    large = {
+        f"leave history ({len(store.get_leave_history(longest))} records)":
+            lambda: leave_tools.view_leave_history(longest),
+        "team absences, next 30 days":
+            lambda: leave_tools.get_team_absences(manager, today.isoformat(), (today + timedelta(days=29)).isoformat()),
+        "analytics summary": lambda: leave_tools.get_leave_analytics(manager, "summary"),
+        "analytics upcoming": lambda: leave_tools.get_leave_analytics(manager, "upcoming"),
+        "analytics trends": lambda: leave_tools.get_leave_analytics(manager, "trends"),
+        "all leave policies": lambda: leave_tools.get_leave_policy(),
+        "policy search": lambda: leave_tools.search_leave_policies("Do I need a doctor's note for sick leave?"),
+        "holidays this year": lambda: leave_tools.get_holidays(f"{today.year}-01-01", f"{today.year}-12-31"),
+    }
+    print()
+    for name, call in large.items():
+        result = call()
+        assert not result.error, f"{name} failed: {result.error}"
+        report(name, *measure(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/bench_tool_selection.py
+"""
+Prompt tokens with every tool bound on every LLM call, against only the tools
+picked for the turn (tool_selection.py), fully offline.
+
+Plays the benchmark scenarios and lookup turns (benchmarks/scenarios.py)
+through process_message twice with ScriptedChatModel behind a one-tier model
+router: once binding all tools, once with a ToolSelector. Reports per scenario
+the prompt tokens per LLM call (ScriptedChatModel's estimate, which counts the
+bound schemas) and the schema tokens alone (history_manager.count_tokens,
+tiktoken when installed), then the tools bound per call, scripted tool calls
+that were not bound, and the cost of binding a subset per call against reusing
+the router's pre-bound runnable. Checks that both runs gave the same answers.
+
+    python -m benchmarks.bench_tool_selection --sessions 20
+"""
+import argparse
+import os
+import time
+from typing import Dict, List
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+import leave_graph
+from benchmarks.fake_llm import ScriptedChatModel
+from benchmarks.scenarios import LOOKUP_TURNS, SCENARIOS, benchmark_store, build_script
+from leave_store import set_store
+from model_router import ModelRouter, ModelRouterStats, ModelTier
+from tool_cache import tool_cache
+from tool_selection import ToolSelectionStats, ToolSelector, schema_tokens
+
+WORKLOAD = {**SCENARIOS, "lookups": LOOKUP_TURNS}
+
+
+def build_router(selection: bool, router_stats: ModelRouterStats,
+                 selection_stats: ToolSelectionStats) -> ModelRouter:
+    model = ScriptedChatModel(script=build_script(), reply="Is there anything else I can help with?")
+    selector = ToolSelector(leave_graph.tools, selection_stats) if selection else None
+    return ModelRouter([ModelTier("gpt-4o", "gpt-4o")],
+                       lambda tier, tools: leave_graph.agent_prompt | model.bind_tools(tools),
+                       leave_graph.tools, router_stats, selector)
+
+
+def run(selection: bool, sessions: int) -> Dict[str, Dict[str, object]]:
+    """Play every workload scenario once per session; per scenario: calls, prompt and schema tokens, answers."""
+    results = {}
+    full_schema = schema_tokens(leave_graph.tools)
+    set_store(benchmark_store(sessions * len(WORKLOAD)))
+    for index, (name, turns) in enumerate(WORKLOAD.items()):
+        router_stats, selection_stats = ModelRouterStats(), ToolSelectionStats()
+        leave_graph.set_agent_runnable(build_router(selection, router_stats, selection_stats))
+        leave_graph.set_checkpointer(leave_graph.create_checkpointer())
+        leave_graph.history_manager.reset()
+        tool_cache.clear()
+        answers = []
+        for session in range(sessions):
+            employee_id = f"B{index * sessions + session:05d}"
+            history: List[Dict[str, object]] = []
+            for turn in turns:
+                answer, history = leave_graph.process_message(employee_id, history, turn["user"])
+                answers.append(answer)
+        tier = router_stats.report().get("gpt-4o", {"calls": 0, "input_tokens": 0})
+        selected = selection_stats.report()
+        calls = tier["calls"]
+        results[name] = {
+            "calls": calls,
+            "prompt_tokens": tier["input_tokens"] / calls if calls else 0.0,
+            "schema_tokens": selected["schema_tokens_per_call"] if selection else full_schema,
+            "avg_tools": selected["avg_tools"] if selection else len(leave_graph.tools),
+            "unbound_calls": selected["unbound_calls"],
+            "answers": answers,
+        }
+    return results
+
+
+def bind_cost(repeats: int) -> Dict[str, float]:
+    """Microseconds per call to bind a tool subset anew, and to fetch the router's pre-bound runnable."""
+    model = ScriptedChatModel(script={})
+    subset = leave_graph.tools[:2]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        leave_graph.agent_prompt | model.bind_tools(subset)
+    bind = (time.perf_counter() - start) / repeats
+    router = ModelRouter([ModelTier("gpt-4o", "gpt-4o")], lambda tier, tools: model.bind_tools(tools),
+                         leave_graph.tools, ModelRouterStats())
+    names = tuple(tool.__name__ for tool in subset)
+    router._runnable(0, names)  # bound on first use
+    start = time.perf_counter()
+    for _ in range(repeats):
+        router._runnable(0, names)
+    cached = (time.perf_counter() - start) / repeats
+    return {"bind": bind * 1e6, "cached": cached * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens with all tools bound against per-turn tool selection")
+    parser.add_argument("--sessions", type=int, default=10, help="sessions per scenario")
+    parser.add_argument("--bind-repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    before = run(False, args.sessions)
+    after = run(True, args.sessions)
+
+    print(f"{len(leave_graph.tools)} tools, {schema_tokens(leave_graph.tools)} schema tokens when all are bound\n")
+    print(f"{'scenario':<26} {'calls':>6} {'tools':>6} {'prompt tok/call':>22} {'schema tok/call':>18} {'unbound':>8}")
+    totals = {"before": [0, 0.0, 0.0], "after": [0, 0.0, 0.0]}
+    for name in WORKLOAD:
+        old, new = before[name], after[name]
+        print(f"{name:<26} {new['calls']:>6} {new['avg_tools']:>6.1f} "
+              f"{old['prompt_tokens']:>9.0f} -> {new['prompt_tokens']:>7.0f} "
+              f"{old['schema_tokens']:>7.0f} -> {new['schema_tokens']:>6.0f} {new['unbound_calls']:>8}")
+        for label, result in (("before", old), ("after", new)):
+            totals[label][0] += result["calls"]
+            totals[label][1] += result["prompt_tokens"] * result["calls"]
+            totals[label][2] += result["schema_tokens"] * result["calls"]
+        assert old["answers"] == new["answers"], f"{name}: tool selection changed some answers"
+
+    (calls, old_prompt, old_schema), (_, new_prompt, new_schema) = totals["before"], totals["after"]
+    print(f"{'all':<26} {calls:>6} {'':>6} {old_prompt / calls:>9.0f} -> {new_prompt / calls:>7.0f} "
+          f"{old_schema / calls:>7.0f} -> {new_schema / calls:>6.0f}")
+    print(f"\nprompt tokens per LLM call: {1 - new_prompt / old_prompt:.0%} fewer "
+          f"({1 - new_schema / old_schema:.0%} fewer schema tokens)")
+
+    cost = bind_cost(args.bind_repeats)
+    print(f"binding a subset per call: {cost['bind']:.0f} us, pre-bound runnable: {cost['cached']:.1f} us")
+    print("answers are the same in both runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/bench_turn_budget.py
+"""
+Turn latency with and without per-turn budgets (turn_budget.py), fully offline.
+
+Plays the benchmark scenarios (benchmarks/scenarios.py) plus two failure
+sessions through process_message (or aprocess_message with --async), with
+ScriptedChatModel at --latency seconds per call:
+
+- looping: the model keeps calling check_leave_balance, 12 times in a row
+- hanging: one model call takes --hang seconds
+
+once without limits and once with --max-tool-iterations, --max-llm-calls and
+--deadline. Reports per run the turn latency (p50 / p95 / max), the model calls
+made and the budget counters (exhausted turns per reason, cancelled calls),
+and checks that the scenario answers are the same in both runs.
+
+    python -m benchmarks.bench_turn_budget --sessions 10
+    python -m benchmarks.bench_turn_budget --async --deadline 0.5 --hang 2
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+import leave_graph
+from benchmarks.fake_llm import ScriptedChatModel
+from benchmarks.scenarios import SCENARIOS, benchmark_store, build_script
+from benchmarks.stats import percentile
+from leave_store import set_store
+from model_router import ModelRouter, ModelRouterStats, ModelTier
+from tool_cache import tool_cache
+from turn_budget import TurnBudget, turn_budget_stats
+
+LOOPING = "Can you look into my leave situation and tell me if I should take time off next month?"
+HANGING = "Could you think carefully about whether my team can cover for me if I go away next month?"
+
+
+def failures(hang: float) -> Dict[str, List[Dict[str, Any]]]:
+    return {
+        "looping": [{"user": LOOPING, "steps": [
+            {"tool": "check_leave_balance", "args": {"employee_id": "{employee_id}"}}] * 12 + [
+            {"reply": "You have enough annual leave left for next month."}]}],
+        "hanging": [{"user": HANGING, "steps": [{"reply": "Yes, nobody else is away then.", "latency": hang}]}],
+    }
+
+
+def setup(budget: TurnBudget, args, stats: ModelRouterStats) -> None:
+    script = build_script()
+    script.update({turn["user"]: turn["steps"] for turns in failures(args.hang).values() for turn in turns})
+    model = ScriptedChatModel(script=script, reply="Is there anything else I can help with?", latency=args.latency)
+    leave_graph.set_agent_runnable(ModelRouter([ModelTier("gpt-4o", "gpt-4o")],
+                                               lambda tier, tools: leave_graph.agent_prompt | model.bind_tools(tools),
+                                               leave_graph.tools, stats))
+    leave_graph.set_turn_budget(budget)
+    leave_graph.set_checkpointer(leave_graph.create_checkpointer())
+    leave_graph.history_manager.reset()
+    set_store(benchmark_store(args.sessions * (len(SCENARIOS) + 2)))
+    tool_cache.clear()
+    turn_budget_stats.reset()
+
+
+def run(use_async: bool, sessions: int, hang: float) -> Tuple[List[float], Dict[str, List[str]]]:
+    """Every scenario and failure once per session; returns turn latencies and the answers per scenario."""
+    latencies, answers = [], {}
+    for index, (name, turns) in enumerate({**SCENARIOS, **failures(hang)}.items()):
+        answers[name] = []
+        for session in range(sessions):
+            employee_id = f"B{index * sessions + session:05d}"
+            history: List[Dict[str, Any]] = []
+            for turn in turns:
+                start = time.perf_counter()
+                if use_async:
+                    answer, history = asyncio.run(leave_graph.aprocess_message(employee_id, history, turn["user"]))
+                else:
+                    answer, history = leave_graph.process_message(employee_id, history, turn["user"])
+                latencies.append(time.perf_counter() - start)
+                answers[name].append(answer)
+    return latencies, answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turn latency with and without per-turn budgets")
+    parser.add_argument("--sessions", type=int, default=5, help="sessions per scenario")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per model call")
+    parser.add_argument("--hang", type=float, default=1.0, help="seconds of the hanging model call")
+    parser.add_argument("--max-tool-iterations", type=int, default=4)
+    parser.add_argument("--max-llm-calls", type=int, default=6)
+    parser.add_argument("--deadline", type=float, default=0.5, help="seconds per turn")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use aprocess_message")
+    args = parser.parse_args()
+
+    runs = {
+        "no budget": TurnBudget(1000, 1000, 0),
+        "budget": TurnBudget(args.max_tool_iterations, args.max_llm_calls, args.deadline),
+    }
+    print(f"budget: {args.max_tool_iterations} tool rounds, {args.max_llm_calls} model calls, "
+          f"{args.deadline:g}s per turn; {args.sessions} sessions, {'async' if args.use_async else 'sync'}\n")
+    print(f"{'run':<10} {'turns':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'calls':>6} "
+          f"{'exhausted':>10} {'cancelled':>10}  by reason")
+    answers_by_run = {}
+    for name, budget in runs.items():
+        stats = ModelRouterStats()
+        setup(budget, args, stats)
+        latencies, answers_by_run[name] = run(args.use_async, args.sessions, args.hang)
+        latencies.sort()
+        counters = turn_budget_stats.report()
+        calls = sum(entry["calls"] for entry in stats.report().values())
+        print(f"{name:<10} {len(latencies):>6} {percentile(latencies, 50) * 1000:>8.1f} "
+              f"{percentile(latencies, 95) * 1000:>8.1f} {latencies[-1] * 1000:>8.1f} {calls:>6} "
+              f"{counters['exhausted']:>10} {counters['cancelled_calls']:>10}  {counters['by_reason']}")
+
+    unlimited, limited = answers_by_run.values()
+    for scenario in SCENARIOS:
+        assert unlimited[scenario] == limited[scenario], f"{scenario}: the budget changed some answers"
+    print(f"\nscenario answers are the same in both runs; looping turn with a budget:\n\n{limited['looping'][0]}")
+
+
+if __name__ == "__main__":
+    main()
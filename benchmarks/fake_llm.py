@@ -0,0 +1,159 @@
+# benchmarks/fake_llm.py
+"""Local stand-in for ChatOpenAI so benchmarks run offline and deterministically."""
+import asyncio
+import json
+import re
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+class FakeToolChatModel(BaseChatModel):
+    """
+    Chat model that always answers with a fixed reply.
+
+    Supports bind_tools() like ChatOpenAI, and records the messages and tool
+    schemas of the last call so benchmarks can inspect the request payload.
+    If tool_call is set ({"name": ..., "args": {...}}), the model first calls
+    that tool and replies once the tool result is in the conversation.
+    latency simulates the provider round trip (time.sleep / asyncio.sleep).
+    """
+
+    reply: str = "OK"
+    tool_call: Optional[Dict[str, Any]] = None
+    latency: float = 0.0
+    last_messages: Optional[List[BaseMessage]] = None
+    last_tools: Optional[List[dict]] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-chat-model"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages, **kwargs)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages, **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        self.last_messages = messages
+        self.last_tools = kwargs.get("tools")
+        # The answer depends only on the input, so concurrent sessions don't interfere
+        if self.tool_call and not any(isinstance(m, ToolMessage) for m in messages[-3:]):
+            message = AIMessage(content="", tool_calls=[{
+                "name": self.tool_call["name"],
+                "args": self.tool_call["args"],
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+            }])
+        else:
+            message = AIMessage(content=self.reply)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class ScriptedChatModel(FakeToolChatModel):
+    """
+    Chat model that replays a script keyed by the user's message.
+
+    script maps a user message to the steps of that turn: {"tool": name, "args": {...}}
+    for a tool call, {"reply": text} for the answer; a step's optional "latency"
+    (seconds) is added to the model's. The step is picked by counting
+    the model's earlier responses in the current turn, so the output depends only
+    on the input. Argument values may use {employee_id} (read from the session
+    context message) and {request_id} (the last request ID seen in a tool result).
+    Unscripted messages get the default reply. Responses carry usage_metadata with
+    a characters/4 token estimate of the messages and the bound tool schemas.
+
+    malformed_rate makes that share of tool calls come back as invalid_tool_calls
+    with cut-off JSON arguments, the way a weak model fails; which calls fail
+    depends only on the input (user message, step and employee).
+    """
+
+    script: Dict[str, List[Dict[str, Any]]] = {}
+    malformed_rate: float = 0.0
+
+    def _step(self, messages: List[BaseMessage]):
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        steps = self.script.get(messages[last_human].content, []) if last_human >= 0 else []
+        step_index = sum(isinstance(m, AIMessage) for m in messages[last_human + 1:])
+        step = steps[step_index] if step_index < len(steps) else {"reply": self.reply}
+        return last_human, step_index, step
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        # A step's "latency" adds to the model's, e.g. for a call that hangs
+        extra = self._step(messages)[2].get("latency", 0.0)
+        if extra:
+            time.sleep(extra)
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        extra = self._step(messages)[2].get("latency", 0.0)
+        if extra:
+            await asyncio.sleep(extra)
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        self.last_messages = messages
+        self.last_tools = kwargs.get("tools")
+        last_human, step_index, step = self._step(messages)
+
+        if "tool" in step:
+            values = _script_values(messages)
+            args = {k: v.format(**values) if isinstance(v, str) else v for k, v in step["args"].items()}
+            key = f"{messages[last_human].content}|{step_index}|{values['employee_id']}"
+            if self.malformed_rate and zlib.crc32(key.encode("utf-8")) % 10000 < self.malformed_rate * 10000:
+                message = AIMessage(content="", invalid_tool_calls=[{
+                    "name": step["tool"], "args": json.dumps(args)[:-2], "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "error": "Function arguments are not valid JSON",
+                }])
+            else:
+                message = AIMessage(content="", tool_calls=[{
+                    "name": step["tool"], "args": args, "id": f"call_{uuid.uuid4().hex[:12]}",
+                }])
+        else:
+            message = AIMessage(content=step["reply"])
+        # Tool schemas count as input, as in the provider's prompt_tokens
+        input_chars = sum(len(m.content) for m in messages if isinstance(m.content, str))
+        input_chars += len(json.dumps(self.last_tools)) if self.last_tools else 0
+        output_chars = len(message.content) + sum(len(str(c["args"]))
+                                                  for c in message.tool_calls + message.invalid_tool_calls)
+        message.usage_metadata = {
+            "input_tokens": input_chars // 4,
+            "output_tokens": output_chars // 4,
+            "total_tokens": (input_chars + output_chars) // 4,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+_EMPLOYEE_ID = re.compile(r"Employee ID: (\w+)")
+_REQUEST_ID = re.compile(r"REQ\d+")
+
+
+def _script_values(messages: List[BaseMessage]) -> Dict[str, str]:
+    values = {"employee_id": "", "request_id": ""}
+    for message in messages:
+        if isinstance(message, SystemMessage):
+            match = _EMPLOYEE_ID.search(message.content)
+            if match:
+                values["employee_id"] = match.group(1)
+        elif isinstance(message, ToolMessage):
+            request_ids = _REQUEST_ID.findall(str(message.content))
+            if request_ids:
+                values["request_id"] = request_ids[-1]
+    return values
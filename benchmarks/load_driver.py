@@ -0,0 +1,177 @@
+# benchmarks/load_driver.py
+"""
+Scale test of the leave tools against a large synthetic data layer.
+
+Fills a store with generated employees and multi-year histories
+(benchmarks/workload.py), then replays a mixed read/write workload against the
+leave_tools functions and reports ops/s, per-operation latency and memory
+(resident set size) growth during population and load.
+
+    python -m benchmarks.load_driver --employees 100000 --years 5 --ops 200000
+    python -m benchmarks.load_driver --backend sqlite --db-path /tmp/leave.db --threads 8
+    python -m benchmarks.load_driver --mix check_leave_balance=50,view_leave_history=50
+"""
+import argparse
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.stats import percentile
+from benchmarks.workload import RequestIndex, generate_employees
+from leave_data import LEAVE_TYPES
+from leave_intervals import get_interval_index
+from leave_store import MemoryStore, SQLiteStore, set_store
+from leave_tools import (
+    check_and_process_leave,
+    check_leave_balance,
+    get_leave_policy,
+    update_leave_status,
+    view_leave_history,
+)
+from tool_cache import tool_cache
+
+DEFAULT_MIX = "check_leave_balance=40,view_leave_history=25,check_and_process_leave=15,update_leave_status=15,get_leave_policy=5"
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build_operations(employee_ids: List[str], index: RequestIndex) -> Dict[str, Callable[[random.Random], str]]:
+    """One callable per tool that picks random, valid arguments and calls it."""
+    leave_types = ["annual", "sick", "personal"]
+    first_day = date.today() + timedelta(days=1)
+
+    def submit(rng):
+        start = first_day + timedelta(days=rng.randrange(365))
+        end = start + timedelta(days=rng.choice((0, 0, 1, 2, 4)))
+        return check_and_process_leave(rng.choice(employee_ids), rng.choice(leave_types),
+                                       start.isoformat(), end.isoformat(), "Load test")
+
+    def update(rng):
+        employee_id, request_id = index.random_request(rng) or (rng.choice(employee_ids), "REQ0")
+        return update_leave_status(employee_id, request_id, rng.choice(("approved", "rejected")))
+
+    return {
+        "check_leave_balance": lambda rng: check_leave_balance(rng.choice(employee_ids)),
+        "view_leave_history": lambda rng: view_leave_history(rng.choice(employee_ids)),
+        "check_and_process_leave": submit,
+        "update_leave_status": update,
+        "get_leave_policy": lambda rng: get_leave_policy(rng.choice(LEAVE_TYPES + [None])),
+    }
+
+
+def parse_mix(mix: str) -> Tuple[List[str], List[float]]:
+    names, weights = [], []
+    for part in mix.split(","):
+        name, weight = part.split("=")
+        names.append(name.strip())
+        weights.append(float(weight))
+    return names, weights
+
+
+def run_load(operations, mix: str, total_ops: int, threads: int, seed: int) -> Tuple[Dict[str, List[float]], float]:
+    names, weights = parse_mix(mix)
+    unknown = set(names) - set(operations)
+    if unknown:
+        raise SystemExit(f"unknown operations in --mix: {', '.join(sorted(unknown))}")
+    results: List[Dict[str, List[float]]] = []
+
+    def worker(worker_id: int, count: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        latencies = {name: [] for name in names}
+        plan = rng.choices(names, weights=weights, k=count)
+        for name in plan:
+            operation = operations[name]
+            start = time.perf_counter()
+            operation(rng)
+            latencies[name].append(time.perf_counter() - start)
+        results.append(latencies)
+
+    per_thread = [total_ops // threads + (i < total_ops % threads) for i in range(threads)]
+    workers = [threading.Thread(target=worker, args=(i, n)) for i, n in enumerate(per_thread)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    merged: Dict[str, List[float]] = {name: [] for name in names}
+    for latencies in results:
+        for name, values in latencies.items():
+            merged[name].extend(values)
+    return merged, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed read/write load against a large synthetic leave store")
+    parser.add_argument("--employees", type=int, default=100000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--records-per-year", type=int, default=6)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--db-path", help="SQLite file (default: a new temporary file)")
+    parser.add_argument("--ops", type=int, default=100000)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="comma-separated tool=weight pairs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-tool-cache", action="store_true", help="disable the read-only tool cache")
+    args = parser.parse_args()
+
+    tool_cache.enabled = not args.no_tool_cache
+    rss_start = rss_mb()
+    if args.backend == "sqlite":
+        path = args.db_path or os.path.join(tempfile.mkdtemp(prefix="leave-load-"), "leave.db")
+        store = SQLiteStore(path)
+    else:
+        path = None
+        store = MemoryStore({})
+    set_store(store)
+
+    index = RequestIndex()
+    start = time.perf_counter()
+    store.add_employees(generate_employees(args.employees, args.years, args.records_per_year,
+                                           seed=args.seed, index=index))
+    populate_seconds = time.perf_counter() - start
+    rows = sum(index.request_count)
+    rss_loaded = rss_mb()
+    print(f"populated {args.backend}{f' ({path})' if path else ''}: {args.employees} employees, "
+          f"{rows} history rows in {populate_seconds:.1f}s ({rows / populate_seconds:,.0f} rows/s)")
+    print(f"RSS {rss_start:.0f} MB -> {rss_loaded:.0f} MB after population "
+          f"({(rss_loaded - rss_start) * 2**20 / max(args.employees, 1) / 1024:.2f} KiB per employee)")
+
+    # Build the overlap index up front, so the first submission does not pay for it
+    start = time.perf_counter()
+    get_interval_index().refresh()
+    print(f"built the leave interval index in {time.perf_counter() - start:.1f}s")
+
+    operations = build_operations(index.employee_ids, index)
+    latencies, elapsed = run_load(operations, args.mix, args.ops, args.threads, args.seed)
+    rss_after = rss_mb()
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"\n{total} ops on {args.threads} thread(s) in {elapsed:.2f}s: {total / elapsed:,.0f} ops/s")
+    print(f"{'operation':<26} {'ops':>8} {'share':>6} {'mean us':>9} {'p50 us':>8} {'p99 us':>9}")
+    for name, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        print(f"{name:<26} {len(values):>8} {len(values) / total:>6.0%} {sum(values) / len(values) * 1e6:>9.1f} "
+              f"{percentile(values, 50) * 1e6:>8.1f} {percentile(values, 99) * 1e6:>9.1f}")
+    print(f"\nRSS growth during load: {rss_after - rss_loaded:+.1f} MB ({rss_after:.0f} MB total)")
+    if tool_cache.enabled:
+        print(f"tool cache hit rate: {tool_cache.stats()['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
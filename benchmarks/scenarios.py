@@ -0,0 +1,105 @@
+# benchmarks/scenarios.py
+"""
+Scripted multi-turn conversations for the offline benchmarks.
+
+Each scenario is a list of turns; a turn is the user's message and the steps
+ScriptedChatModel plays for it (tool calls, then the reply). A turn with no
+steps is answered by the router's fast path without the LLM.
+"""
+from typing import Any, Dict, List
+
+from leave_store import MemoryStore
+
+SCENARIOS: Dict[str, List[Dict[str, Any]]] = {
+    "balance_check": [
+        {"user": "What's my leave balance?", "steps": []},
+        {"user": "Thanks. If I take 2 sick days on 2025-10-02 and 2025-10-03, how many would I have left?",
+         "steps": [
+             {"tool": "check_leave_balance", "args": {"employee_id": "{employee_id}"}},
+             {"reply": "You currently have 7 sick days, so you would have 5 left after those two days."},
+         ]},
+    ],
+    "multi_step_leave_request": [
+        {"user": "I'd like to take some annual leave next month for a family trip.",
+         "steps": [
+             {"reply": "Happy to help. What start and end dates would you like for your annual leave?"},
+         ]},
+        {"user": "From 2025-11-10 to 2025-11-12, please.",
+         "steps": [
+             {"tool": "check_leave_balance", "args": {"employee_id": "{employee_id}"}},
+             {"tool": "check_and_process_leave", "args": {
+                 "employee_id": "{employee_id}", "leave_type": "annual",
+                 "start_date": "2025-11-10", "end_date": "2025-11-12", "reason": "Family trip"}},
+             {"reply": "Your annual leave from 2025-11-10 to 2025-11-12 has been submitted."},
+         ]},
+        {"user": "Great, can you confirm it shows up in my records now together with the earlier ones?",
+         "steps": [
+             {"tool": "view_leave_history", "args": {"employee_id": "{employee_id}"}},
+             {"reply": "Yes, the request from 2025-11-10 to 2025-11-12 is in your leave history."},
+         ]},
+    ],
+    "status_update": [
+        {"user": "Please submit one day of sick leave on 2025-10-20.",
+         "steps": [
+             {"tool": "check_and_process_leave", "args": {
+                 "employee_id": "{employee_id}", "leave_type": "sick",
+                 "start_date": "2025-10-20", "end_date": "2025-10-20", "reason": ""}},
+             {"reply": "Your sick leave for 2025-10-20 has been submitted."},
+         ]},
+        {"user": "I'm feeling better after all, please cancel that request.",
+         "steps": [
+             {"tool": "update_leave_status", "args": {
+                 "employee_id": "{employee_id}", "request_id": "{request_id}", "new_status": "rejected"}},
+             {"reply": "Done, the request has been withdrawn and your sick leave balance restored."},
+         ]},
+    ],
+}
+
+# Read-only questions, each needing one or two lookups (a session of them is the
+# "lookups" workload of bench_model_router and bench_tool_selection)
+LOOKUP_TURNS: List[Dict[str, Any]] = [
+    {"user": "Do I need a doctor's note if I'm off sick for two days?",
+     "steps": [
+         {"tool": "search_leave_policies", "args": {"query": "doctor's note sick leave"}},
+         {"reply": "A doctor's note is only required for more than 3 consecutive sick days."},
+     ]},
+    {"user": "Which holidays are there between 2025-12-01 and 2025-12-31?",
+     "steps": [
+         {"tool": "get_holidays", "args": {"start_date": "2025-12-01", "end_date": "2025-12-31"}},
+         {"reply": "Christmas Day on 2025-12-25 is the only company holiday in December."},
+     ]},
+    {"user": "Show me my leave history and my current balance.",
+     "steps": [
+         {"tool": "view_leave_history", "args": {"employee_id": "{employee_id}"}},
+         {"tool": "check_leave_balance", "args": {"employee_id": "{employee_id}"}},
+         {"reply": "You have no leave on record yet, and 20 annual, 10 sick and 3 personal days available."},
+     ]},
+    {"user": "Who is out between 2025-11-10 and 2025-11-14?",
+     "steps": [
+         {"tool": "get_team_absences",
+          "args": {"employee_id": "{employee_id}", "start_date": "2025-11-10", "end_date": "2025-11-14"}},
+         {"reply": "Nobody is on leave that week."},
+     ]},
+]
+
+
+def build_script() -> Dict[str, List[Dict[str, Any]]]:
+    """ScriptedChatModel script covering every scenario and lookup turn."""
+    script = {turn["user"]: turn["steps"] for turns in SCENARIOS.values() for turn in turns}
+    script.update({turn["user"]: turn["steps"] for turn in LOOKUP_TURNS})
+    return script
+
+
+def benchmark_store(employee_count: int) -> MemoryStore:
+    """In-memory store with one fresh employee per benchmark session (B00000, B00001, ...)."""
+    db = {
+        f"B{i:05d}": {
+            "name": f"Bench User {i}",
+            "email": f"bench{i}@company.com",
+            "password": "bench",
+            "leave_balance": {"annual": 20, "sick": 10, "personal": 3},
+            "leave_history": [],
+        }
+        for i in range(employee_count)
+    }
+    return MemoryStore(db)
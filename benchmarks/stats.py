@@ -0,0 +1,11 @@
+# benchmarks/stats.py
+"""Small helpers shared by the benchmark scripts."""
+from typing import List
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
@@ -0,0 +1,134 @@
+# benchmarks/stress_leave_submission.py
+"""
+Stress test for concurrent leave submission.
+
+Fires thousands of check_and_process_leave / request_leave / update_leave_status
+calls from threads (memory and SQLite stores) and from several processes sharing
+one SQLite file, then checks that no balance went negative, every balance equals
+its starting value minus the approved days, and every request ID is unique.
+
+    python -m benchmarks.stress_leave_submission --employees 20 --requests 4000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Every request is for the same dates, to make employees' requests race; flag
+# overlaps instead of refusing them so they still reach the store
+os.environ.setdefault("LEAVE_OVERLAP_POLICY", "flag")
+
+import leave_tools
+from leave_store import MemoryStore, SQLiteStore, set_store
+
+STARTING_BALANCE = {"annual": 20, "sick": 10, "personal": 3}
+
+
+def make_employees(store, count):
+    for i in range(count):
+        store.add_employee(f"S{i:04d}", f"Stress {i}", f"s{i}@company.com", "x", STARTING_BALANCE)
+    return [f"S{i:04d}" for i in range(count)]
+
+
+def submit_one(employee_ids, seed):
+    rng = random.Random(seed)
+    employee_id = rng.choice(employee_ids)
+    leave_type = rng.choice(["annual", "sick", "personal", "bereavement"])
+    days = rng.randint(1, 3)
+    # Monday 2025-03-03 onwards, so every request has working days and reaches the store
+    end_day = 2 + days
+    if rng.random() < 0.5:
+        return leave_tools.check_and_process_leave(employee_id, leave_type, "2025-03-03", f"2025-03-{end_day:02d}")
+    return leave_tools.request_leave(employee_id, leave_type, "2025-03-03", f"2025-03-{end_day:02d}")
+
+
+def flip_one(employee_ids, seed):
+    # Reject an earlier request so balance restores race with new deductions.
+    # (Re-approving could hit the "insufficient balance" path, which updates the
+    # status without deducting by design and would break the balance check.)
+    rng = random.Random(seed)
+    employee_id = rng.choice(employee_ids)
+    return leave_tools.update_leave_status(employee_id, f"REQ{rng.randint(1, seed + 1)}", "rejected")
+
+
+def run_batch(db_path, employee_ids, seeds):
+    """Worker process entry point: point this process at the shared database and submit."""
+    set_store(SQLiteStore(db_path))
+    for seed in seeds:
+        submit_one(employee_ids, seed)
+        if seed % 5 == 0:
+            flip_one(employee_ids, seed)
+    return len(seeds)
+
+
+def check_store(store, employee_ids):
+    errors = []
+    request_ids = []
+    for employee_id in employee_ids:
+        balance = store.get_leave_balance(employee_id)
+        history = store.get_leave_history(employee_id)
+        request_ids.extend(record["request_id"] for record in history)
+        for leave_type, start in STARTING_BALANCE.items():
+            approved = sum(r["days"] for r in history if r["type"] == leave_type and r["status"] == "approved")
+            if balance[leave_type] < 0:
+                errors.append(f"{employee_id} {leave_type} balance is negative: {balance[leave_type]}")
+            if balance[leave_type] != start - approved:
+                errors.append(f"{employee_id} {leave_type}: balance {balance[leave_type]} != {start} - {approved} approved")
+    if len(request_ids) != len(set(request_ids)):
+        errors.append(f"{len(request_ids) - len(set(request_ids))} duplicate request IDs")
+    return errors, len(request_ids)
+
+
+def run_threads(label, store, employees, requests, workers):
+    set_store(store)
+    employee_ids = make_employees(store, employees)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda seed: submit_one(employee_ids, seed), range(requests)))
+        list(pool.map(lambda seed: flip_one(employee_ids, seed), range(0, requests, 5)))
+    elapsed = time.perf_counter() - start
+    errors, stored = check_store(store, employee_ids)
+    print(f"{label:<22} {requests:>6} submissions in {elapsed:6.2f}s ({requests / elapsed:8.0f}/s), "
+          f"{stored} stored, {'OK' if not errors else 'FAILED'}")
+    return errors
+
+
+def run_processes(employees, requests, processes):
+    db_path = os.path.join(tempfile.mkdtemp(), "stress.db")
+    store = SQLiteStore(db_path)
+    employee_ids = make_employees(store, employees)
+    chunks = [list(range(i, requests, processes)) for i in range(processes)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        list(pool.map(run_batch, [db_path] * processes, [employee_ids] * processes, chunks))
+    elapsed = time.perf_counter() - start
+    errors, stored = check_store(store, employee_ids)
+    print(f"{'sqlite x ' + str(processes) + ' processes':<22} {requests:>6} submissions in {elapsed:6.2f}s "
+          f"({requests / elapsed:8.0f}/s), {stored} stored, {'OK' if not errors else 'FAILED'}")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--employees", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    errors = []
+    errors += run_threads("memory x threads", MemoryStore({}), args.employees, args.requests, args.threads)
+    sqlite_path = os.path.join(tempfile.mkdtemp(), "stress.db")
+    errors += run_threads("sqlite x threads", SQLiteStore(sqlite_path), args.employees, args.requests, args.threads)
+    errors += run_processes(args.employees, args.requests, args.processes)
+
+    for error in errors[:20]:
+        print("  " + error)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
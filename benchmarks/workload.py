@@ -0,0 +1,106 @@
+# benchmarks/workload.py
+"""
+Synthetic employees with balances and multi-year leave histories.
+
+generate_employees() yields (employee_id, employee) pairs in the EMPLOYEE_DB
+layout, lazily and deterministically for a given seed, so a store can be
+filled with LeaveStore.add_employees() without building the whole dataset in
+memory first. History records get consecutive REQ<n> request IDs; the ID range
+of each employee is recorded in a RequestIndex so a load driver can target
+existing requests.
+"""
+import random
+from array import array
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+LEAVE_TYPE_WEIGHTS = {"annual": 55, "sick": 25, "personal": 12, "bereavement": 3, "unpaid": 5}
+REASONS = ["", "Family trip", "Medical appointment", "Moving house", "Wedding", "Conference", "Rest"]
+# One manager per team of this many employees (the first of each team)
+TEAM_SIZE = 10
+
+
+class RequestIndex:
+    """First request number and request count per generated employee, as two int arrays."""
+
+    def __init__(self):
+        self.employee_ids: list = []
+        self.first_request = array("q")
+        self.request_count = array("l")
+
+    def add(self, employee_id: str, first_request: int, count: int) -> None:
+        self.employee_ids.append(employee_id)
+        self.first_request.append(first_request)
+        self.request_count.append(count)
+
+    def random_request(self, rng: random.Random) -> Optional[Tuple[str, str]]:
+        """(employee_id, request_id) of a random generated request."""
+        index = rng.randrange(len(self.employee_ids))
+        count = self.request_count[index]
+        if not count:
+            return None
+        return self.employee_ids[index], f"REQ{self.first_request[index] + rng.randrange(count)}"
+
+
+def _leave_record(rng: random.Random, year: int, request_number: int, today: date) -> Dict[str, Any]:
+    leave_type = rng.choices(list(LEAVE_TYPE_WEIGHTS), weights=list(LEAVE_TYPE_WEIGHTS.values()))[0]
+    start = date(year, 1, 1) + timedelta(days=rng.randrange(365))
+    days = rng.choice((1, 1, 2, 3, 5)) if leave_type != "annual" else rng.randint(1, 10)
+    end = start + timedelta(days=days - 1)
+    if start > today:
+        status = rng.choice(("approved", "pending manager approval"))
+    else:
+        status = "approved" if rng.random() < 0.9 else "rejected"
+    return {
+        "type": leave_type,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "days": days,
+        "reason": rng.choice(REASONS),
+        "request_id": f"REQ{request_number}",
+        "status": status,
+    }
+
+
+def generate_employees(count: int, years: int = 3, records_per_year: int = 6, seed: int = 0,
+                       prefix: str = "W", first_request: int = 1,
+                       index: Optional[RequestIndex] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield count synthetic employees.
+
+    Args:
+        count: Number of employees (IDs are prefix + zero-padded number)
+        years: Years of history, ending with the current year
+        records_per_year: Average leave records per employee and year
+        seed: Seed for the random generator; the same seed gives the same data
+        prefix: Employee ID prefix (the default avoids EMPLOYEE_DB's E001, E002)
+        first_request: Number of the first generated REQ<n> request ID
+        index: If given, filled with each employee's request ID range
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    first_year = today.year - years + 1
+    request_number = first_request
+    width = max(len(str(count - 1)), 6)
+    for i in range(count):
+        employee_id = f"{prefix}{i:0{width}d}"
+        history = []
+        for year in range(first_year, today.year + 1):
+            for _ in range(max(0, int(rng.gauss(records_per_year, records_per_year / 3)))):
+                history.append(_leave_record(rng, year, request_number + len(history), today))
+        history.sort(key=lambda record: record["start_date"])
+        if index is not None:
+            index.add(employee_id, request_number, len(history))
+        request_number += len(history)
+        yield employee_id, {
+            "name": f"Employee {i}",
+            "email": f"employee{i}@company.com",
+            "password": f"pw{i}",
+            "role": "manager" if i % TEAM_SIZE == 0 else "employee",
+            "leave_balance": {
+                "annual": rng.randint(0, 30),
+                "sick": rng.randint(0, 15),
+                "personal": rng.randint(0, 5),
+            },
+            "leave_history": history,
+        }
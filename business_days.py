@@ -0,0 +1,153 @@
+# business_days.py
+import os
+import threading
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from holiday_calendar import DEFAULT_REGION, HolidayCalendar, get_holiday_calendar
+
+# --- Business-day calendar ---
+# Leave is charged in business days: weekends and company holidays inside a
+# request are not deducted from the balance. Counting goes through NumPy's
+# busday functions with a precomputed np.busdaycalendar, so one request costs a
+# few microseconds and a whole batch (an import, a report) is a single
+# vectorized np.busday_count call.
+#
+# Holidays are read from the holiday calendar (holiday_calendar.py), the one
+# source of truth for them. A year's holidays are fetched once per region; a
+# range spanning several years uses a calendar built from all of them, cached
+# by (region, first year, last year). The caches are dropped whenever the
+# holiday calendar reloads.
+#
+# The work week is LEAVE_WORKWEEK (a NumPy weekmask, default Monday to Friday)
+# and the region defaults to LEAVE_REGION.
+
+DEFAULT_WEEKMASK = os.getenv("LEAVE_WORKWEEK", "1111100")
+
+DateLike = Union[str, date, np.datetime64]
+ONE_DAY = timedelta(days=1)
+
+
+def _as_date(day: DateLike) -> date:
+    if isinstance(day, str):
+        return date.fromisoformat(day)
+    if isinstance(day, np.datetime64):
+        return day.astype("datetime64[D]").astype(object)
+    # datetime is a date subclass, but its isoformat() includes the time
+    return day if type(day) is date else date(day.year, day.month, day.day)
+
+
+class BusinessDayCalendar:
+    """Weekend- and holiday-aware day counting for one work week, per region."""
+
+    def __init__(self, holidays: Optional[HolidayCalendar] = None, weekmask: str = DEFAULT_WEEKMASK):
+        self.holidays = holidays or get_holiday_calendar()
+        self.weekmask = weekmask
+        self._lock = threading.Lock()
+        self._years: Dict[Tuple[str, int], np.ndarray] = {}
+        self._calendars: Dict[Tuple[str, int, int], np.busdaycalendar] = {}
+        self.holidays.add_listener(self.invalidate)
+
+    def close(self) -> None:
+        self.holidays.remove_listener(self.invalidate)
+
+    def invalidate(self) -> None:
+        """Forget the cached holidays and calendars (after the holiday data changed)."""
+        with self._lock:
+            self._years.clear()
+            self._calendars.clear()
+
+    def _year(self, region: str, year: int) -> np.ndarray:
+        holidays = self._years.get((region, year))
+        if holidays is None:
+            holidays = self._years[(region, year)] = np.array(self.holidays.dates(year, region), dtype="datetime64[D]")
+        return holidays
+
+    def calendar(self, first_year: int, last_year: Optional[int] = None,
+                 region: Optional[str] = None) -> np.busdaycalendar:
+        """The busday calendar holding the region's holidays of first_year through last_year."""
+        region = (region or DEFAULT_REGION).upper()
+        key = (region, first_year, last_year or first_year)
+        calendar = self._calendars.get(key)
+        if calendar is None:
+            with self._lock:
+                holidays = np.concatenate([self._year(region, year) for year in range(key[1], key[2] + 1)])
+                calendar = self._calendars[key] = np.busdaycalendar(weekmask=self.weekmask, holidays=holidays)
+        return calendar
+
+    def count(self, start: DateLike, end: DateLike, region: Optional[str] = None) -> int:
+        """
+        Business days from start to end, both inclusive.
+
+        Args:
+            start: First day of the leave (YYYY-MM-DD string or date)
+            end: Last day of the leave
+            region: Holiday region (default LEAVE_REGION)
+
+        Returns:
+            The number of working days in the range; 0 if it holds only
+            weekends and holidays or end is before start
+        """
+        start, end = _as_date(start), _as_date(end)
+        if end < start:
+            return 0
+        calendar = self.calendar(start.year, end.year, region)
+        # ISO strings are the cheapest scalar input for np.busday_count
+        return int(np.busday_count(start.isoformat(), (end + ONE_DAY).isoformat(), busdaycal=calendar))
+
+    def count_many(self, starts, ends, region: Optional[str] = None) -> np.ndarray:
+        """
+        Vectorized count(): business days of each (start, end) pair.
+
+        Args:
+            starts: Array-like of first days (datetime64, date or ISO strings)
+            ends: Array-like of last days, same length
+            region: Holiday region (default LEAVE_REGION)
+
+        Returns:
+            int64 array; 0 where end is before start or either date is NaT
+        """
+        starts = np.asarray(starts, dtype="datetime64[D]")
+        ends = np.asarray(ends, dtype="datetime64[D]")
+        valid = ~(np.isnat(starts) | np.isnat(ends)) & (ends >= starts)
+        result = np.zeros(starts.shape, dtype=np.int64)
+        if not valid.any():
+            return result
+        starts, ends = starts[valid], ends[valid]
+        years = np.concatenate([starts.min(keepdims=True), ends.max(keepdims=True)]).astype("datetime64[Y]")
+        first_year, last_year = (years.astype(np.int64) + 1970).tolist()
+        calendar = self.calendar(first_year, last_year, region)
+        result[valid] = np.busday_count(starts, ends + 1, busdaycal=calendar)
+        return result
+
+    def is_business_day(self, day: DateLike, region: Optional[str] = None) -> bool:
+        day = _as_date(day)
+        return bool(np.is_busday(day.isoformat(), busdaycal=self.calendar(day.year, region=region)))
+
+
+# --- Process-wide calendar ---
+_calendar: Optional[BusinessDayCalendar] = None
+_calendar_lock = threading.Lock()
+
+def get_business_calendar() -> BusinessDayCalendar:
+    """Return the business-day calendar of the current holiday calendar (see holiday_calendar.get_holiday_calendar)."""
+    global _calendar
+    holidays = get_holiday_calendar()
+    if _calendar is None or _calendar.holidays is not holidays:
+        with _calendar_lock:
+            if _calendar is None or _calendar.holidays is not holidays:
+                if _calendar is not None:
+                    _calendar.close()
+                _calendar = BusinessDayCalendar(holidays)
+    return _calendar
+
+def set_business_calendar(calendar: BusinessDayCalendar) -> None:
+    """
+    Replace the process-wide calendar (e.g. with another work week); it stays
+    in use while its holidays are the process-wide holiday calendar.
+    """
+    global _calendar
+    with _calendar_lock:
+        _calendar = calendar
@@ -0,0 +1,237 @@
+# history_manager.py
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+# --- Conversation windowing ---
+# process_message used to send the whole Streamlit history on every turn. The
+# HistoryManager keeps the most recent turns verbatim (within a token budget)
+# and folds older turns into a summary message. The summary is cached per
+# session and only extended with newly dropped turns, never regenerated.
+# The cache keeps the max_sessions most recently used sessions; an evicted
+# session's summary is rebuilt from its checkpointed thread on its next turn.
+#
+# Tool calls and their results stay in the window, so the model can reuse a
+# balance or history it already fetched instead of calling the tool again.
+# Results older than the last FULL_TOOL_RESULT_TURNS turns are cut down to a
+# short digest.
+
+DEFAULT_MAX_TURNS = 6
+DEFAULT_TOKEN_BUDGET = 1500
+DEFAULT_MAX_SESSIONS = 4096
+SUMMARY_MAX_CHARS = 1200
+SUMMARY_LINE_CHARS = 160
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+FULL_TOOL_RESULT_TURNS = 2
+TOOL_DIGEST_CHARS = 200
+
+_encode = None
+
+def count_tokens(text: str) -> int:
+    """Token count using tiktoken when installed, otherwise ~4 characters per token."""
+    global _encode
+    if _encode is None:
+        try:
+            import tiktoken
+            _encode = tiktoken.get_encoding("o200k_base").encode
+        except Exception:
+            _encode = False
+    if _encode:
+        return len(_encode(text))
+    return len(text) // 4 + 1
+
+def count_message_tokens(messages: Sequence[BaseMessage]) -> int:
+    # ~4 tokens of per-message framing, as in OpenAI's chat format
+    return sum(count_tokens(str(message.content)) + 4 for message in messages)
+
+def split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """Group messages into turns, each starting at a HumanMessage."""
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+def _role_label(message: BaseMessage) -> str:
+    if isinstance(message, HumanMessage):
+        return "User"
+    if isinstance(message, ToolMessage):
+        return f"Tool {message.name}" if message.name else "Tool"
+    return "Assistant"
+
+def digest_tool_message(message: ToolMessage, max_chars: int = TOOL_DIGEST_CHARS) -> ToolMessage:
+    """Copy of a tool result cut down to one line of at most max_chars, keeping its tool_call_id."""
+    content = " ".join(str(message.content).split())
+    if len(content) <= max_chars:
+        return message
+    return ToolMessage(content=content[:max_chars - 3] + "...", tool_call_id=message.tool_call_id,
+                       name=message.name, id=message.id)
+
+def ensure_valid_sequence(messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """
+    Drop messages that would make the request invalid for the chat API: tool
+    results without a preceding tool call, and tool calls whose results are
+    missing (e.g. an interrupted turn).
+    """
+    answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+    valid: List[BaseMessage] = []
+    open_calls: set = set()
+    for message in messages:
+        if isinstance(message, AIMessage) and message.tool_calls:
+            if not all(call["id"] in answered for call in message.tool_calls):
+                if message.content:
+                    valid.append(AIMessage(content=message.content, id=message.id))
+                continue
+            open_calls.update(call["id"] for call in message.tool_calls)
+        elif isinstance(message, ToolMessage):
+            if message.tool_call_id not in open_calls:
+                continue
+        valid.append(message)
+    return valid
+
+def extractive_summarizer(previous_summary: str, messages: Sequence[BaseMessage]) -> str:
+    """
+    Fold messages into the summary without calling an LLM.
+
+    Each message becomes one shortened line; the oldest lines are dropped once
+    the summary exceeds SUMMARY_MAX_CHARS.
+    """
+    lines = previous_summary.splitlines() if previous_summary else []
+    for message in messages:
+        content = " ".join(str(message.content).split())
+        if not content:
+            continue
+        if len(content) > SUMMARY_LINE_CHARS:
+            content = content[:SUMMARY_LINE_CHARS - 3] + "..."
+        lines.append(f"- {_role_label(message)}: {content}")
+    while lines and sum(len(line) + 1 for line in lines) > SUMMARY_MAX_CHARS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+def llm_summarizer(llm) -> Callable[[str, Sequence[BaseMessage]], str]:
+    """Summarizer that asks a chat model to extend the previous summary."""
+    def summarize(previous_summary: str, messages: Sequence[BaseMessage]) -> str:
+        transcript = "\n".join(f"{_role_label(m)}: {m.content}" for m in messages if m.content)
+        response = llm.invoke([
+            SystemMessage(content="You maintain a brief running summary of an HR leave-management chat. "
+                                  "Keep dates, leave types, request IDs and balances. Reply with the summary only."),
+            HumanMessage(content=f"Current summary:\n{previous_summary or '(empty)'}\n\nNew messages:\n{transcript}"),
+        ])
+        return str(response.content).strip()
+    return summarize
+
+
+class HistoryManager:
+    """Builds the message window sent to the graph for each turn."""
+
+    def __init__(self, max_turns: int = DEFAULT_MAX_TURNS, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 summarizer: Callable[[str, Sequence[BaseMessage]], str] = extractive_summarizer,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        # session_id -> (turns folded into the summary, content of the last folded message, summary),
+        # least recently used first
+        self._summaries: "OrderedDict[str, Tuple[int, str, str]]" = OrderedDict()
+
+    def window(self, session_id: str, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        """
+        Return the messages to send: an optional summary message followed by the
+        most recent turns that fit in max_turns and token_budget.
+        """
+        turns = split_turns(messages)
+        keep = min(len(turns), self.max_turns)
+        tokens = count_message_tokens([m for turn in turns[len(turns) - keep:] for m in turn])
+        # Always keep the latest turn, even if it alone exceeds the budget
+        while keep > 1 and tokens > self.token_budget:
+            tokens -= count_message_tokens(turns[len(turns) - keep])
+            keep -= 1
+
+        summary, fold_upto = self._summary(session_id, turns, len(turns) - keep)
+        recent_turns = turns[fold_upto:]
+        full_from = len(recent_turns) - FULL_TOOL_RESULT_TURNS
+        recent = [
+            digest_tool_message(m) if index < full_from and isinstance(m, ToolMessage) else m
+            for index, turn in enumerate(recent_turns) for m in turn
+        ]
+        recent = ensure_valid_sequence(recent)
+        if not summary:
+            return recent
+        return [SystemMessage(content=SUMMARY_PREFIX + summary)] + recent
+
+    def _summary(self, session_id: str, turns: List[List[BaseMessage]], fold_upto: int) -> Tuple[str, int]:
+        with self._lock:
+            folded, last_content, summary = self._summaries.get(session_id, (0, "", ""))
+            if session_id in self._summaries:
+                self._summaries.move_to_end(session_id)
+        # Start over if the conversation was cleared or no longer matches what was folded
+        if folded > len(turns) or (folded and str(turns[folded - 1][-1].content) != last_content):
+            folded, summary = 0, ""
+        # Turns already in the summary are never sent verbatim again
+        if fold_upto <= folded:
+            return summary, folded
+        new_messages = [m for turn in turns[folded:fold_upto] for m in turn]
+        summary = self.summarizer(summary, new_messages)
+        with self._lock:
+            self._summaries[session_id] = (fold_upto, str(turns[fold_upto - 1][-1].content), summary)
+            self._summaries.move_to_end(session_id)
+            while len(self._summaries) > self.max_sessions:
+                self._summaries.popitem(last=False)
+        return summary, fold_upto
+
+    def reset(self, session_id: Optional[str] = None) -> None:
+        with self._lock:
+            if session_id is None:
+                self._summaries.clear()
+            else:
+                self._summaries.pop(session_id, None)
+
+
+# --- Dict history ---
+# Lossless conversion between messages and the dict history kept by the UI:
+#   {"role": "user", "content": ...}
+#   {"role": "assistant", "content": ..., "tool_calls": [{"name", "args", "id"}]}
+#   {"role": "tool", "content": ..., "tool_call_id": ..., "name": ...}
+
+def messages_to_history(messages: Sequence[BaseMessage]) -> List[Dict[str, Any]]:
+    history: List[Dict[str, Any]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            history.append({"role": "user", "content": message.content})
+        elif isinstance(message, AIMessage):
+            entry: Dict[str, Any] = {"role": "assistant", "content": message.content}
+            if message.tool_calls:
+                entry["tool_calls"] = [
+                    {"name": call["name"], "args": call["args"], "id": call["id"]} for call in message.tool_calls
+                ]
+            history.append(entry)
+        elif isinstance(message, ToolMessage):
+            history.append({"role": "tool", "content": message.content,
+                            "tool_call_id": message.tool_call_id, "name": message.name})
+    return history
+
+def history_to_messages(history: Sequence[Dict[str, Any]]) -> List[BaseMessage]:
+    """Rebuild messages from dict history, dropping anything that would be an invalid sequence."""
+    messages: List[BaseMessage] = []
+    for entry in history:
+        role = entry.get("role")
+        if role == "user":
+            messages.append(HumanMessage(content=entry["content"]))
+        elif role == "assistant":
+            messages.append(AIMessage(content=entry.get("content", ""), tool_calls=[
+                {"name": call["name"], "args": call["args"], "id": call["id"], "type": "tool_call"}
+                for call in entry.get("tool_calls", [])
+            ]))
+        elif role == "tool":
+            messages.append(ToolMessage(content=entry["content"], tool_call_id=entry["tool_call_id"],
+                                        name=entry.get("name")))
+    return ensure_valid_sequence(messages)
+
+def is_displayed(entry: Dict[str, Any]) -> bool:
+    """Whether a dict history entry is shown in the chat (tool traffic is not)."""
+    return entry.get("role") in ("user", "assistant") and bool(entry.get("content"))
@@ -0,0 +1,169 @@
+# holiday_calendar.py
+import bisect
+import csv
+import os
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# --- Holiday calendar ---
+# Company holidays for several years and regions, loaded from a CSV file
+# (LEAVE_HOLIDAYS_PATH, default holidays.csv next to this module) with the
+# columns date (YYYY-MM-DD), name and region. A region of "*" marks a
+# company-wide holiday that applies to every region.
+#
+# Each region keeps its holidays sorted by ISO date string, which sorts like
+# the dates themselves, so "holidays in a range", "the next N holidays" and
+# "a year's holidays" are one or two bisect calls. The formatted get_holidays
+# answers are cached per (query, region) until the calendar is reloaded.
+#
+# The business-day calendar (business_days.py) reads its holidays from here
+# and registers with add_listener(), so a reload also refreshes the leave
+# day counts; there is no second copy of the holidays to keep in sync.
+
+DEFAULT_REGION = os.getenv("LEAVE_REGION", "US")
+ALL_REGIONS = "*"
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "holidays.csv")
+# Formatted responses kept before the cache starts over
+MAX_CACHED_RESPONSES = 1024
+
+DateLike = Union[str, date]
+
+
+def _iso(day: DateLike) -> str:
+    # Round-trip strings through date so "2025-7-4" or a bad date fails here
+    return (date.fromisoformat(day) if isinstance(day, str) else day).isoformat()
+
+
+def read_holidays(path: str) -> List[Dict[str, str]]:
+    """Holiday records (date, name, region) from a CSV file; region defaults to "*"."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [{"date": _iso(row["date"].strip()), "name": row["name"].strip(),
+                 "region": (row.get("region") or ALL_REGIONS).strip().upper()}
+                for row in csv.DictReader(f) if row.get("date", "").strip()]
+
+
+class HolidayCalendar:
+    """Holidays indexed by region and date."""
+
+    def __init__(self, holidays: Iterable[Dict[str, str]] = ()):
+        self._lock = threading.Lock()
+        self._listeners: Tuple[Callable[[], None], ...] = ()
+        self._load(holidays)
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "HolidayCalendar":
+        return cls(read_holidays(path or os.getenv("LEAVE_HOLIDAYS_PATH", DEFAULT_PATH)))
+
+    def _load(self, holidays: Iterable[Dict[str, str]]) -> None:
+        records = [{"date": _iso(h["date"]), "name": h["name"], "region": h.get("region", ALL_REGIONS).upper()}
+                   for h in holidays]
+        by_region: Dict[str, List[Dict[str, str]]] = {ALL_REGIONS: []}
+        for holiday in records:
+            by_region.setdefault(holiday["region"], []).append(holiday)
+        company_wide = by_region[ALL_REGIONS]
+        index: Dict[str, Tuple[List[str], List[Dict[str, str]]]] = {}
+        for region, holidays in by_region.items():
+            entries = sorted(holidays if region == ALL_REGIONS else holidays + company_wide, key=lambda h: h["date"])
+            index[region] = ([h["date"] for h in entries], entries)
+        # Readers use whichever index they picked up; a reload swaps in a new one
+        self._index = index
+        self._responses: Dict[Tuple[Any, ...], str] = {}
+
+    def reload(self, holidays: Optional[Iterable[Dict[str, str]]] = None, path: Optional[str] = None) -> None:
+        """
+        Replace the holidays (from records, or read from path / LEAVE_HOLIDAYS_PATH)
+        and tell the listeners.
+        """
+        with self._lock:
+            self._load(holidays if holidays is not None else
+                       read_holidays(path or os.getenv("LEAVE_HOLIDAYS_PATH", DEFAULT_PATH)))
+        for listener in self._listeners:
+            listener()
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call listener() after every reload."""
+        with self._lock:
+            self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener: Callable[[], None]) -> None:
+        with self._lock:
+            self._listeners = tuple(l for l in self._listeners if l != listener)
+
+    # --- Lookups ---
+
+    def regions(self) -> List[str]:
+        return sorted(region for region in self._index if region != ALL_REGIONS)
+
+    def _region(self, region: Optional[str]) -> Tuple[List[str], List[Dict[str, str]]]:
+        region = (region or DEFAULT_REGION).upper()
+        # An unknown region still gets the company-wide holidays
+        return self._index.get(region) or self._index[ALL_REGIONS]
+
+    def between(self, start: DateLike, end: DateLike, region: Optional[str] = None) -> List[Dict[str, str]]:
+        """Holidays from start to end (inclusive), by date."""
+        dates, entries = self._region(region)
+        return entries[bisect.bisect_left(dates, _iso(start)):bisect.bisect_right(dates, _iso(end))]
+
+    def upcoming(self, after: DateLike, count: int, region: Optional[str] = None) -> List[Dict[str, str]]:
+        """The next count holidays on or after the given day."""
+        dates, entries = self._region(region)
+        first = bisect.bisect_left(dates, _iso(after))
+        return entries[first:first + count]
+
+    def dates(self, year: int, region: Optional[str] = None) -> List[str]:
+        """ISO dates of the year's holidays (what business_days.py counts as days off)."""
+        dates, _ = self._region(region)
+        return dates[bisect.bisect_left(dates, f"{year:04d}-"):bisect.bisect_left(dates, f"{year + 1:04d}-")]
+
+    # --- Formatted answers (get_holidays) ---
+
+    def _cached(self, key: Tuple[Any, ...], render: Callable[[], str]) -> str:
+        responses = self._responses
+        response = responses.get(key)
+        if response is None:
+            if len(responses) >= MAX_CACHED_RESPONSES:
+                responses.clear()
+            response = responses[key] = render()
+        return response
+
+    def format_upcoming(self, count: int = 5, region: Optional[str] = None, today: Optional[date] = None) -> str:
+        """'Upcoming Holidays:' and the next count holidays from today, one per line."""
+        today = today or date.today()
+        region = (region or DEFAULT_REGION).upper()
+        return self._cached(("upcoming", today, count, region),
+                            lambda: format_holidays("Upcoming Holidays:", self.upcoming(today, count, region)))
+
+    def format_between(self, start: DateLike, end: DateLike, region: Optional[str] = None) -> str:
+        """The holidays from start to end, one per line."""
+        start, end, region = _iso(start), _iso(end), (region or DEFAULT_REGION).upper()
+        return self._cached(("between", start, end, region),
+                            lambda: format_holidays(f"Holidays from {start} to {end}:", self.between(start, end, region))
+                            if start <= end else "End date must be after start date.")
+
+
+def format_holidays(title: str, holidays: List[Dict[str, str]]) -> str:
+    """The title and one "- date: name" line per holiday."""
+    if not holidays:
+        return f"{title}\nNo company holidays.\n"
+    return title + "\n" + "".join(f"- {holiday['date']}: {holiday['name']}\n" for holiday in holidays)
+
+
+# --- Process-wide calendar ---
+_calendar: Optional[HolidayCalendar] = None
+_calendar_lock = threading.Lock()
+
+def get_holiday_calendar() -> HolidayCalendar:
+    """Return the process-wide holiday calendar, reading LEAVE_HOLIDAYS_PATH on first use."""
+    global _calendar
+    if _calendar is None:
+        with _calendar_lock:
+            if _calendar is None:
+                _calendar = HolidayCalendar.from_file()
+    return _calendar
+
+def set_holiday_calendar(calendar: HolidayCalendar) -> None:
+    """Replace the process-wide holiday calendar."""
+    global _calendar
+    with _calendar_lock:
+        _calendar = calendar
@@ -0,0 +1,305 @@
+# intent_router.py
+import calendar
+import re
+import threading
+from datetime import date
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+from leave_data import LEAVE_TYPES
+from leave_store import LeaveStore, get_store
+
+# --- Fast-path intent classification ---
+# Simple lookups ("check my balance", "show holidays") don't need an LLM round
+# trip. classify_intent() scores a message locally; the graph's router node
+# answers high-confidence intents straight from the matching tool and sends
+# everything else to the agent.
+
+# Minimum confidence for the router to skip the LLM
+FAST_PATH_THRESHOLD = 0.9
+
+# Used for "latency saved" until a real LLM turn has been timed
+DEFAULT_LLM_TURN_SECONDS = 2.0
+
+INTENT_PATTERNS = {
+    "leave_balance": [
+        r"\b(leave )?balances?\b",
+        r"\bhow many (leave |vacation |sick |personal )?days\b.*\b(left|have|remaining|available)\b",
+        r"\b(remaining|available) (leave|days)\b",
+    ],
+    "leave_history": [
+        r"\b(leave )?history\b",
+        r"\b(past|previous|my) (leaves|leave records|time off)\b",
+    ],
+    "holidays": [
+        r"\b(upcoming |company |public |next )?holidays\b",
+        r"\bholiday (list|calendar)\b",
+    ],
+    "leave_policy": [
+        r"\bpolic(y|ies)\b",
+        r"\b(rules?) (for|on|about) .*leave\b",
+    ],
+}
+
+COMPILED_PATTERNS = {
+    intent: [re.compile(pattern) for pattern in patterns]
+    for intent, patterns in INTENT_PATTERNS.items()
+}
+
+# Anything that looks like a leave request, a change, or a question about
+# someone else needs the agent. Colleagues named in the message are found
+# against the store's roster (see EmployeeRoster), not by a fixed list of names.
+DISQUALIFIERS = re.compile(
+    r"\b(request|apply|book|take|taking|need|want|cancel|approve|reject|update|change|submit|"
+    r"tomorrow|next week|next month|from|until|between|if|why|who|employee)\b"
+    r"|\d{1,4}[-/]\d{1,2}[-/]\d{1,4}"
+)
+
+MAX_FAST_PATH_WORDS = 12
+
+
+def classify_intent(message: str) -> Tuple[Optional[str], float]:
+    """
+    Classify a user message into a fast-path intent.
+
+    Returns:
+        (intent, confidence). intent is None when nothing matched.
+    """
+    text = message.lower().strip()
+    matches = [
+        intent for intent, patterns in COMPILED_PATTERNS.items()
+        if any(pattern.search(text) for pattern in patterns)
+    ]
+    if not matches:
+        return None, 0.0
+
+    confidence = 1.0
+    if len(matches) > 1:
+        # "balance and holidays" - the agent can do both in one turn
+        confidence -= 0.4
+    if DISQUALIFIERS.search(text):
+        confidence -= 0.5
+    if len(text.split()) > MAX_FAST_PATH_WORDS:
+        confidence -= 0.2
+    return matches[0], max(confidence, 0.0)
+
+
+def extract_leave_type(message: str) -> Optional[str]:
+    """Leave type mentioned in the message, if any (for policy lookups)."""
+    text = message.lower()
+    for leave_type in LEAVE_TYPES:
+        if leave_type in text:
+            return leave_type
+    return None
+
+
+# --- Holiday questions ---
+# The holidays fast path answers "holidays in December", "UK holidays 2026" or
+# "holidays this year" by passing the month, year and region to get_holidays.
+# A place, period or anything else it can't read ("holidays in Germany",
+# "holidays last year") goes to the agent instead of the default answer.
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+MONTHS["sept"] = 9
+# After "in", "for", ... the fast path reads only these words, a region, a month or a year
+HOLIDAY_QUALIFIER_WORDS = {"the", "this", "next", "my", "our", "me", "us", "upcoming", "coming", "company",
+                           "public", "bank", "holiday", "holidays", "year", "month"}
+HOLIDAY_PREPOSITIONS = {"in", "for", "at", "during", "across", "of", "around", "within", "over"}
+HOLIDAY_UNREADABLE = re.compile(r"\b(last|previous|past|ago|rest|remaining|weekend|week|region|country|office)\b")
+TOKEN = re.compile(r"[A-Za-z]+|\d+")
+
+
+def _preceding_word(words: Sequence[str], position: int) -> Optional[str]:
+    """The word before words[position], skipping "the"."""
+    while position > 0:
+        position -= 1
+        if words[position] != "the":
+            return words[position]
+    return None
+
+
+def holiday_query(message: str, regions: Sequence[str], today: Optional[date] = None) -> Optional[Dict[str, str]]:
+    """
+    get_holidays arguments for a holidays question, or None if the question
+    asks for something only the agent can work out.
+
+    Args:
+        message: The user's message
+        regions: The holiday calendar's regions (e.g. ["UK", "US"])
+        today: Today's date (default: date.today())
+
+    Returns:
+        start_date/end_date for a month or year, region if one was named;
+        {} for the upcoming holidays of the default region.
+    """
+    today = today or date.today()
+    text = message.lower()
+    if HOLIDAY_UNREADABLE.search(text):
+        return None
+    tokens = TOKEN.findall(message)
+    words = [token.lower() for token in tokens]
+    region = month = year = None
+    for position, (token, word) in enumerate(zip(tokens, words)):
+        # Two-letter codes only in capitals, so "show us" is not the US
+        if token.upper() in regions and (token.isupper() or len(token) > 2):
+            region = token.upper()
+        elif word in MONTHS and not (word == "may" and position == 0):
+            month = MONTHS[word]
+        elif word.isdigit() and len(word) == 4 and 1900 < int(word) < 2200:
+            year = int(word)
+        elif word in ("year", "month") and position and words[position - 1] in ("this", "next"):
+            offset = words[position - 1] == "next"
+            if word == "year":
+                year = today.year + offset
+            elif offset:
+                return None  # "next month" is a disqualifier anyway
+            else:
+                month, year = today.month, today.year
+        elif word not in HOLIDAY_QUALIFIER_WORDS and _preceding_word(words, position) in HOLIDAY_PREPOSITIONS:
+            return None
+    query = {"region": region} if region else {}
+    if month is not None:
+        # A month without a year is the next one of that name
+        year = year or (today.year if month >= today.month else today.year + 1)
+        last_day = calendar.monthrange(year, month)[1]
+        query.update(start_date=f"{year}-{month:02d}-01", end_date=f"{year}-{month:02d}-{last_day}")
+    elif year is not None:
+        query.update(start_date=f"{year}-01-01", end_date=f"{year}-12-31")
+    return query
+
+
+class RouterStats:
+    """Per-intent hit counts and estimated latency saved by the fast path."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.intents: Dict[str, Dict[str, float]] = {}
+        self.llm_turns = 0
+        self.llm_turn_seconds = 0.0
+
+    def _entry(self, intent: str) -> Dict[str, float]:
+        return self.intents.setdefault(intent, {"seen": 0, "hits": 0, "fast_seconds": 0.0})
+
+    def record_classification(self, intent: Optional[str], fast_path: bool, seconds: float = 0.0) -> None:
+        with self._lock:
+            entry = self._entry(intent or "other")
+            entry["seen"] += 1
+            if fast_path:
+                entry["hits"] += 1
+                entry["fast_seconds"] += seconds
+
+    def record_llm_turn(self, seconds: float) -> None:
+        """Record the duration of one LLM call, used as the baseline for latency saved."""
+        with self._lock:
+            self.llm_turns += 1
+            self.llm_turn_seconds += seconds
+
+    def average_llm_seconds(self) -> float:
+        if not self.llm_turns:
+            return DEFAULT_LLM_TURN_SECONDS
+        return self.llm_turn_seconds / self.llm_turns
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Hit rate, average fast-path latency and estimated seconds saved per intent."""
+        with self._lock:
+            baseline = self.average_llm_seconds()
+            report = {}
+            for intent, entry in self.intents.items():
+                hits = entry["hits"]
+                avg_fast = entry["fast_seconds"] / hits if hits else 0.0
+                report[intent] = {
+                    "seen": entry["seen"],
+                    "hits": hits,
+                    "hit_rate": hits / entry["seen"] if entry["seen"] else 0.0,
+                    "avg_fast_path_ms": avg_fast * 1000,
+                    "latency_saved_s": hits * max(baseline - avg_fast, 0.0),
+                }
+            return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self.intents.clear()
+            self.llm_turns = 0
+            self.llm_turn_seconds = 0.0
+
+
+router_stats = RouterStats()
+
+
+# --- Colleagues named in a message ---
+# "What's Carol's balance?" or "history of E002" asks about someone else, which
+# the fast path (always the asking employee's own data) must not answer. The
+# roster maps the words of every employee's name, and their IDs, to employee
+# IDs. It is built from the store on first use and then only reads the
+# employees a write reports that it doesn't know yet, since names never change.
+
+ROSTER_WORD = re.compile(r"[a-z0-9]+")
+
+
+class EmployeeRoster:
+    """Name words and IDs of the store's employees, to spot colleagues named in a message."""
+
+    def __init__(self, store: LeaveStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._words: Dict[str, set] = {}
+        self._known: set = set()
+        self._unknown: set = set()
+        self._stale = True
+        store.add_listener(self._on_change)
+
+    def close(self) -> None:
+        self.store.remove_listener(self._on_change)
+
+    def _on_change(self, employee_ids: Optional[Sequence[str]]) -> None:
+        with self._lock:
+            if employee_ids is None:
+                self._stale = True
+            else:
+                self._unknown.update(employee_id for employee_id in employee_ids if employee_id not in self._known)
+
+    def _add(self, employee_id: str) -> None:
+        employee = self.store.get_employee(employee_id)
+        if employee is None:
+            return
+        self._known.add(employee_id)
+        # Numbers in a name ("Bench User 2") would match dates and amounts
+        name_words = (word for word in ROSTER_WORD.findall(employee["name"].lower()) if not word.isdigit())
+        for word in {employee_id.lower(), *name_words}:
+            self._words.setdefault(word, set()).add(employee_id)
+
+    def _refresh(self) -> None:
+        if self._stale:
+            self._words, self._known, self._unknown = {}, set(), set(self.store.employee_ids())
+            self._stale = False
+        for employee_id in self._unknown:
+            self._add(employee_id)
+        self._unknown.clear()
+
+    def mentions_colleague(self, message: str, employee_id: str) -> bool:
+        """Whether the message names another employee (a word of their name, or their ID)."""
+        with self._lock:
+            self._refresh()
+            for word in ROSTER_WORD.findall(message.lower()):
+                named = self._words.get(word)
+                # Words the employee shares with everyone named (their own first name, say) don't count
+                if named and employee_id not in named:
+                    return True
+        return False
+
+
+_roster: Optional[EmployeeRoster] = None
+_roster_lock = threading.Lock()
+
+
+def get_roster() -> EmployeeRoster:
+    """Return the roster of the current store (see leave_store.get_store), building it on first use."""
+    global _roster
+    store = get_store()
+    if _roster is None or _roster.store is not store:
+        with _roster_lock:
+            if _roster is None or _roster.store is not store:
+                if _roster is not None:
+                    _roster.close()
+                _roster = EmployeeRoster(store)
+    return _roster
@@ -0,0 +1,512 @@
+# leave_analytics.py
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from leave_data import LEAVE_TYPES, SENSITIVE_LEAVE_TYPES, SHARED_LEAVE_TYPE
+from leave_store import LeaveStore, get_store
+from tool_output import ToolResult, error, table
+
+# --- Leave analytics ---
+# Team-wide reports (utilization, remaining balances, upcoming absences,
+# monthly trends) computed with NumPy over a columnar copy of every employee's
+# balance and leave history, instead of one tool call per employee.
+#
+# The columns are built once from the store and then kept current: the store
+# reports which employees each write touched (LeaveStore.add_listener), and
+# only those employees are re-read before the next report. An employee's
+# records always occupy one contiguous block of rows, so a refresh marks the
+# old block dead and appends a new one; dead rows are compacted away once they
+# make up half the table. Writes by other processes sharing a SQLite file are
+# not reported, so for such stores (LeaveStore.external_writes) the view is
+# rebuilt once it is older than LEAVE_ANALYTICS_MAX_AGE seconds (default 300).
+#
+# Only managers see who is away. For everyone else (restricted reports) the
+# upcoming absences are counts only, and the sensitive leave types (sick,
+# bereavement, ...) are pooled into plain "leave" (see pool_sensitive_types).
+
+DEFAULT_MAX_AGE_SECONDS = 300.0
+# Statuses counted as (planned) absences
+ABSENCE_STATUSES = ("approved", "pending manager approval")
+_INITIAL_CAPACITY = 1024
+# Records without a valid date get a start after and an end before every date
+_NO_START = np.iinfo(np.int32).max
+_NO_END = np.iinfo(np.int32).min
+
+
+def _day(day: date) -> int:
+    """Days since 1970-01-01, the unit of the start and end columns."""
+    return int(np.datetime64(day, "D").astype(np.int64))
+
+
+def _month(day: date) -> int:
+    """Months since 1970-01, the unit of the month column."""
+    return int(np.datetime64(day, "M").astype(np.int64))
+
+
+def _parse_days(values: List[str], missing: int) -> np.ndarray:
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), format="%Y-%m-%d", errors="coerce")
+    days = parsed.to_numpy("datetime64[D]")
+    return np.where(np.isnat(days), missing, days.astype(np.int64)).astype(np.int32)
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """array with room for at least size rows (capacity doubles, so appends are amortized O(1))."""
+    if size <= len(array):
+        return array
+    grown = np.zeros((max(size, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+    if array.dtype.kind == "f":
+        grown[:] = np.nan
+    grown[:len(array)] = array
+    return grown
+
+
+class LeaveAnalytics:
+    """Columnar view of all balances and leave records, with vectorized reports."""
+
+    def __init__(self, store: LeaveStore, max_age: Optional[float] = None):
+        self.store = store
+        if max_age is None:
+            max_age = float(os.getenv("LEAVE_ANALYTICS_MAX_AGE", DEFAULT_MAX_AGE_SECONDS)) if store.external_writes else float("inf")
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._dirty: set = set()
+        self._stale = True
+        self._built_at = 0.0
+        self.stats = {"rebuilds": 0, "refreshed_employees": 0, "compactions": 0}
+        store.add_listener(self._on_change)
+
+    def close(self) -> None:
+        self.store.remove_listener(self._on_change)
+
+    def _on_change(self, employee_ids: Optional[List[str]]) -> None:
+        # Runs on the writer's thread: only record what changed
+        with self._lock:
+            if employee_ids is None:
+                self._stale = True
+            else:
+                self._dirty.update(employee_ids)
+
+    # --- Building and refreshing ---
+
+    def _reset(self) -> None:
+        self._types: List[str] = list(LEAVE_TYPES)
+        self._type_codes = {leave_type: code for code, leave_type in enumerate(self._types)}
+        self._statuses: List[str] = list(ABSENCE_STATUSES) + ["rejected"]
+        self._status_codes = {status: code for code, status in enumerate(self._statuses)}
+        # Per employee
+        self._employee_ids: List[str] = []
+        self._names: List[str] = []
+        self._employee_index: Dict[str, int] = {}
+        self._id_array = self._name_array = np.zeros(0, dtype=object)
+        self._balance = np.full((0, len(self._types)), np.nan)  # NaN: no balance for that type
+        self._row_start = np.zeros(0, dtype=np.int64)
+        self._row_stop = np.zeros(0, dtype=np.int64)
+        # Per leave record
+        self._rows = 0
+        self._dead = 0
+        self._employee = np.zeros(0, dtype=np.int32)
+        self._type = np.zeros(0, dtype=np.intp)  # intp: used as np.bincount keys without a conversion
+        self._status = np.zeros(0, dtype=np.int16)
+        # Dates are int32 day numbers (and the start month a month number), so
+        # filters are plain integer comparisons
+        self._start = np.zeros(0, dtype=np.int32)
+        self._end = np.zeros(0, dtype=np.int32)
+        self._month = np.zeros(0, dtype=np.int32)
+        self._days = np.zeros(0, dtype=np.int32)
+        self._alive = np.zeros(0, dtype=bool)
+
+    def _code(self, codes: Dict[str, int], names: List[str], value: str) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _type_code(self, leave_type: str) -> int:
+        code = self._code(self._type_codes, self._types, leave_type)
+        if code >= self._balance.shape[1]:
+            self._balance = np.pad(self._balance, ((0, 0), (0, 1)), constant_values=np.nan)
+        return code
+
+    def _load(self, employees: Iterable) -> None:
+        """Set balances and append the records of (employee_id, name, balance, history) tuples."""
+        employee_codes, type_codes, status_codes, starts, ends, days = [], [], [], [], [], []
+        for employee_id, name, balance, history in employees:
+            index = self._employee_index.get(employee_id)
+            if index is None:
+                index = self._employee_index[employee_id] = len(self._employee_ids)
+                self._employee_ids.append(employee_id)
+                self._names.append(name)
+                self._balance = _grow(self._balance, index + 1)
+                self._row_start = _grow(self._row_start, index + 1)
+                self._row_stop = _grow(self._row_stop, index + 1)
+            else:
+                # Replace the employee's block of rows
+                start, stop = self._row_start[index], self._row_stop[index]
+                self._alive[start:stop] = False
+                self._dead += int(stop - start)
+            self._balance[index] = np.nan
+            for leave_type, remaining in balance.items():
+                code = self._type_code(leave_type)
+                self._balance[index, code] = remaining
+            first = self._rows + len(employee_codes)
+            self._row_start[index], self._row_stop[index] = first, first + len(history)
+            for record in history:
+                employee_codes.append(index)
+                type_codes.append(self._type_code(record["type"]))
+                status_codes.append(self._code(self._status_codes, self._statuses, record["status"]))
+                starts.append(record["start_date"])
+                ends.append(record["end_date"])
+                days.append(record["days"])
+        self._append_rows(employee_codes, type_codes, status_codes, starts, ends, days)
+
+    def _append_rows(self, employee_codes, type_codes, status_codes, starts, ends, days) -> None:
+        count = len(employee_codes)
+        if not count:
+            return
+        size = self._rows + count
+        for name in ("_employee", "_type", "_status", "_start", "_end", "_month", "_days", "_alive"):
+            setattr(self, name, _grow(getattr(self, name), size))
+        new = slice(self._rows, size)
+        self._employee[new] = employee_codes
+        self._type[new] = type_codes
+        self._status[new] = status_codes
+        start = _parse_days(starts, _NO_START)
+        self._start[new] = start
+        self._end[new] = _parse_days(ends, _NO_END)
+        self._month[new] = np.where(start == _NO_START, _NO_START,
+                                    start.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64))
+        self._days[new] = days
+        self._alive[new] = True
+        self._rows = size
+
+    def _compact(self) -> None:
+        alive = self._alive[:self._rows]
+        new_position = np.cumsum(alive) - 1
+        employees = len(self._employee_ids)
+        has_rows = self._row_stop[:employees] > self._row_start[:employees]
+        starts = self._row_start[:employees]
+        lengths = self._row_stop[:employees] - starts
+        self._row_start[:employees] = np.where(has_rows, new_position[np.minimum(starts, self._rows - 1)], 0)
+        self._row_stop[:employees] = self._row_start[:employees] + lengths
+        for name in ("_employee", "_type", "_status", "_start", "_end", "_month", "_days"):
+            setattr(self, name, getattr(self, name)[:self._rows][alive].copy())
+        self._rows = len(self._employee)
+        self._alive = np.ones(self._rows, dtype=bool)
+        self._dead = 0
+        self.stats["compactions"] += 1
+
+    def refresh(self, full: bool = False) -> None:
+        """Bring the view up to date; full=True rebuilds it from the store."""
+        with self._lock:
+            if full or self._stale or time.monotonic() - self._built_at > self.max_age:
+                self._reset()
+                self._dirty.clear()
+                self._stale = False
+                self._built_at = time.monotonic()
+                self._load(self.store.iter_leave_data())
+                self.stats["rebuilds"] += 1
+                return
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            changed = []
+            for employee_id in dirty:
+                employee = self.store.get_employee(employee_id)
+                if employee is not None:
+                    changed.append((employee_id, employee["name"], self.store.get_leave_balance(employee_id),
+                                    self.store.get_leave_history(employee_id)))
+            self._load(changed)
+            self.stats["refreshed_employees"] += len(changed)
+            if self._dead > max(self._rows // 2, _INITIAL_CAPACITY):
+                self._compact()
+
+    # --- Reports ---
+
+    def _employee_mask(self, employee_ids: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+        if employee_ids is None:
+            return None
+        mask = np.zeros(len(self._employee_ids), dtype=bool)
+        indexes = [self._employee_index[e] for e in employee_ids if e in self._employee_index]
+        mask[indexes] = True
+        return mask
+
+    def _row_mask(self, employees: Optional[np.ndarray]) -> np.ndarray:
+        mask = self._alive[:self._rows].copy()
+        if employees is not None:
+            mask &= employees[self._employee[:self._rows]]
+        return mask
+
+    def _statuses_mask(self, statuses: Sequence[str]) -> np.ndarray:
+        # One comparison per status is much faster than np.isin or a lookup table
+        column = self._status[:self._rows]
+        mask = np.zeros(self._rows, dtype=bool)
+        for status in statuses:
+            if status in self._status_codes:
+                mask |= column == self._status_codes[status]
+        return mask
+
+    def _employee_arrays(self):
+        """Employee IDs and names as object arrays, for fancy indexing by employee code."""
+        if len(self._id_array) != len(self._employee_ids):
+            self._id_array = np.array(self._employee_ids, dtype=object)
+            self._name_array = np.array(self._names, dtype=object)
+        return self._id_array, self._name_array
+
+    def employee_count(self, employee_ids: Optional[Sequence[str]] = None) -> int:
+        with self._lock:
+            self.refresh()
+            employees = self._employee_mask(employee_ids)
+            return len(self._employee_ids) if employees is None else int(employees.sum())
+
+    def utilization(self, year: Optional[int] = None, employee_ids: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Leave taken and remaining per leave type for one year (default: this year).
+
+        Columns: employees (with a balance of that type), taken and pending (days
+        of approved / pending requests starting in the year), remaining (sum of
+        current balances), utilization (taken / (taken + remaining); NaN for
+        types without a balance). Types with no balances and no records are left out.
+        """
+        year = year or date.today().year
+        with self._lock:
+            self.refresh()
+            employees = self._employee_mask(employee_ids)
+            rows = self._row_mask(employees)
+            start = self._start[:self._rows]
+            rows &= (start >= _day(date(year, 1, 1))) & (start < _day(date(year + 1, 1, 1)))
+            types = self._type[:self._rows]
+            days = self._days[:self._rows]
+            count = len(self._types)
+            approved = rows & self._statuses_mask(["approved"])
+            pending = rows & self._statuses_mask(["pending manager approval"])
+            # Masked weights over the whole column beat selecting the rows first
+            taken = np.bincount(types, weights=np.where(approved, days, 0), minlength=count)
+            waiting = np.bincount(types, weights=np.where(pending, days, 0), minlength=count)
+            balance = self._balance[:len(self._employee_ids)]
+            if employees is not None:
+                balance = balance[employees]
+            missing = np.isnan(balance)
+            remaining = np.where(missing, 0, balance).sum(axis=0)
+            holders = len(balance) - missing.sum(axis=0)
+            frame = pd.DataFrame({
+                "employees": holders,
+                "taken": taken.astype(np.int64),
+                "pending": waiting.astype(np.int64),
+                "remaining": remaining.astype(np.int64),
+            }, index=pd.Index(self._types, name="leave_type"))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frame["utilization"] = np.where(holders > 0, frame["taken"] / (frame["taken"] + frame["remaining"]), np.nan)
+        return frame[(frame[["employees", "taken", "pending"]] > 0).any(axis=1)]
+
+    def balance_summary(self, employee_ids: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Distribution of current balances per leave type: employees, total, mean, median, min, max, at_zero."""
+        with self._lock:
+            self.refresh()
+            employees = self._employee_mask(employee_ids)
+            balance = self._balance[:len(self._employee_ids)]
+            if employees is not None:
+                balance = balance[employees]
+            holders = (~np.isnan(balance)).sum(axis=0)
+            columns = holders > 0
+            balance = balance[:, columns]
+            types = [t for t, keep in zip(self._types, columns) if keep]
+        with np.errstate(invalid="ignore"):
+            return pd.DataFrame({
+                "employees": holders[columns],
+                "total": np.nansum(balance, axis=0).astype(np.int64),
+                "mean": np.nanmean(balance, axis=0),
+                "median": np.nanmedian(balance, axis=0),
+                "min": np.nanmin(balance, axis=0),
+                "max": np.nanmax(balance, axis=0),
+                "at_zero": (balance <= 0).sum(axis=0),
+            }, index=pd.Index(types, name="leave_type"))
+
+    def upcoming_absences(self, days_ahead: int = 30, start: Optional[date] = None,
+                          employee_ids: Optional[Sequence[str]] = None,
+                          statuses: Sequence[str] = ABSENCE_STATUSES, limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Absences overlapping the next days_ahead days (from start, default today), by start date.
+
+        Columns: employee_id, name, leave_type, start_date, end_date, days, status.
+        """
+        first = _day(start or date.today())
+        last = first + days_ahead
+        with self._lock:
+            self.refresh()
+            rows = self._row_mask(self._employee_mask(employee_ids)) & self._statuses_mask(statuses)
+            rows &= (self._start[:self._rows] <= last) & (self._end[:self._rows] >= first)
+            positions = np.flatnonzero(rows)
+            # By start date, then employee, then the employee's own record order
+            positions = positions[np.lexsort((positions, self._employee[positions], self._start[positions]))]
+            if limit is not None:
+                positions = positions[:limit]
+            employee = self._employee[positions]
+            ids, names = self._employee_arrays()
+            return pd.DataFrame({
+                "employee_id": ids[employee],
+                "name": names[employee],
+                "leave_type": pd.Categorical.from_codes(self._type[positions], categories=self._types),
+                "start_date": self._start[positions].astype("datetime64[D]"),
+                "end_date": self._end[positions].astype("datetime64[D]"),
+                "days": self._days[positions],
+                "status": pd.Categorical.from_codes(self._status[positions], categories=self._statuses),
+            })
+
+    def absence_count(self, days_ahead: int = 30, start: Optional[date] = None,
+                      employee_ids: Optional[Sequence[str]] = None, statuses: Sequence[str] = ("approved",),
+                      leave_type: Optional[str] = None) -> pd.Series:
+        """Number of employees absent on each day of the next days_ahead days (from start, default today)."""
+        first_day = start or date.today()
+        first = _day(first_day)
+        with self._lock:
+            self.refresh()
+            rows = self._row_mask(self._employee_mask(employee_ids)) & self._statuses_mask(statuses)
+            if leave_type is not None:
+                rows &= self._type[:self._rows] == self._type_codes.get(leave_type, -1)
+            rows &= (self._start[:self._rows] < first + days_ahead) & (self._end[:self._rows] >= first)
+            # +1 on the first day of each absence, -1 after its last; the running sum is the head count
+            begin = np.maximum(self._start[:self._rows][rows].astype(np.int64) - first, 0)
+            end = np.minimum(self._end[:self._rows][rows].astype(np.int64) - first + 1, days_ahead)
+        delta = np.bincount(begin, minlength=days_ahead + 1) - np.bincount(end, minlength=days_ahead + 1)
+        return pd.Series(np.cumsum(delta)[:days_ahead], index=pd.date_range(first_day, periods=days_ahead, freq="D"),
+                         name="absent")
+
+    def monthly_trend(self, months: int = 12, end: Optional[date] = None,
+                      employee_ids: Optional[Sequence[str]] = None,
+                      statuses: Sequence[str] = ("approved",)) -> pd.DataFrame:
+        """Leave days per month (by start date) and leave type, for the months ending with end's month."""
+        last = _month(end or date.today())
+        first = last - (months - 1)
+        with self._lock:
+            self.refresh()
+            rows = self._row_mask(self._employee_mask(employee_ids)) & self._statuses_mask(statuses)
+            month = self._month[:self._rows]
+            rows &= (month >= first) & (month <= last)
+            offset = month[rows].astype(np.int64) - first
+            count = len(self._types)
+            cells = np.bincount(offset * count + self._type[:self._rows][rows],
+                                weights=self._days[:self._rows][rows], minlength=months * count)
+            frame = pd.DataFrame(cells.reshape(months, count).astype(np.int64),
+                                 index=pd.period_range(str(np.datetime64(first, "M")), periods=months, freq="M").rename("month"),
+                                 columns=list(self._types))
+        return frame.loc[:, frame.any(axis=0)]
+
+
+# --- Process-wide instance ---
+_analytics: Optional[LeaveAnalytics] = None
+_analytics_lock = threading.Lock()
+
+def get_analytics() -> LeaveAnalytics:
+    """Return the analytics view of the current store (see leave_store.get_store), building it on first use."""
+    global _analytics
+    store = get_store()
+    if _analytics is None or _analytics.store is not store:
+        with _analytics_lock:
+            if _analytics is None or _analytics.store is not store:
+                if _analytics is not None:
+                    _analytics.close()
+                _analytics = LeaveAnalytics(store)
+    return _analytics
+
+
+def pool_sensitive_types(frame: pd.DataFrame, columns: bool = False) -> pd.DataFrame:
+    """
+    A per-type report (types as the index, or as the columns with columns=True)
+    with the sensitive leave types summed into one "leave" entry. employees
+    becomes the largest pooled count and utilization is recomputed.
+    """
+    if columns:
+        return pool_sensitive_types(frame.T).T
+    pooled_types = frame.index.map(lambda leave_type: SHARED_LEAVE_TYPE if leave_type in SENSITIVE_LEAVE_TYPES
+                                   else leave_type)
+    pooled = frame.groupby(pooled_types, sort=False).agg(
+        {column: "max" if column == "employees" else "sum" for column in frame.columns if column != "utilization"})
+    pooled.index.name = frame.index.name
+    if "utilization" in frame.columns:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pooled["utilization"] = np.where(pooled["employees"] > 0,
+                                             pooled["taken"] / (pooled["taken"] + pooled["remaining"]), np.nan)
+    return pooled
+
+
+# --- Reports for the agent ---
+# report_result() turns a report into the plain payload the leave tools
+# return (tables as columns + rows, Python numbers only, so it serializes to
+# compact JSON); its text is rendered by tool_output's "analytics" renderer.
+
+def report_result(report: str = "summary", leave_type: Optional[str] = None, days_ahead: int = 30,
+                  max_rows: int = 20, restricted: bool = False) -> ToolResult:
+    """
+    A report as a tool result: at most max_rows rows of absences, totals for the rest.
+
+    restricted (for employees who are not managers) leaves out who is away and
+    pools the sensitive leave types into "leave".
+    """
+    if restricted and leave_type in SENSITIVE_LEAVE_TYPES:
+        return error(f"Only managers can see {leave_type} leave across the team.")
+    analytics = get_analytics()
+    if report == "summary":
+        utilization = analytics.utilization()
+        balances = analytics.balance_summary()
+        if restricted:
+            utilization = pool_sensitive_types(utilization)
+            balances = balances[~balances.index.isin(SENSITIVE_LEAVE_TYPES)]
+        if leave_type:
+            utilization = utilization[utilization.index == leave_type]
+            balances = balances[balances.index == leave_type]
+        return ToolResult("analytics", {
+            "report": report,
+            "year": date.today().year,
+            "employees": analytics.employee_count(),
+            "utilization": table(
+                ["type", "taken", "pending", "remaining", "utilization"],
+                ([row.Index, int(row.taken), int(row.pending), int(row.remaining),
+                  None if np.isnan(row.utilization) else round(float(row.utilization), 3)]
+                 for row in utilization.itertuples())),
+            "balances": table(
+                ["type", "employees", "mean", "median", "at_zero"],
+                ([row.Index, int(row.employees), round(float(row.mean), 1), float(row.median), int(row.at_zero)]
+                 for row in balances.itertuples())),
+        })
+    if report == "upcoming":
+        absences = analytics.upcoming_absences(days_ahead)
+        if leave_type:
+            absences = absences[absences["leave_type"] == leave_type]
+        data = {"report": report, "days_ahead": days_ahead, "total": len(absences)}
+        if not absences.empty:
+            # Same absences as the total: pending too, the asked type, and day days_ahead included
+            peak = analytics.absence_count(days_ahead + 1, statuses=ABSENCE_STATUSES, leave_type=leave_type)
+            data["busiest_day"] = f"{peak.idxmax():%Y-%m-%d}"
+            data["busiest_count"] = int(peak.max())
+        if restricted:
+            return ToolResult("analytics", data)
+        data["absences"] = table(
+            ["name", "employee_id", "type", "start_date", "end_date", "status"],
+            ([row.name, row.employee_id, row.leave_type, f"{row.start_date:%Y-%m-%d}", f"{row.end_date:%Y-%m-%d}",
+              row.status] for row in absences.head(max_rows).itertuples(index=False)))
+        return ToolResult("analytics", data)
+    if report == "trends":
+        trend = analytics.monthly_trend()
+        if restricted:
+            trend = pool_sensitive_types(trend, columns=True)
+        if leave_type:
+            trend = trend[[leave_type]] if leave_type in trend.columns else trend.iloc[:, :0]
+        return ToolResult("analytics", {
+            "report": report,
+            "months": table(["month", "total", *trend.columns],
+                            ([str(month), int(row.sum()), *(int(days) for days in row)] for month, row in trend.iterrows())),
+        })
+    return error('Unknown report. Use "summary", "upcoming" or "trends".')
+
+
+def format_report(report: str = "summary", leave_type: Optional[str] = None, days_ahead: int = 30,
+                  max_rows: int = 20, restricted: bool = False) -> str:
+    """Render a report as the short plain text the leave tools used to return."""
+    return report_result(report, leave_type, days_ahead, max_rows, restricted).text
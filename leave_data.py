@@ -8,6 +8,7 @@ EMPLOYEE_DB = {
         "name": "Alice Smith",
         "email": "alice@company.com",
         "password": "pass123",  # In production, use hashed passwords
+        "role": "manager",
         "leave_balance": {
             "annual": 14,
             "sick": 7,
@@ -48,21 +49,33 @@ LEAVE_POLICIES = {
 
 # Available leave types
 LEAVE_TYPES = ["annual", "sick", "personal", "bereavement", "maternity", "paternity"]
+# Leave types that say something about a colleague's health or family; only
+# managers see them in team reports, everyone else sees plain "leave"
+SENSITIVE_LEAVE_TYPES = ("sick", "bereavement", "maternity", "paternity")
+SHARED_LEAVE_TYPE = "leave"
+
+# Roles; employees without one are EMPLOYEE_ROLE. Managers see who is away in team reports
+EMPLOYEE_ROLE = "employee"
+MANAGER_ROLE = "manager"
 
 # Helper functions
 def verify_credentials(employee_id, password):
     """Verify employee credentials"""
-    if employee_id not in EMPLOYEE_DB:
+    from leave_store import get_store  # leave_store imports EMPLOYEE_DB from this module
+    employee = get_store().get_employee(employee_id)
+    if employee is None:
         return False
     
-    return EMPLOYEE_DB[employee_id]["password"] == password
+    return employee["password"] == password
 
 def get_employee_name(employee_id):
     """Get employee name from ID"""
-    if employee_id not in EMPLOYEE_DB:
+    from leave_store import get_store
+    employee = get_store().get_employee(employee_id)
+    if employee is None:
         return None
     
-    return EMPLOYEE_DB[employee_id]["name"]
+    return employee["name"]
 
 def extract_leave_details(prompt):
     """Extract leave request details from natural language prompt"""
@@ -1,40 +1,61 @@
 # leave_graph.py (Refactored Concepts)
-from typing import Dict, Any, List, TypedDict, Annotated, Sequence, Tuple 
+from typing import Dict, Any, List, Optional, TypedDict, Annotated, Sequence, Tuple, Iterator
+import functools
 import operator
+import threading
+import time
 from datetime import datetime
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-# Use ChatOpenAI for tool calling capabilities
-from langchain_openai import ChatOpenAI 
-from langgraph.graph import StateGraph, END
-from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode # Use prebuilt ToolNode
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage # Make sure ToolMessage is imported if needed
+# langchain_openai, langgraph and langchain_core.prompts take most of the import
+# time; they are imported where the prompt, the LLM and the graph are first built
 
 # Import tools and data functions
 from leave_tools import (
     check_leave_balance,
     view_leave_history,
     get_leave_policy,
+    search_leave_policies,
     get_holidays,
+    get_leave_analytics,
+    get_team_absences,
     check_and_process_leave,
     update_leave_status,
-    parse_nlp_leave_request
+    parse_nlp_leave_request,
+    run_tool_async
 )
 from leave_data import get_employee_name
+from history_manager import HistoryManager, messages_to_history
+from llm_cache import create_llm_cache_from_env
+from session_store import create_checkpointer, session_config, thread_id_for
+from intent_router import classify_intent, extract_leave_type, get_roster, holiday_query, router_stats, FAST_PATH_THRESHOLD
+from tracing import annotate, token_usage, traced, tracer
+from tool_output import error, render, tool_output
+from model_router import ESCALABLE_METADATA, ModelRouter, ModelTier, load_ladder
+from tool_selection import ToolSelector, tool_selection_enabled
+from turn_budget import (BudgetExceeded, NOT_RUN, TurnBudget, acall_before, call_before, load_turn_budget,
+                         partial_answer, turn_budget_stats)
 
 # --- 1. Update AgentState ---
 # Use add_messages for easier message handling
+def _add_messages(left, right):
+    # Defers importing langgraph until the graph runs; same behaviour as add_messages
+    from langgraph.graph.message import add_messages
+    return add_messages(left, right)
+
 class AgentState(TypedDict):
-    messages: Annotated[Sequence[BaseMessage], add_messages]
+    messages: Annotated[Sequence[BaseMessage], _add_messages]
     employee_id: str
+    # Set by each new user message (see turn_budget.py); None means no deadline
+    turn_deadline: Optional[float]
     # Remove current_date if not strictly needed or pass differently
     # Add any other state needed, e.g., tracked missing info
 
 # --- 2. Initialize LLM and Tools ---
-# Ensure the model used supports tool calling well (e.g., newer GPT models)
-llm = ChatOpenAI(model="gpt-4o", temperature=0) # Or another tool-calling capable model
+# Ensure the model used supports tool calling well (e.g., newer GPT models).
+# MODEL_NAME is the strongest tier; simpler turns go to the cheaper models of
+# LEAVE_MODEL_LADDER (see model_router.py)
+MODEL_NAME = "gpt-4o" # Or another tool-calling capable model
 
 # Define the tools for the agent
 # Option A: Use tools directly
@@ -42,37 +63,89 @@ tools = [
     check_leave_balance,
     view_leave_history,
     get_leave_policy,
+    search_leave_policies,
     get_holidays,
+    get_leave_analytics,
+    get_team_absences,
     check_and_process_leave,
     update_leave_status,
     parse_nlp_leave_request
 ]
-# Bind tools to LLM
-llm_with_tools = llm.bind_tools(tools)
 
-# Use LangGraph's ToolNode for easier execution
-tool_node = ToolNode(tools)
+# Give each tool a coroutine so the ToolNode can run them under ainvoke without
+# tying up a thread per call, and have it return content and artifact. The
+# schemas sent to the LLM still come from the plain functions above.
+def _async_capable_tool(func):
+    from langchain_core.tools import StructuredTool
+    func = traced("tool")(func)
+    # The LLM reads the result's compact JSON; the full payload rides along as
+    # the ToolMessage artifact for UIs (see tool_output.py)
+    @functools.wraps(func)
+    def call(**kwargs):
+        return tool_output(func(**kwargs))
+    async def run(**kwargs):
+        return tool_output(await run_tool_async(func, **kwargs))
+    return StructuredTool.from_function(func=call, coroutine=run, response_format="content_and_artifact")
+
+# Team reports show names only to managers, so these tools always run as the
+# employee of the conversation, whatever employee_id the model passed
+REQUESTER_TOOLS = ("get_leave_analytics", "get_team_absences")
+
+def _pin_requester(state):
+    """The state with the last message's REQUESTER_TOOLS calls set to the conversation's employee."""
+    last_message = state["messages"][-1]
+    if not any(call["name"] in REQUESTER_TOOLS for call in last_message.tool_calls):
+        return state
+    tool_calls = [{**call, "args": {**call["args"], "employee_id": state["employee_id"]}}
+                  if call["name"] in REQUESTER_TOOLS else call for call in last_message.tool_calls]
+    return {**state, "messages": [*state["messages"][:-1], last_message.model_copy(update={"tool_calls": tool_calls})]}
+
+def _create_tool_node():
+    from langgraph.prebuilt import ToolNode # Use prebuilt ToolNode
+
+    class TracedToolNode(ToolNode):
+        """ToolNode that runs inside a node span; each tool call gets its own child span."""
+
+        def invoke(self, input, config=None, **kwargs):
+            with tracer.span("node", "action"):
+                return super().invoke(_pin_requester(input), config, **kwargs)
+
+        async def ainvoke(self, input, config=None, **kwargs):
+            with tracer.span("node", "action"):
+                return await super().ainvoke(_pin_requester(input), config, **kwargs)
+
+    # Use LangGraph's ToolNode for easier execution
+    return TracedToolNode([_async_capable_tool(func) for func in tools])
 
 # --- 3. Define System Prompt ---
-# Keep the system prompt similar, but ensure it guides the LLM on tool usage
-# --- 3. Define System Prompt ---
+# The static instructions form a byte-identical prefix shared by every user and
+# every day, so the provider can cache it (one cached prefix per bound tool
+# subset, see tool_selection.py; the tool list below stays the same for all).
+# Per-user and per-day values go in SESSION_CONTEXT_PROMPT, a short system
+# message placed after the conversation.
 SYSTEM_PROMPT = """You are an HR Assistant chatbot specializing in leave management.
 Your job is to help employees check their leave balances, submit leave requests, and understand company leave policies.
 
 **Carefully review the conversation history provided in the messages to understand the context.** Remember details provided earlier in the conversation (like dates, leave types, or balance information) to avoid asking redundant questions.
 
-Current date: {current_date} 
-The user you are speaking with is {employee_name} (Employee ID: {employee_id}).
+The current date and the user you are speaking with are given in the session context message at the end of the conversation.
 
 You have access to the following tools:
 - check_leave_balance: Check the employee's current leave balance.
 - view_leave_history: View the employee's past leave records.
-- get_leave_policy: Get information about specific or all leave policies.
-- get_holidays: List upcoming company holidays.
+- get_leave_policy: Get the full policy for one leave type (pass leave_type).
+- search_leave_policies: Find the policy passages that answer a question (e.g. "do I need a doctor's note?"). Use it for policy questions instead of listing every policy.
+- get_holidays: List upcoming company holidays, or the holidays in a date range and region.
+- get_leave_analytics: Team-wide reports across all employees (utilization and remaining balances, upcoming absences, monthly trends). Use it for questions about team or company leave usage instead of looking up employees one by one.
+- get_team_absences: List who is on leave between two dates (e.g. "who is out next week"). Only managers see names; others get the number of absences.
 - check_and_process_leave: Use this tool to process a leave request *after* collecting all required information (leave type, start date, end date, reason optional). This tool checks balance, updates the database, and determines auto-approval.
 - update_leave_status: Update the status of an existing leave request.
 - parse_nlp_leave_request: Use this tool to extract details from a natural language leave request. Ensure you have the necessary details (leave type, start date, end date) from the conversation *before* calling this.
 
+Each turn offers only the tools that fit the user's request; call only those.
+
+Tools answer in compact JSON. Lists come as "columns" (comma-separated names) and "rows" (one comma-separated line per entry); "error" holds a message to pass on to the user. Answer in plain language, not JSON.
+
 When handling leave requests, follow these steps:
 1. Understand the user's intent from their message and the conversation history.
 2. If the intent is to request leave, check if you already have the leave type, start date, and end date from the conversation.
@@ -85,52 +158,399 @@ When handling leave requests, follow these steps:
 Be helpful, professional, and courteous. Use the available tools appropriately based on the user's request and the conversation context. Do not make up information.
 """
 
+SESSION_CONTEXT_PROMPT = """Session context:
+Current date: {current_date}
+The user you are speaking with is {employee_name} (Employee ID: {employee_id})."""
+
+# --- Lazy singletons ---
+# The prompt, the LLM client, the agent runnable, the response cache, the
+# checkpointer and the compiled graph are built on first use and shared by the
+# whole process, so importing this module stays cheap (the Streamlit login page
+# never builds them). The set_* functions swap them, e.g. for an offline fake
+# model in benchmarks.
+_init_lock = threading.RLock()
+_agent_prompt = None
+_llm = None
+_llm_with_tools = None
+_tier_llms: Dict[str, Any] = {}
+_agent_runnable = None
+_llm_cache = None
+_llm_cache_ready = False
+_checkpointer = None
+_graph = None
+_turn_budget = None
+
+def get_agent_prompt():
+    global _agent_prompt
+    if _agent_prompt is None:
+        with _init_lock:
+            if _agent_prompt is None:
+                from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+                # Build the prompt and agent runnable once; agent_node only fills in the variables.
+                # SystemMessage (not a template) keeps the static prefix exactly as written.
+                _agent_prompt = ChatPromptTemplate.from_messages([
+                    SystemMessage(content=SYSTEM_PROMPT),
+                    MessagesPlaceholder(variable_name="messages"),
+                    ("system", SESSION_CONTEXT_PROMPT),
+                ])
+    return _agent_prompt
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        with _init_lock:
+            if _llm is None:
+                # Use ChatOpenAI for tool calling capabilities
+                from langchain_openai import ChatOpenAI
+                _llm = ChatOpenAI(model=MODEL_NAME, temperature=0)
+    return _llm
+
+def get_llm_with_tools():
+    global _llm_with_tools
+    if _llm_with_tools is None:
+        with _init_lock:
+            if _llm_with_tools is None:
+                # Bind tools to LLM
+                _llm_with_tools = get_llm().bind_tools(tools)
+    return _llm_with_tools
+
+def _tier_llm(model: str):
+    """Chat model client of one tier, shared by every tool subset bound to it."""
+    if model == MODEL_NAME:
+        return get_llm()
+    if model not in _tier_llms:
+        with _init_lock:
+            if model not in _tier_llms:
+                from langchain_openai import ChatOpenAI
+                _tier_llms[model] = ChatOpenAI(model=model, temperature=0)
+    return _tier_llms[model]
+
+def _tier_runnable(tier: ModelTier, tier_tools: Sequence[Any]):
+    """prompt | LLM of one tier of the model ladder, with tier_tools bound."""
+    if tier.model == MODEL_NAME and list(tier_tools) == tools:
+        return get_agent_prompt() | get_llm_with_tools()
+    return get_agent_prompt() | _tier_llm(tier.model).bind_tools(tier_tools)
+
+def get_agent_runnable() -> ModelRouter:
+    """
+    The model router the agent node calls: one prompt | LLM runnable per tier of
+    LEAVE_MODEL_LADDER and tool subset picked for the turn (see tool_selection.py).
+    """
+    global _agent_runnable
+    if _agent_runnable is None:
+        with _init_lock:
+            if _agent_runnable is None:
+                selector = ToolSelector(tools) if tool_selection_enabled() else None
+                _agent_runnable = ModelRouter(load_ladder(), _tier_runnable, tools, selector=selector)
+    return _agent_runnable
+
+def set_agent_runnable(runnable) -> None:
+    """Replace what the agent node calls: a ModelRouter, or one prompt | LLM runnable for every turn."""
+    global _agent_runnable
+    with _init_lock:
+        _agent_runnable = runnable if isinstance(runnable, ModelRouter) else ModelRouter.single(runnable)
+
+def get_llm_cache():
+    """Optional response cache between the prompt and the LLM (None unless LLM_CACHE_BACKEND is set)."""
+    global _llm_cache, _llm_cache_ready
+    if not _llm_cache_ready:
+        with _init_lock:
+            if not _llm_cache_ready:
+                # Tool schemas are only computed when a cache is configured
+                _llm_cache = create_llm_cache_from_env(lambda: [
+                    SYSTEM_PROMPT, SESSION_CONTEXT_PROMPT, MODEL_NAME, [list(tier) for tier in load_ladder()],
+                    tool_selection_enabled(),
+                    get_llm_with_tools().kwargs.get("tools"),
+                ])
+                _llm_cache_ready = True
+    return _llm_cache
+
+def set_llm_cache(cache) -> None:
+    global _llm_cache, _llm_cache_ready
+    with _init_lock:
+        _llm_cache = cache
+        _llm_cache_ready = True
+
+def get_checkpointer():
+    """Conversations persist in the checkpointer (SQLite if LEAVE_SESSION_DB is set)."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _init_lock:
+            if _checkpointer is None:
+                _checkpointer = create_checkpointer()
+    return _checkpointer
+
+def set_checkpointer(checkpointer) -> None:
+    """Use another checkpointer; the graph is recompiled on next use."""
+    global _checkpointer, _graph
+    with _init_lock:
+        _checkpointer = checkpointer
+        _graph = None
+
+def get_graph():
+    global _graph
+    if _graph is None:
+        with _init_lock:
+            if _graph is None:
+                _graph = create_leave_management_graph(get_checkpointer()) # Compile graph once
+    return _graph
+
+def get_turn_budget() -> TurnBudget:
+    """Tool rounds, model calls and seconds each turn may use (LEAVE_MAX_TOOL_ITERATIONS, ...)."""
+    global _turn_budget
+    if _turn_budget is None:
+        with _init_lock:
+            if _turn_budget is None:
+                _turn_budget = load_turn_budget()
+    return _turn_budget
+
+def set_turn_budget(budget: TurnBudget) -> None:
+    global _turn_budget
+    with _init_lock:
+        _turn_budget = budget
+
+_LAZY_ATTRIBUTES = {
+    "agent_prompt": get_agent_prompt,
+    "llm": get_llm,
+    "llm_with_tools": get_llm_with_tools,
+    "agent_runnable": get_agent_runnable,
+    "llm_cache": get_llm_cache,
+    "checkpointer": get_checkpointer,
+    "graph": get_graph,
+    "turn_budget": get_turn_budget,
+}
+
+def __getattr__(name):
+    # Keeps leave_graph.graph, leave_graph.llm, ... working as lazily built attributes
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # --- 4. Define Graph Nodes ---
 
+# Fast-path tools for intents the router can answer without the LLM
+FAST_PATH_TOOLS = {
+    "leave_balance": check_leave_balance,
+    "leave_history": view_leave_history,
+    "holidays": get_holidays,
+    "leave_policy": get_leave_policy,
+}
+
+def _holiday_args(employee_id: str, message: str) -> Optional[Dict[str, str]]:
+    from holiday_calendar import get_holiday_calendar
+    return holiday_query(message, get_holiday_calendar().regions())
+
+# The fast-path tool's arguments, read from the message; None when the message
+# asks for more than they can carry, so the agent answers it
+FAST_PATH_ARGS = {
+    "leave_balance": lambda employee_id, message: {"employee_id": employee_id},
+    "leave_history": lambda employee_id, message: {"employee_id": employee_id},
+    "holidays": _holiday_args,
+    "leave_policy": lambda employee_id, message: {"leave_type": extract_leave_type(message)},
+}
+
+def _fast_path(state: AgentState) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """(intent, tool arguments) the router should answer itself, or None to hand the turn to the agent."""
+    last_message = state["messages"][-1]
+    if not isinstance(last_message, HumanMessage):
+        return None
+
+    intent, confidence = classify_intent(last_message.content)
+    args = None
+    if (intent in FAST_PATH_TOOLS and confidence >= FAST_PATH_THRESHOLD
+            and not get_roster().mentions_colleague(last_message.content, state["employee_id"])):
+        args = FAST_PATH_ARGS[intent](state["employee_id"], last_message.content)
+    if args is None:
+        router_stats.record_classification(intent, fast_path=False)
+        annotate(intent=intent, confidence=confidence, fast_path=False)
+        return None
+    annotate(intent=intent, confidence=confidence, fast_path=True)
+    return intent, args
+
+# Router Node: Answers simple, high-confidence intents locally
+@traced("node", "router")
+def router_node(state: AgentState):
+    start = time.perf_counter()
+    fast_path = _fast_path(state)
+    if fast_path is None:
+        return {}
+
+    intent, args = fast_path
+    result = FAST_PATH_TOOLS[intent](**args)
+    router_stats.record_classification(intent, fast_path=True, seconds=time.perf_counter() - start)
+    # Fast-path answers go straight to the user, so as text
+    return {"messages": [AIMessage(content=render(result))]}
+
+@traced("node", "router")
+async def arouter_node(state: AgentState):
+    start = time.perf_counter()
+    fast_path = _fast_path(state)
+    if fast_path is None:
+        return {}
+
+    intent, args = fast_path
+    result = await run_tool_async(FAST_PATH_TOOLS[intent], **args)
+    router_stats.record_classification(intent, fast_path=True, seconds=time.perf_counter() - start)
+    # Fast-path answers go straight to the user, so as text
+    return {"messages": [AIMessage(content=render(result))]}
+
+# Conditional Edge Logic: Ends the turn if the router already answered
+def route_after_router(state: AgentState) -> str:
+    if isinstance(state["messages"][-1], AIMessage):
+        return "end"
+    return "agent"
+
+def _agent_inputs(state: AgentState, messages: List[BaseMessage], employee_name: Optional[str]) -> Dict[str, Any]:
+    return {
+        "messages": messages,
+        "current_date": datetime.now().strftime("%Y-%m-%d"), # Get current date here
+        "employee_name": employee_name,
+        "employee_id": state["employee_id"],
+    }
+
 # Agent Node: Decides whether to call a tool or respond
+@traced("node", "agent")
 def agent_node(state: AgentState):
-    print("---AGENT NODE---")
-    employee_id = state["employee_id"]
-    employee_name = get_employee_name(employee_id)
-    current_date = datetime.now().strftime("%Y-%m-%d") # Get current date here
-
-    # Format messages for the prompt
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", SYSTEM_PROMPT.format(current_date=current_date, employee_name=employee_name, employee_id=employee_id)),
-        MessagesPlaceholder(variable_name="messages"),
-    ])
-    
-    # Chain the prompt and LLM
-    agent_runnable = prompt | llm_with_tools
-    
-    # Invoke the agent
-    response = agent_runnable.invoke({"messages": state["messages"]})
-    print(f"Agent response: {response}")
+    employee_name = get_employee_name(state["employee_id"])
+    # The checkpointed thread holds the whole conversation; send the recent turns plus a summary
+    messages = history_manager.window(thread_id_for(state["employee_id"]), state["messages"])
+    inputs = _agent_inputs(state, messages, employee_name)
+
+    llm_cache = get_llm_cache()
+    # The model router adds the model and tier it used to the span
+    with tracer.span("llm", "agent") as span:
+        cached = llm_cache.lookup(messages, state["employee_id"], inputs["current_date"]) if llm_cache else None
+        if cached is not None:
+            span.set(cache_hit=True)
+            # A cached answer costs no model call from the turn's budget
+            cached.response_metadata["model_calls"] = 0
+            return {"messages": [cached]}
+
+        # The model router picks the tier and retries malformed answers one tier up
+        # while the turn has model calls left; a call still running at the turn's
+        # deadline is abandoned
+        budget = get_turn_budget().calls_left(state["messages"])
+        start = time.perf_counter()
+        try:
+            response = call_before(state.get("turn_deadline"),
+                                   lambda cancel: get_agent_runnable().invoke(inputs, cancel=cancel, budget=budget))
+        except BudgetExceeded as exceeded:
+            span.set(cancelled=True)
+            return _budget_answer(state, exceeded.reason, budget.calls)
+        elapsed = time.perf_counter() - start
+        span.set(cache_hit=False, tool_calls=len(response.tool_calls), **token_usage(response))
+    router_stats.record_llm_turn(elapsed)
+    if llm_cache:
+        llm_cache.store(messages, state["employee_id"], employee_name, inputs["current_date"], response, elapsed)
     # The response will be AIMessage, possibly with tool_calls
     return {"messages": [response]}
 
+# Async Agent Node: used when the graph runs under ainvoke/astream
+@traced("node", "agent")
+async def aagent_node(state: AgentState):
+    employee_name = await run_tool_async(get_employee_name, state["employee_id"])
+    # The checkpointed thread holds the whole conversation; send the recent turns plus a summary
+    messages = history_manager.window(thread_id_for(state["employee_id"]), state["messages"])
+    inputs = _agent_inputs(state, messages, employee_name)
+
+    llm_cache = get_llm_cache()
+    # The model router adds the model and tier it used to the span
+    with tracer.span("llm", "agent") as span:
+        cached = llm_cache.lookup(messages, state["employee_id"], inputs["current_date"]) if llm_cache else None
+        if cached is not None:
+            span.set(cache_hit=True)
+            # A cached answer costs no model call from the turn's budget
+            cached.response_metadata["model_calls"] = 0
+            return {"messages": [cached]}
+
+        budget = get_turn_budget().calls_left(state["messages"])
+        start = time.perf_counter()
+        try:
+            response = await acall_before(state.get("turn_deadline"),
+                                          lambda: get_agent_runnable().ainvoke(inputs, budget=budget))
+        except BudgetExceeded as exceeded:
+            span.set(cancelled=True)
+            return _budget_answer(state, exceeded.reason, budget.calls)
+        elapsed = time.perf_counter() - start
+        span.set(cache_hit=False, tool_calls=len(response.tool_calls), **token_usage(response))
+    router_stats.record_llm_turn(elapsed)
+    if llm_cache:
+        llm_cache.store(messages, state["employee_id"], employee_name, inputs["current_date"], response, elapsed)
+    return {"messages": [response]}
+
 # Conditional Edge Logic: Decides the next step
 def should_continue(state: AgentState) -> str:
-    print("---SHOULD CONTINUE?---")
     last_message = state["messages"][-1]
     # If the LLM made tool calls, route to the tool node
     if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
-         print("Decision: Call tool")
+         # ...unless the turn has used up its tool rounds or its time
+         if get_turn_budget().exhausted(state["messages"], state.get("turn_deadline"), "tools"):
+             return "budget"
          return "call_tool"
     # Otherwise, respond to the user
-    print("Decision: End")
     return "end"
 
+# Conditional Edge Logic: Calls the agent again with the tool results, budget permitting
+def route_after_action(state: AgentState) -> str:
+    if get_turn_budget().exhausted(state["messages"], state.get("turn_deadline"), "llm"):
+        return "budget"
+    return "agent"
+
+def _budget_answer(state: AgentState, reason: str, calls: int = 0) -> Dict[str, Any]:
+    """
+    End the turn with a partial answer once its budget ran out.
+
+    Tool calls of the last response that won't run get an error result, so the
+    conversation stays valid for the next turn. calls is the model attempts the
+    step made without an accepted answer; the partial answer carries them as its
+    "model_calls", so they count toward the turn.
+    """
+    with tracer.span("budget", reason):
+        turn_budget_stats.record_exhausted(reason)
+        last_message = state["messages"][-1]
+        not_run = []
+        if isinstance(last_message, AIMessage):
+            for tool_call in last_message.tool_calls:
+                content, artifact = tool_output(error(NOT_RUN))
+                not_run.append(ToolMessage(content=content, artifact=artifact, name=tool_call["name"],
+                                           tool_call_id=tool_call["id"]))
+        answer = AIMessage(content=partial_answer(state["messages"], reason),
+                           response_metadata={"budget_exhausted": reason, "model_calls": calls})
+    return {"messages": not_run + [answer]}
+
+# Budget Node: Wraps up a turn that ran out of tool rounds, model calls or time
+@traced("node", "budget")
+def budget_node(state: AgentState):
+    last_message = state["messages"][-1]
+    next_step = "tools" if isinstance(last_message, AIMessage) and last_message.tool_calls else "llm"
+    reason = get_turn_budget().exhausted(state["messages"], state.get("turn_deadline"), next_step)
+    return _budget_answer(state, reason or "deadline")
+
 # --- 5. Create the Graph ---
-def create_leave_management_graph():
+def create_leave_management_graph(checkpointer=None):
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph, END
+
     workflow = StateGraph(AgentState)
 
     # Add nodes
-    workflow.add_node("agent", agent_node)
-    workflow.add_node("action", tool_node) # Using the prebuilt ToolNode
-
-    # Set entry point
-    workflow.set_entry_point("agent")
+    # Router and agent have sync and async implementations; LangGraph picks the one
+    # matching invoke/stream or ainvoke/astream. ToolNode handles both itself.
+    workflow.add_node("router", RunnableLambda(router_node, afunc=arouter_node, name="router"))
+    workflow.add_node("agent", RunnableLambda(agent_node, afunc=aagent_node, name="agent"))
+    workflow.add_node("action", _create_tool_node()) # Using the prebuilt ToolNode
+    workflow.add_node("budget", budget_node) # Partial answer once the turn's budget is spent
+
+    # Set entry point: simple intents are answered by the router, the rest go to the agent
+    workflow.set_entry_point("router")
+    workflow.add_conditional_edges(
+        "router",
+        route_after_router,
+        {
+            "agent": "agent",
+            "end": END,
+        },
+    )
 
     # Add conditional edges
     workflow.add_conditional_edges(
@@ -138,19 +558,29 @@ def create_leave_management_graph():
         should_continue,
         {
             "call_tool": "action", # If tool call decided, go to action node
+            "budget": "budget",    # Out of tool rounds or time: answer with what we have
             "end": END,          # If no tool call, end the graph turn
         },
     )
 
     # Add edge from tool node back to agent node
     # After calling the tool, the result is added to state (by ToolNode)
-    # and we loop back to the agent to decide the next step
-    workflow.add_edge("action", "agent")
+    # and we loop back to the agent to decide the next step, budget permitting
+    workflow.add_conditional_edges(
+        "action",
+        route_after_action,
+        {
+            "agent": "agent",
+            "budget": "budget",
+        },
+    )
+    workflow.add_edge("budget", END)
 
-    return workflow.compile()
+    # With a checkpointer, each employee's conversation is kept per thread ID
+    return workflow.compile(checkpointer=checkpointer)
 
-# Keep the process_message function similar, but adjust state initialization
-graph = create_leave_management_graph() # Compile graph once
+# Keeps the last turns verbatim and folds older ones into a cached per-session summary
+history_manager = HistoryManager()
 
 # def process_message(employee_id: str, current_messages: List[Dict[str, Any]], message: str) -> str:
 #     print(f"\nProcessing message for {employee_id}: '{message}'")
@@ -214,71 +644,36 @@ graph = create_leave_management_graph() # Compile graph once
 # graph = create_leave_management_graph() # Compile graph once
 
 # Modify process_message to handle history
-def process_message(employee_id: str, current_messages: List[Dict[str, Any]], new_user_message: str) -> Tuple[str, List[Dict[str, Any]]]:
-    """
-    Processes a new user message, maintaining conversation history.
-
-    Args:
-        employee_id: The ID of the employee interacting.
-        current_messages: The existing conversation history as a list of dictionaries 
-                          (e.g., [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]).
-        new_user_message: The latest message input by the user.
-
-    Returns:
-        A tuple containing:
-        - The AI's response message (str).
-        - The updated full conversation history (List[Dict[str, Any]]).
-    """
-    print(f"\nProcessing message for {employee_id}: '{new_user_message}'")
-    
-    # 1. Convert dictionary history to BaseMessage objects
-    history_messages: List[BaseMessage] = []
-    for msg_data in current_messages:
-        role = msg_data.get("role")
-        content = msg_data.get("content")
-        # Basic conversion - might need refinement if you store tool calls/results explicitly in history
-        if role == "user":
-            history_messages.append(HumanMessage(content=content))
-        elif role == "assistant":
-             # Important: If the AIMessage had tool calls, you might need to reconstruct
-             # that for perfect state, but often just the content is enough for context.
-             # For simplicity, we'll just use content here.
-             # If the assistant message *was* a tool call result passed back previously,
-             # you might need a different role or way to represent it if passing back.
-             # However, LangGraph's add_messages handles ToolMessages internally during a run.
-            history_messages.append(AIMessage(content=content))
-        # Add handling for ToolMessage if you explicitly store tool results in your history dicts
-
-    # 2. Append the new user message
-    history_messages.append(HumanMessage(content=new_user_message))
-
-    # 3. Prepare the state for the graph
-    state = {
-        "messages": history_messages, # Pass the FULL history
+def _prepare_turn(employee_id: str, new_user_message: str) -> Dict[str, Any]:
+    """Graph input for a new user message; earlier turns come from the employee's checkpointed thread."""
+    turn_budget_stats.record_turn()
+    return {
+        "messages": [HumanMessage(content=new_user_message)],
         "employee_id": employee_id,
+        "turn_deadline": get_turn_budget().deadline(),
     }
 
-    # 4. Invoke the graph
-    print("Invoking graph with history...")
-    # Use invoke for a single response, or stream for intermediate steps
-    result = graph.invoke(state)
-    print(f"Graph result: {result}")
-
-    # 5. Extract the latest AI response message(s) from the result
-    # The result["messages"] will contain the history passed in PLUS the new messages added by the graph run
-    # (the AI response, possibly ToolMessages and the final AIMessage).
-    final_messages_from_graph: List[BaseMessage] = result.get("messages", [])
-    
+def _collect_new_messages(update: Dict[str, Any], new_messages: List[BaseMessage]) -> List[BaseMessage]:
+    """Add the messages from one stream_mode="updates" payload to new_messages and return them."""
+    added = []
+    for node_update in update.values():
+        added.extend((node_update or {}).get("messages", []))
+    new_messages.extend(added)
+    return added
+
+def _finish_turn(displayed_history: List[Dict[str, Any]], new_user_message: str,
+                 new_messages: List[BaseMessage]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Pick the response from the messages a graph run added and append them to the history."""
     ai_response_content = ""
     # Find the last AIMessage added by the agent in this run
-    if final_messages_from_graph:
-         last_message = final_messages_from_graph[-1]
+    if new_messages:
+         last_message = new_messages[-1]
          if isinstance(last_message, AIMessage):
               ai_response_content = last_message.content
          else:
              # Handle cases where the graph might end on a ToolMessage or something else
              # Maybe look backwards for the last AIMessage?
-             for msg in reversed(final_messages_from_graph):
+             for msg in reversed(new_messages):
                   if isinstance(msg, AIMessage) and not getattr(msg, 'tool_calls', None): # Ensure it's not just initiating a tool call
                        ai_response_content = msg.content
                        break
@@ -290,23 +685,134 @@ def process_message(employee_id: str, current_messages: List[Dict[str, Any]], ne
         # final_messages_from_graph.append(AIMessage(content=ai_response_content))
 
 
-    # 6. Convert the final graph message list back to dictionaries for storage
-    updated_history_dicts: List[Dict[str, Any]] = []
-    for msg in final_messages_from_graph:
-        if isinstance(msg, HumanMessage):
-            updated_history_dicts.append({"role": "user", "content": msg.content})
-        elif isinstance(msg, AIMessage):
-             # Store AI messages (including those that might have made tool calls)
-             # You might want to store tool calls/results differently if needed for exact replay
-            updated_history_dicts.append({"role": "assistant", "content": msg.content})
-        elif isinstance(msg, ToolMessage):
-             # Decide how you want to represent tool results in your history storage
-             # Option 1: Skip them (context might be inferred from subsequent AI message)
-             # Option 2: Store them with a specific role
-             # updated_history_dicts.append({"role": "tool", "content": msg.content, "tool_call_id": msg.tool_call_id})
-             pass # Skipping for simplicity for now
-
-    print(f"Final response: {ai_response_content}")
-    print(f"Updated History Dicts: {updated_history_dicts}")
+    # Convert the new messages back to dictionaries and append them to the displayed history.
+    # Tool calls and tool results are kept (see history_manager.messages_to_history);
+    # the UI skips them with is_displayed().
+    updated_history_dicts: List[Dict[str, Any]] = list(displayed_history)
+    updated_history_dicts.append({"role": "user", "content": new_user_message})
+    updated_history_dicts.extend(messages_to_history(new_messages))
 
     return ai_response_content, updated_history_dicts
+
+def process_message(employee_id: str, displayed_history: List[Dict[str, Any]], new_user_message: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Processes a new user message, maintaining conversation history.
+
+    The graph keeps the conversation in the employee's checkpointed thread, so
+    only the new message is sent. displayed_history is what the UI shows; it
+    is only extended for the return value and never reaches the agent (use
+    record_exchange for turns answered outside the graph).
+
+    Args:
+        employee_id: The ID of the employee interacting.
+        displayed_history: The conversation as shown, a list of dictionaries
+                          (e.g., [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]).
+        new_user_message: The latest message input by the user.
+
+    Returns:
+        A tuple containing:
+        - The AI's response message (str).
+        - The updated full conversation history (List[Dict[str, Any]]).
+    """
+    state = _prepare_turn(employee_id, new_user_message)
+
+    # Run the graph on the employee's thread, collecting the messages each node adds
+    # (the AI response, possibly ToolMessages and the final AIMessage)
+    new_messages: List[BaseMessage] = []
+    with tracer.span("turn", "process_message", employee_id=employee_id):
+        for update in get_graph().stream(state, session_config(employee_id), stream_mode="updates"):
+            _collect_new_messages(update, new_messages)
+    return _finish_turn(displayed_history, new_user_message, new_messages)
+
+async def aprocess_message(employee_id: str, displayed_history: List[Dict[str, Any]], new_user_message: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Async variant of process_message.
+
+    Runs the graph with astream, so the LLM call and tools await instead of
+    holding a thread; one event loop can serve many conversations at once.
+    """
+    state = _prepare_turn(employee_id, new_user_message)
+    new_messages: List[BaseMessage] = []
+    with tracer.span("turn", "aprocess_message", employee_id=employee_id):
+        async for update in get_graph().astream(state, session_config(employee_id), stream_mode="updates"):
+            _collect_new_messages(update, new_messages)
+    return _finish_turn(displayed_history, new_user_message, new_messages)
+
+def stream_message(employee_id: str, displayed_history: List[Dict[str, Any]], new_user_message: str) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of process_message.
+
+    Yields events as the graph runs:
+        {"type": "token", "content": str}              - a chunk of the answer text
+        {"type": "tool_start", "name": str, "args": dict} - the agent called a tool
+        {"type": "tool_end", "name": str, "artifact": dict} - a tool finished, with its
+            result for display (see tool_output.render_markdown)
+        {"type": "done", "response": str, "history": list} - last event, same values as process_message
+    """
+    state = _prepare_turn(employee_id, new_user_message)
+
+    new_messages: List[BaseMessage] = []
+    # IDs of messages whose text already went out as "messages" chunks
+    streamed = set()
+    # Chunks of attempts the model router may still reject, per message ID
+    held: Dict[str, List[str]] = {}
+    # "messages" mode yields LLM token chunks as they arrive, "updates" yields each node's output
+    with tracer.span("turn", "stream_message", employee_id=employee_id):
+        for mode, payload in get_graph().stream(state, session_config(employee_id), stream_mode=["messages", "updates"]):
+            if mode == "messages":
+                chunk, metadata = payload
+                # Tool-call chunks have no text; ToolMessages are reported through "updates"
+                if metadata.get("langgraph_node") == "agent" and isinstance(chunk, AIMessage) and chunk.content:
+                    if metadata.get(ESCALABLE_METADATA):
+                        held.setdefault(chunk.id, []).append(chunk.content)
+                        continue
+                    streamed.add(chunk.id)
+                    yield {"type": "token", "content": chunk.content}
+                continue
+
+            for msg in _collect_new_messages(payload, new_messages):
+                if isinstance(msg, AIMessage) and msg.id in held:
+                    # The router accepted this attempt; chunks of the rejected ones are never sent
+                    streamed.add(msg.id)
+                    for content in held.pop(msg.id):
+                        yield {"type": "token", "content": content}
+                if isinstance(msg, AIMessage) and msg.content and not msg.tool_calls and msg.id not in streamed:
+                    # Fast-path and partial answers don't come from the LLM, so send them in one piece
+                    yield {"type": "token", "content": msg.content}
+                elif isinstance(msg, AIMessage):
+                    for tool_call in msg.tool_calls:
+                        yield {"type": "tool_start", "name": tool_call["name"], "args": tool_call["args"]}
+                elif isinstance(msg, ToolMessage):
+                    yield {"type": "tool_end", "name": msg.name, "artifact": msg.artifact}
+
+    ai_response_content, updated_history_dicts = _finish_turn(displayed_history, new_user_message, new_messages)
+    yield {"type": "done", "response": ai_response_content, "history": updated_history_dicts}
+
+def record_exchange(employee_id: str, user_message: str, result) -> None:
+    """
+    Add a turn answered outside the graph (the UI's quick actions and leave
+    form call tools directly) to the employee's thread, so later turns see it,
+    e.g. the request ID of a leave submitted through the form.
+
+    Args:
+        employee_id: The ID of the employee.
+        user_message: What the user asked for, as the chat would have phrased it.
+        result: The tool's result; it is stored as text, like a fast-path answer.
+    """
+    values = {
+        "messages": [HumanMessage(content=user_message), AIMessage(content=render(result))],
+        "employee_id": employee_id,
+        "turn_deadline": None,
+    }
+    # As the router's output, so the thread ends the turn like a fast-path answer
+    get_graph().update_state(session_config(employee_id), values, as_node="router")
+
+def load_history(employee_id: str) -> List[Dict[str, Any]]:
+    """The employee's checkpointed conversation as display dicts (e.g. after an app restart)."""
+    snapshot = get_graph().get_state(session_config(employee_id))
+    return messages_to_history(snapshot.values.get("messages", []))
+
+def reset_session(employee_id: str) -> None:
+    """Start a fresh conversation for the employee (drops the checkpointed thread and its summary)."""
+    get_checkpointer().delete_thread(thread_id_for(employee_id))
+    history_manager.reset(thread_id_for(employee_id))
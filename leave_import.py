@@ -0,0 +1,234 @@
+# leave_import.py
+import argparse
+import sys
+import time
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from business_days import get_business_calendar
+from leave_data import LEAVE_TYPES
+from leave_intervals import OVERLAP_POLICY, LeaveIntervalIndex, get_interval_index
+from leave_store import LeaveStore, SQLiteStore, get_store
+from leave_tools import NO_WORKING_DAYS
+from tool_cache import tool_cache
+from tool_output import overlap_message
+
+# --- Bulk leave-request import ---
+# Loads many leave requests at once (migrations, team shutdowns) instead of one
+# check_and_process_leave call per request. Rows are validated column-wise with
+# pandas and checked for overlaps with the employee's approved or pending leave
+# and with the earlier accepted rows of the batch (leave_intervals.OVERLAP_POLICY:
+# "reject" refuses them with status "overlap", "flag" imports them with the
+# overlap noted). The remaining rows go to the store's submit_leave_batch, which
+# applies them in one transaction: each employee's requests are approved in
+# order while the balance lasts, the rest wait for manager approval. Invalid
+# rows are reported, not imported.
+#
+# Input columns: employee_id, leave_type, start_date, end_date (YYYY-MM-DD) and
+# an optional reason.
+#
+#   python leave_import.py requests.csv --output results.csv --db leave.db
+
+REQUIRED_COLUMNS = ["employee_id", "leave_type", "start_date", "end_date"]
+RESULT_COLUMNS = ["row", "employee_id", "leave_type", "start_date", "end_date", "days",
+                  "status", "request_id", "balance_before", "overlap", "error"]
+INVALID_STATUS = "invalid"
+OVERLAP_STATUS = "overlap"
+
+
+def read_requests(source: Union[str, pd.DataFrame]) -> pd.DataFrame:
+    """Requests from a CSV path or file object, or a copy of a DataFrame."""
+    if isinstance(source, pd.DataFrame):
+        return source.copy()
+    return pd.read_csv(source, dtype=str, keep_default_na=False)
+
+
+def validate_requests(requests: pd.DataFrame, store: Optional[LeaveStore] = None) -> pd.DataFrame:
+    """
+    Normalize and check every row at once.
+
+    Returns a frame with the normalized columns, days (business days, as in
+    check_and_process_leave) and error: None for valid rows, otherwise the
+    message check_and_process_leave would have returned.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in requests.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    store = store or get_store()
+
+    employee_id = requests["employee_id"].astype(str).str.strip()
+    leave_type = requests["leave_type"].astype(str).str.strip().str.lower()
+    start = pd.to_datetime(requests["start_date"].astype(str).str.strip(), format="%Y-%m-%d", errors="coerce")
+    end = pd.to_datetime(requests["end_date"].astype(str).str.strip(), format="%Y-%m-%d", errors="coerce")
+    reason = requests["reason"].fillna("").astype(str) if "reason" in requests.columns else ""
+
+    # One lookup per distinct employee rather than per row
+    known = [e for e in employee_id.unique() if store.employee_exists(e)]
+    error = np.select(
+        [
+            ~employee_id.isin(known).to_numpy(),
+            ~leave_type.isin(LEAVE_TYPES).to_numpy(),
+            (start.isna() | end.isna()).to_numpy(),
+            (start > end).to_numpy(),
+        ],
+        [
+            ("Employee ID " + employee_id + " not found.").to_numpy(),
+            f"Invalid leave type. Available types: {', '.join(LEAVE_TYPES)}.",
+            "Invalid date format. Please use YYYY-MM-DD format.",
+            "End date must be after start date.",
+        ],
+        default=None,
+    )
+    # Business days, as in check_and_process_leave: one vectorized count for all rows
+    days = pd.Series(get_business_calendar().count_many(start.to_numpy(dtype="datetime64[D]"),
+                                                        end.to_numpy(dtype="datetime64[D]")),
+                     index=requests.index, dtype="Int64")
+    error = np.where(pd.isna(error) & (days == 0).to_numpy(), NO_WORKING_DAYS, error)
+    days[pd.notna(error)] = pd.NA
+    return pd.DataFrame({
+        "row": requests.index,
+        "employee_id": employee_id,
+        "leave_type": leave_type,
+        "start_date": start.dt.strftime("%Y-%m-%d"),
+        "end_date": end.dt.strftime("%Y-%m-%d"),
+        "days": days,
+        "reason": reason,
+        "error": error,
+    }, index=requests.index).reset_index(drop=True)
+
+
+def find_overlaps(rows: pd.DataFrame, intervals: LeaveIntervalIndex) -> List[List[Dict[str, Any]]]:
+    """
+    The leave each valid row overlaps, in row order: the employee's approved or
+    pending leave, and earlier rows of the batch that are imported. Under the
+    "reject" policy a row with overlaps is not imported, so later rows are not
+    checked against it.
+
+    Args:
+        rows: Valid rows of validate_requests
+        intervals: Index of the store the rows go to
+
+    Returns:
+        Per row, the overlapped leave as LeaveIntervalIndex.overlapping reports
+        it; earlier rows have no request ID and "row N of this import" as status.
+    """
+    batch = list(zip(rows["row"].tolist(), rows["employee_id"].tolist(), rows["leave_type"].tolist(),
+                       rows["start_date"].tolist(), rows["end_date"].tolist()))
+    # One index query per employee, over the range of all their rows
+    ranges: Dict[str, List[str]] = {}
+    for _, employee_id, _, start, end in batch:
+        first_last = ranges.setdefault(employee_id, [start, end])
+        first_last[0], first_last[1] = min(first_last[0], start), max(first_last[1], end)
+    stored = {employee_id: intervals.overlapping(employee_id, first, last)
+              for employee_id, (first, last) in ranges.items()}
+    imported: Dict[str, List[Dict[str, Any]]] = {}
+    found = []
+    for row, employee_id, leave_type, start, end in batch:
+        # ISO dates compare like the dates they stand for
+        conflicts = [leave for leave in stored[employee_id] + imported.get(employee_id, [])
+                     if leave["start_date"] <= end and leave["end_date"] >= start]
+        conflicts.sort(key=lambda leave: leave["start_date"])
+        found.append(conflicts)
+        if not conflicts or OVERLAP_POLICY != "reject":
+            imported.setdefault(employee_id, []).append({
+                "type": leave_type, "start_date": start, "end_date": end,
+                "status": f"row {row} of this import", "request_id": None,
+            })
+    return found
+
+
+def import_leave_requests(source: Union[str, pd.DataFrame], store: Optional[LeaveStore] = None,
+                          dry_run: bool = False) -> pd.DataFrame:
+    """
+    Validate and submit a batch of leave requests.
+
+    Args:
+        source: CSV path/file or DataFrame with the columns listed above
+        store: Store to write to (default: the process-wide store)
+        dry_run: Only validate; valid rows get status "valid" and no request ID
+
+    Returns:
+        One result row per input row (RESULT_COLUMNS): status is "approved",
+        "pending manager approval", "overlap" (refused, see overlap) or
+        "invalid" (see error).
+    """
+    store = store or get_store()
+    checked = validate_requests(read_requests(source), store)
+    valid = checked["error"].isna().to_numpy(copy=True)
+
+    status = np.full(len(checked), INVALID_STATUS, dtype=object)
+    request_id = np.full(len(checked), None, dtype=object)
+    balance_before = np.full(len(checked), None, dtype=object)
+    overlap = np.full(len(checked), None, dtype=object)
+    global_index = store is get_store()
+    intervals = get_interval_index() if global_index else LeaveIntervalIndex(store)
+    with ExitStack() as stack:
+        if not global_index:
+            stack.callback(intervals.close)
+        # As in check_and_process_leave, hold the employees' locks from the overlap
+        # check until the requests are stored; always in the same order
+        for employee_id in sorted(checked.loc[valid, "employee_id"].unique()):
+            stack.enter_context(intervals.employee_lock(employee_id))
+        if valid.any():
+            conflicts = find_overlaps(checked[valid], intervals)
+            overlap[valid] = [overlap_message(c) if c else None for c in conflicts]
+            if OVERLAP_POLICY == "reject":
+                refused = np.flatnonzero(valid)[[bool(c) for c in conflicts]]
+                status[refused] = OVERLAP_STATUS
+                valid[refused] = False
+        if dry_run:
+            status[valid] = "valid"
+        elif valid.any():
+            results = _submit(checked[valid], store)
+            status[valid] = [result["status"] for result in results]
+            request_id[valid] = [result["request_id"] for result in results]
+            balance_before[valid] = [result["balance"] for result in results]
+
+    checked["status"] = status
+    checked["request_id"] = request_id
+    checked["balance_before"] = balance_before
+    checked["overlap"] = overlap
+    return checked[RESULT_COLUMNS]
+
+
+def _submit(rows: pd.DataFrame, store: LeaveStore) -> List[Dict[str, Any]]:
+    """Submit the rows in one batch; one submit_leave_batch result per row."""
+    requests = [
+        (employee_id, {"type": leave_type, "start_date": start, "end_date": end, "days": int(days), "reason": reason})
+        for employee_id, leave_type, start, end, days, reason in zip(
+            rows["employee_id"].tolist(), rows["leave_type"].tolist(), rows["start_date"].tolist(),
+            rows["end_date"].tolist(), rows["days"].tolist(), rows["reason"].tolist())
+    ]
+    results = store.submit_leave_batch(requests)
+    for employee_id in rows["employee_id"].unique():
+        tool_cache.invalidate(employee_id)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import leave requests from a CSV file")
+    parser.add_argument("csv", help="CSV with employee_id, leave_type, start_date, end_date[, reason]")
+    parser.add_argument("--output", help="write the per-row results to this CSV")
+    parser.add_argument("--db", help="SQLite database (default: LEAVE_DB_PATH, else the in-memory sample data)")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, import nothing")
+    args = parser.parse_args(argv)
+
+    store = SQLiteStore(args.db) if args.db else get_store()
+    start = time.perf_counter()
+    results = import_leave_requests(args.csv, store, dry_run=args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(results)} rows in {elapsed:.2f}s ({len(results) / elapsed if elapsed else 0:,.0f} rows/s)")
+    for status, count in results["status"].value_counts().items():
+        print(f"  {status}: {count}")
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"results written to {args.output}")
+    return 1 if results["status"].isin([INVALID_STATUS, OVERLAP_STATUS]).any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+# leave_intervals.py
+import bisect
+import itertools
+import os
+import threading
+import time
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from leave_store import LeaveStore, get_store
+
+# --- Leave interval index ---
+# Answers "does this request overlap an existing leave?" and "who is away
+# between these dates?" without scanning leave histories. Every approved or
+# pending leave is an interval [start, end] (inclusive day ordinals).
+#
+# The intervals live in NumPy arrays sorted by start date. An interval
+# overlapping [a, b] starts no later than b and no earlier than a minus the
+# longest interval, so a query is two binary searches plus a filter over that
+# window. The positions are also kept grouped by employee (one array plus
+# offsets), which makes the per-employee overlap check O(log n) too.
+#
+# Writes are picked up like in leave_analytics.py: the store reports the
+# employees each write touched, and those employees are re-read before the
+# next query. Their old intervals are tombstoned and the new ones go to a small
+# sorted list (the delta), which is merged into the arrays once it holds
+# merge_threshold intervals or 1/MERGE_FRACTION of the index, whichever is
+# more, so merges stay rare as the index grows. Stores written by other processes
+# (LeaveStore.external_writes) are re-read after LEAVE_INDEX_MAX_AGE seconds,
+# and the employee is always re-read before an overlap check.
+
+# Statuses that block the dates; rejected and cancelled requests do not
+INDEXED_STATUSES = ("approved", "pending manager approval")
+# "reject": refuse overlapping requests; "flag": accept them with a warning
+OVERLAP_POLICY = os.getenv("LEAVE_OVERLAP_POLICY", "reject")
+DEFAULT_MAX_AGE_SECONDS = 300.0
+DEFAULT_MERGE_THRESHOLD = 4096
+MERGE_FRACTION = 16
+
+# Delta entries: (start, end, employee code, type code, status code, request number)
+Interval = Tuple[int, int, int, int, int, int]
+# Array dtypes for the same fields
+COLUMN_DTYPES = (np.int32, np.int32, np.int32, np.int16, np.int8, np.int64)
+DateLike = Union[str, date]
+
+
+def _ordinal(day: DateLike) -> int:
+    return (date.fromisoformat(day) if isinstance(day, str) else day).toordinal()
+
+
+def _request_number(request_id: Optional[str]) -> int:
+    # Called once per leave record on a rebuild, so parse first and check after
+    try:
+        return int(request_id[3:]) if request_id[:3] == "REQ" else -1
+    except (TypeError, ValueError):
+        return -1
+
+
+def _to_columns(intervals: Union[List[Interval], np.ndarray]) -> List[np.ndarray]:
+    """Split intervals (a list of them, or all their fields in one flat int64 array) into typed columns."""
+    width = len(COLUMN_DTYPES)
+    if isinstance(intervals, np.ndarray):
+        rows = intervals.reshape(-1, width)
+    else:
+        rows = np.fromiter(itertools.chain.from_iterable(intervals), np.int64, len(intervals) * width).reshape(-1, width)
+    return [rows[:, i].astype(dtype) for i, dtype in enumerate(COLUMN_DTYPES)]
+
+
+class LeaveIntervalIndex:
+    """Per-employee and global index of approved and pending leave by date range."""
+
+    def __init__(self, store: LeaveStore, max_age: Optional[float] = None,
+                 merge_threshold: int = DEFAULT_MERGE_THRESHOLD):
+        self.store = store
+        if max_age is None:
+            max_age = float(os.getenv("LEAVE_INDEX_MAX_AGE", DEFAULT_MAX_AGE_SECONDS)) if store.external_writes else float("inf")
+        self.max_age = max_age
+        self.merge_threshold = merge_threshold
+        self._lock = threading.RLock()
+        self._dirty: set = set()
+        self._stale = True
+        self._built_at = 0.0
+        self._employee_locks: Dict[str, threading.Lock] = {}
+        self.stats = {"rebuilds": 0, "refreshed_employees": 0, "merges": 0}
+        store.add_listener(self._on_change)
+
+    def close(self) -> None:
+        self.store.remove_listener(self._on_change)
+
+    def _on_change(self, employee_ids: Optional[List[str]]) -> None:
+        with self._lock:
+            if employee_ids is None:
+                self._stale = True
+            else:
+                self._dirty.update(employee_ids)
+
+    def employee_lock(self, employee_id: str) -> threading.Lock:
+        """
+        Lock to hold from an overlap check until the request is stored, so two
+        overlapping requests of one employee cannot both pass the check (within
+        this process).
+        """
+        with self._lock:
+            return self._employee_locks.setdefault(employee_id, threading.Lock())
+
+    # --- Building and refreshing ---
+
+    def _reset(self) -> None:
+        self._employee_codes: Dict[str, int] = {}
+        self._employee_ids: List[str] = []
+        self._employee_rank = np.zeros(0, dtype=np.intp)
+        self._types: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+        self._statuses: List[str] = list(INDEXED_STATUSES)
+        self._status_codes = {status: code for code, status in enumerate(self._statuses)}
+        self._ordinals: Dict[str, int] = {}
+        self._columns: Tuple[np.ndarray, ...] = tuple(np.zeros(0, dtype=dtype) for dtype in COLUMN_DTYPES)
+        self._alive = np.zeros(0, dtype=bool)
+        # Positions grouped by employee (each group by start): employee code c owns
+        # _by_employee[_offsets[c]:_offsets[c + 1]] while _in_base[c] is set
+        self._by_employee = np.zeros(0, dtype=np.intp)
+        self._offsets = np.zeros(1, dtype=np.intp)
+        self._in_base = np.zeros(0, dtype=bool)
+        self._delta: List[Interval] = []
+        self._employee_delta: Dict[int, List[Interval]] = {}
+        self._max_length = 0
+
+    @property
+    def _start(self) -> np.ndarray:
+        return self._columns[0]
+
+    @property
+    def _end(self) -> np.ndarray:
+        return self._columns[1]
+
+    def __len__(self) -> int:
+        return int(self._alive.sum()) + len(self._delta)
+
+    def _code(self, codes: Dict[str, int], names: List[str], value: str) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _ordinal(self, day: str) -> int:
+        # Leave dates repeat a lot, so parse each distinct date string once
+        ordinal = self._ordinals.get(day)
+        if ordinal is None:
+            ordinal = self._ordinals[day] = _ordinal(day)
+        return ordinal
+
+    def _intervals(self, employee_id: str, history: Iterable[Dict[str, Any]]) -> List[Interval]:
+        employee = self._code(self._employee_codes, self._employee_ids, employee_id)
+        status_codes, type_codes, ordinals = self._status_codes, self._type_codes, self._ordinals
+        intervals = []
+        for record in history:
+            status = status_codes.get(record["status"])
+            if status is None:
+                continue
+            start, end, leave_type = ordinals.get(record["start_date"]), ordinals.get(record["end_date"]), type_codes.get(record["type"])
+            try:
+                if start is None:
+                    start = self._ordinal(record["start_date"])
+                if end is None:
+                    end = self._ordinal(record["end_date"])
+            except ValueError:
+                continue
+            if leave_type is None:
+                leave_type = self._code(type_codes, self._types, record["type"])
+            intervals.append((start, end, employee, leave_type, status, _request_number(record.get("request_id"))))
+        return intervals
+
+    def _build(self) -> None:
+        self._reset()
+        # A flat machine-int buffer rather than a list of tuples: millions of small
+        # objects would leave the allocator's memory fragmented after the build
+        flat = array("q")
+        for employee_id, _, _, history in self.store.iter_leave_data():
+            flat.extend(itertools.chain.from_iterable(self._intervals(employee_id, history)))
+        self._set_arrays(_to_columns(np.frombuffer(flat, dtype=np.int64)))
+
+    def _set_arrays(self, columns: Sequence[np.ndarray]) -> None:
+        """Replace the arrays with the given columns, sorted by start; empties the delta."""
+        # Stable sort (timsort for int32), which is close to linear on the two sorted runs of a merge
+        order = np.argsort(columns[0], kind="stable")
+        self._columns = tuple(column[order] for column in columns)
+        self._alive = np.ones(len(order), dtype=bool)
+        self._max_length = int((self._end - self._start).max()) if len(order) else 0
+        employee = self._columns[2]
+        self._by_employee = np.argsort(employee, kind="stable")
+        counts = np.bincount(employee, minlength=len(self._employee_ids))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._in_base = counts > 0
+        self._delta = []
+        self._employee_delta = {}
+
+    def _merge(self) -> None:
+        live = np.flatnonzero(self._alive)
+        delta = _to_columns(self._delta)
+        self._set_arrays([np.concatenate([column[live], extra]) for column, extra in zip(self._columns, delta)])
+        self.stats["merges"] += 1
+
+    def _base_positions(self, employee: int) -> Optional[np.ndarray]:
+        if employee < len(self._in_base) and self._in_base[employee]:
+            return self._by_employee[self._offsets[employee]:self._offsets[employee + 1]]
+        return None
+
+    def _replace_employee(self, employee_id: str, history: Iterable[Dict[str, Any]]) -> None:
+        employee = self._code(self._employee_codes, self._employee_ids, employee_id)
+        positions = self._base_positions(employee)
+        if positions is not None:
+            self._alive[positions] = False
+            self._in_base[employee] = False
+        for interval in self._employee_delta.pop(employee, ()):
+            del self._delta[bisect.bisect_left(self._delta, interval)]
+        intervals = self._intervals(employee_id, history)
+        for interval in intervals:
+            bisect.insort(self._delta, interval)
+            self._max_length = max(self._max_length, interval[1] - interval[0])
+        if intervals:
+            self._employee_delta[employee] = intervals
+        # Merging costs O(n), so let the delta grow with the arrays
+        if len(self._delta) >= max(self.merge_threshold, len(self._alive) // MERGE_FRACTION):
+            self._merge()
+
+    def refresh(self, full: bool = False) -> None:
+        """Bring the index up to date; full=True rebuilds it from the store."""
+        with self._lock:
+            if full or self._stale or time.monotonic() - self._built_at > self.max_age:
+                self._stale = False
+                self._dirty.clear()
+                self._built_at = time.monotonic()
+                self._build()
+                self.stats["rebuilds"] += 1
+                return
+            dirty, self._dirty = self._dirty, set()
+            for employee_id in dirty:
+                self._replace_employee(employee_id, self.store.get_leave_history(employee_id)
+                                       if self.store.employee_exists(employee_id) else [])
+            self.stats["refreshed_employees"] += len(dirty)
+
+    # --- Queries ---
+
+    def _record(self, start: int, end: int, employee: int, leave_type: int, status: int, request: int) -> Dict[str, Any]:
+        return {
+            "employee_id": self._employee_ids[employee],
+            "type": self._types[leave_type],
+            "start_date": date.fromordinal(start).isoformat(),
+            "end_date": date.fromordinal(end).isoformat(),
+            "days": end - start + 1,
+            "status": self._statuses[status],
+            "request_id": f"REQ{request}" if request >= 0 else None,
+        }
+
+    def _rows(self, columns: Sequence[np.ndarray]) -> List[Interval]:
+        return list(zip(*(column.tolist() for column in columns)))
+
+    def overlapping(self, employee_id: str, start_date: DateLike, end_date: DateLike) -> List[Dict[str, Any]]:
+        """The employee's approved or pending leave overlapping [start_date, end_date], by start date."""
+        first, last = _ordinal(start_date), _ordinal(end_date)
+        with self._lock:
+            if self.store.external_writes:
+                # Another process may have stored a request for this employee
+                self._dirty.add(employee_id)
+            self.refresh()
+            employee = self._employee_codes.get(employee_id)
+            if employee is None:
+                return []
+            rows = []
+            positions = self._base_positions(employee)
+            if positions is not None:
+                starts = self._start[positions]
+                window = positions[np.searchsorted(starts, first - self._max_length, "left"):
+                                   np.searchsorted(starts, last, "right")]
+                window = window[self._end[window] >= first]
+                rows = self._rows([column[window] for column in self._columns])
+            rows += [interval for interval in self._employee_delta.get(employee, ())
+                     if interval[0] <= last and interval[1] >= first]
+            return [self._record(*row) for row in sorted(rows)]
+
+    def _matching(self, first: int, last: int, leave_type: Optional[str],
+                  statuses: Sequence[str]) -> Tuple[np.ndarray, ...]:
+        """Columns of the intervals overlapping [first, last] with the type and statuses, unordered."""
+        low = np.searchsorted(self._start, first - self._max_length, "left")
+        high = np.searchsorted(self._start, last, "right")
+        columns = [column[low:high] for column in self._columns]
+        mask = self._alive[low:high] & (columns[1] >= first)
+        status_codes = [self._status_codes[s] for s in statuses if s in self._status_codes]
+        if len(status_codes) < len(self._statuses):
+            mask &= np.isin(columns[4], status_codes)
+        if leave_type is not None:
+            mask &= columns[3] == self._type_codes.get(leave_type, -1)
+        positions = np.flatnonzero(mask)
+        index = bisect.bisect_left(self._delta, (first - self._max_length,))
+        delta = []
+        while index < len(self._delta) and self._delta[index][0] <= last:
+            interval = self._delta[index]
+            if interval[1] >= first and self._statuses[interval[4]] in statuses and \
+                    (leave_type is None or self._types[interval[3]] == leave_type):
+                delta.append(interval)
+            index += 1
+        return tuple(np.concatenate([column[positions], extra]) for column, extra in zip(columns, _to_columns(delta)))
+
+    def absences(self, start_date: DateLike, end_date: DateLike, leave_type: Optional[str] = None,
+                 statuses: Sequence[str] = INDEXED_STATUSES, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        All approved or pending leave overlapping [start_date, end_date], by start
+        date, then employee ID, then end date.
+
+        Args:
+            start_date: First day of the period (ISO string or date)
+            end_date: Last day of the period, inclusive
+            leave_type: Only this leave type, if given
+            statuses: Only leave with one of these statuses
+            limit: Return at most this many, the earliest first
+
+        Returns:
+            One dict per leave with employee_id, type, start_date, end_date,
+            days, status and request_id
+        """
+        first, last = _ordinal(start_date), _ordinal(end_date)
+        with self._lock:
+            self.refresh()
+            columns = self._matching(first, last, leave_type, statuses)
+            if len(self._employee_rank) < len(self._employee_ids):
+                # Rank of each employee code in employee ID order, for sorting by ID
+                self._employee_rank = np.argsort(np.argsort(np.array(self._employee_ids)))
+            order = np.lexsort((columns[1], self._employee_rank[columns[2]], columns[0]))[:limit]
+            return [self._record(*row) for row in self._rows([column[order] for column in columns])]
+
+    def absence_count(self, start_date: DateLike, end_date: DateLike, leave_type: Optional[str] = None,
+                      statuses: Sequence[str] = INDEXED_STATUSES) -> int:
+        """Number of leaves absences() would return, without building them."""
+        with self._lock:
+            self.refresh()
+            return len(self._matching(_ordinal(start_date), _ordinal(end_date), leave_type, statuses)[0])
+
+
+# --- Process-wide instance ---
+_index: Optional[LeaveIntervalIndex] = None
+_index_lock = threading.Lock()
+
+def get_interval_index() -> LeaveIntervalIndex:
+    """Return the interval index of the current store (see leave_store.get_store), building it on first use."""
+    global _index
+    store = get_store()
+    if _index is None or _index.store is not store:
+        with _index_lock:
+            if _index is None or _index.store is not store:
+                if _index is not None:
+                    _index.close()
+                _index = LeaveIntervalIndex(store)
+    return _index
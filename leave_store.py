@@ -0,0 +1,717 @@
+# leave_store.py
+import os
+import re
+import sqlite3
+import threading
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple
+
+from leave_data import EMPLOYEE_DB, EMPLOYEE_ROLE, MANAGER_ROLE
+
+# --- Storage backends ---
+# Every function in leave_tools.py goes through get_store(), so the backing
+# storage can be swapped without touching the tools. The in-memory backend
+# wraps EMPLOYEE_DB (one copy per process); the SQLite backend lets several
+# app processes share one database file.
+#
+# Writes that read-then-modify a balance go through submit_leave() and
+# change_leave_status(), which run as one atomic step per backend (a
+# per-employee lock in memory, an IMMEDIATE transaction in SQLite). Request
+# IDs come from a single store-wide sequence, so they are unique across
+# employees and increase monotonically.
+#
+# Listeners registered with add_listener() are told which employees a write in
+# this process changed (leave_analytics.py keeps its columnar view current
+# this way). Writes by other processes sharing a SQLite file are not reported.
+
+class LeaveStore:
+    """Interface shared by the storage backends."""
+
+    # Whether calls may block on I/O or locks held by other processes; async
+    # callers run blocking stores in a worker thread (see leave_tools.run_tool_async)
+    blocking = True
+    # Whether other processes may write the same data; add_listener() does not
+    # see those writes, so views built from the store must re-read it now and then
+    external_writes = True
+    _listeners: Tuple[Callable[[Optional[List[str]]], None], ...] = ()
+
+    def add_listener(self, listener: Callable[[Optional[List[str]]], None]) -> None:
+        """
+        Call listener(employee_ids) after every write made through this store.
+
+        employee_ids lists the employees whose balance or history changed, or is
+        None after bulk loads, when any employee may have changed.
+        """
+        # Copy on write, so _notify never sees the tuple change under it
+        self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener: Callable[[Optional[List[str]]], None]) -> None:
+        self._listeners = tuple(l for l in self._listeners if l is not listener)
+
+    def _notify(self, employee_ids: Optional[List[str]]) -> None:
+        for listener in self._listeners:
+            listener(employee_ids)
+
+    def employee_exists(self, employee_id: str) -> bool:
+        return self.get_employee(employee_id) is not None
+
+    def get_employee(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Return {"name", "email", "password", "role"} for an employee, or None."""
+        raise NotImplementedError
+
+    def is_manager(self, employee_id: str) -> bool:
+        """Whether the employee may see team reports with names and sensitive leave types."""
+        employee = self.get_employee(employee_id)
+        return employee is not None and employee["role"] == MANAGER_ROLE
+
+    def get_leave_balance(self, employee_id: str) -> Dict[str, int]:
+        """Return a copy of the employee's balance per leave type."""
+        raise NotImplementedError
+
+    def get_leave_history(self, employee_id: str) -> List[Dict[str, Any]]:
+        """Return the employee's leave records, oldest first."""
+        raise NotImplementedError
+
+    def get_leave_record(self, employee_id: str, request_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a single leave record by request ID."""
+        raise NotImplementedError
+
+    def employee_ids(self) -> List[str]:
+        raise NotImplementedError
+
+    def iter_leave_data(self) -> Iterator[Tuple[str, str, Dict[str, int], List[Dict[str, Any]]]]:
+        """
+        Yield (employee_id, name, leave_balance, leave_history) for every employee.
+
+        For bulk reads (analytics); cheaper than the per-employee getters. The
+        yielded dicts and lists must not be modified.
+        """
+        for employee_id in self.employee_ids():
+            employee = self.get_employee(employee_id)
+            if employee is not None:
+                yield (employee_id, employee["name"], self.get_leave_balance(employee_id),
+                       self.get_leave_history(employee_id))
+
+    def add_leave_record(self, employee_id: str, record: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def set_leave_status(self, employee_id: str, request_id: str, status: str) -> None:
+        raise NotImplementedError
+
+    def adjust_leave_balance(self, employee_id: str, leave_type: str, delta: int) -> None:
+        raise NotImplementedError
+
+    def submit_leave(self, employee_id: str, record: Dict[str, Any],
+                     reject_insufficient: bool = False) -> Dict[str, Any]:
+        """
+        Atomically check the balance, deduct it and store a new leave request.
+
+        Args:
+            employee_id: The ID of the employee
+            record: type, start_date, end_date, days and reason of the request
+            reject_insufficient: If True, nothing is stored when the balance is too low
+
+        Returns:
+            {"request_id", "status", "balance"} where balance is the balance before
+            the request (None for leave types without a balance). request_id and
+            status are None when the request was rejected.
+        """
+        raise NotImplementedError
+
+    def submit_leave_batch(self, requests: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Submit many leave requests at once, as submit_leave does one.
+
+        Requests are applied in order, so each sees the balance left by the
+        earlier requests of the same employee; insufficient balance means
+        "pending manager approval". The backends apply the whole batch in one
+        atomic step. All employees must exist.
+
+        Returns:
+            One {"request_id", "status", "balance"} result per request, in order.
+        """
+        return [self.submit_leave(employee_id, record) for employee_id, record in requests]
+
+    def change_leave_status(self, employee_id: str, request_id: str, new_status: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically update a request's status and adjust the balance to match.
+
+        Returns:
+            {"old_status", "type", "days", "balance_change"} where balance_change is
+            "deducted", "restored", "insufficient" or None; None if the request
+            does not exist.
+        """
+        raise NotImplementedError
+
+    def add_employee(self, employee_id: str, name: str, email: str, password: str,
+                     leave_balance: Dict[str, int], leave_history: Optional[List[Dict[str, Any]]] = None,
+                     role: str = EMPLOYEE_ROLE) -> None:
+        raise NotImplementedError
+
+    def add_employees(self, employees: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Bulk-load (employee_id, employee) pairs in the EMPLOYEE_DB layout.
+
+        Records may carry REQ<n> request IDs; the request sequence continues
+        after the highest one. Returns the number of employees added.
+        """
+        count = 0
+        for employee_id, employee in employees:
+            self.add_employee(employee_id, employee["name"], employee["email"], employee["password"],
+                              employee["leave_balance"], employee["leave_history"], employee.get("role", EMPLOYEE_ROLE))
+            count += 1
+        return count
+
+
+def _submission_status(balance: Optional[int], days: int) -> Optional[str]:
+    """Status for a new request given the current balance (None means insufficient)."""
+    if balance is None:
+        # Leave types without a balance (bereavement, maternity, ...) always need a manager
+        return "pending manager approval"
+    return "approved" if balance >= days else None
+
+def _balance_change(old_status: str, new_status: str, balance: Optional[int], days: int) -> Optional[str]:
+    """How a status transition affects the balance."""
+    if balance is None:
+        return None
+    if new_status == "approved" and old_status != "approved":
+        return "deducted" if balance >= days else "insufficient"
+    if old_status == "approved" and new_status != "approved":
+        return "restored"
+    return None
+
+def _plan_batch(requests: List[Tuple[str, Dict[str, Any]]],
+                balances: Dict[str, Dict[str, int]]) -> List[Tuple[str, Optional[int]]]:
+    """(status, balance before) per request; approved days are deducted from balances in place."""
+    plan = []
+    for employee_id, record in requests:
+        employee_balances = balances[employee_id]
+        balance = employee_balances.get(record["type"])
+        status = _submission_status(balance, record["days"]) or "pending manager approval"
+        if status == "approved":
+            employee_balances[record["type"]] = balance - record["days"]
+        plan.append((status, balance))
+    return plan
+
+def _request_number(request_id: Optional[str]) -> int:
+    match = re.fullmatch(r"REQ(\d+)", request_id or "")
+    return int(match.group(1)) if match else 0
+
+
+class MemoryStore(LeaveStore):
+    """Dict-backed store. Keeps the EMPLOYEE_DB layout and adds a request ID index."""
+
+    blocking = False
+    external_writes = False
+
+    def __init__(self, db: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.db = EMPLOYEE_DB if db is None else db
+        # employee_id -> request_id -> record (same dict objects as in leave_history)
+        self._request_index: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        last_request = 0
+        for employee_id, employee in self.db.items():
+            index = self._request_index.setdefault(employee_id, {})
+            for record in employee["leave_history"]:
+                last_request = max(last_request, _request_number(record.get("request_id")))
+                if record.get("request_id"):
+                    index[record["request_id"]] = record
+        # Continue after existing records so IDs line up with the SQLite backend
+        self._last_request = max(last_request, sum(len(e["leave_history"]) for e in self.db.values()))
+        self._request_lock = threading.Lock()
+        self._employee_locks: Dict[str, threading.Lock] = {}
+        self._employee_locks_guard = threading.Lock()
+
+    def _employee_lock(self, employee_id: str) -> threading.Lock:
+        lock = self._employee_locks.get(employee_id)
+        if lock is None:
+            with self._employee_locks_guard:
+                lock = self._employee_locks.setdefault(employee_id, threading.Lock())
+        return lock
+
+    def _next_request_id(self) -> str:
+        with self._request_lock:
+            self._last_request += 1
+            return f"REQ{self._last_request}"
+
+    def _reserve_request_numbers(self, count: int) -> int:
+        """Reserve count consecutive request numbers and return the first."""
+        with self._request_lock:
+            first = self._last_request + 1
+            self._last_request += count
+            return first
+
+    def get_employee(self, employee_id):
+        employee = self.db.get(employee_id)
+        if employee is None:
+            return None
+        return {"name": employee["name"], "email": employee["email"], "password": employee["password"],
+                "role": employee.get("role", EMPLOYEE_ROLE)}
+
+    def employee_exists(self, employee_id):
+        return employee_id in self.db
+
+    def get_leave_balance(self, employee_id):
+        return dict(self.db[employee_id]["leave_balance"])
+
+    def get_leave_history(self, employee_id):
+        return [dict(record) for record in self.db[employee_id]["leave_history"]]
+
+    def get_leave_record(self, employee_id, request_id):
+        record = self._request_index.get(employee_id, {}).get(request_id)
+        return dict(record) if record is not None else None
+
+    def employee_ids(self):
+        return list(self.db)
+
+    def iter_leave_data(self):
+        for employee_id, employee in list(self.db.items()):
+            yield employee_id, employee["name"], employee["leave_balance"], employee["leave_history"]
+
+    def add_leave_record(self, employee_id, record):
+        with self._employee_lock(employee_id):
+            self._add_record(employee_id, record)
+        self._notify([employee_id])
+
+    def _add_record(self, employee_id, record):
+        record = dict(record)
+        self.db[employee_id]["leave_history"].append(record)
+        if record.get("request_id"):
+            self._request_index.setdefault(employee_id, {})[record["request_id"]] = record
+
+    def set_leave_status(self, employee_id, request_id, status):
+        with self._employee_lock(employee_id):
+            self._request_index[employee_id][request_id]["status"] = status
+        self._notify([employee_id])
+
+    def adjust_leave_balance(self, employee_id, leave_type, delta):
+        with self._employee_lock(employee_id):
+            self.db[employee_id]["leave_balance"][leave_type] += delta
+        self._notify([employee_id])
+
+    def submit_leave(self, employee_id, record, reject_insufficient=False):
+        balances = self.db[employee_id]["leave_balance"]
+        with self._employee_lock(employee_id):
+            balance = balances.get(record["type"])
+            status = _submission_status(balance, record["days"])
+            if status is None:
+                if reject_insufficient:
+                    return {"request_id": None, "status": None, "balance": balance}
+                status = "pending manager approval"
+            if status == "approved":
+                balances[record["type"]] -= record["days"]
+            request_id = self._next_request_id()
+            self._add_record(employee_id, {**record, "request_id": request_id, "status": status})
+        self._notify([employee_id])
+        return {"request_id": request_id, "status": status, "balance": balance}
+
+    def submit_leave_batch(self, requests):
+        employee_ids = sorted({employee_id for employee_id, _ in requests})
+        with ExitStack() as stack:
+            # Always lock in the same order so concurrent batches cannot deadlock
+            for employee_id in employee_ids:
+                stack.enter_context(self._employee_lock(employee_id))
+            plan = _plan_batch(requests, {employee_id: self.db[employee_id]["leave_balance"]
+                                          for employee_id, _ in requests})
+            first = self._reserve_request_numbers(len(requests))
+            results = []
+            for number, (employee_id, record), (status, balance) in zip(range(first, first + len(requests)), requests, plan):
+                request_id = f"REQ{number}"
+                self._add_record(employee_id, {**record, "request_id": request_id, "status": status})
+                results.append({"request_id": request_id, "status": status, "balance": balance})
+        self._notify(employee_ids)
+        return results
+
+    def change_leave_status(self, employee_id, request_id, new_status):
+        with self._employee_lock(employee_id):
+            record = self._request_index.get(employee_id, {}).get(request_id)
+            if record is None:
+                return None
+            old_status = record["status"]
+            record["status"] = new_status
+            balances = self.db[employee_id]["leave_balance"]
+            change = _balance_change(old_status, new_status, balances.get(record["type"]), record["days"])
+            if change == "deducted":
+                balances[record["type"]] -= record["days"]
+            elif change == "restored":
+                balances[record["type"]] += record["days"]
+        self._notify([employee_id])
+        return {"old_status": old_status, "type": record["type"], "days": record["days"], "balance_change": change}
+
+    def add_employee(self, employee_id, name, email, password, leave_balance, leave_history=None, role=EMPLOYEE_ROLE):
+        self._insert_employee(employee_id, name, email, password, leave_balance, leave_history, role)
+        self._notify([employee_id])
+
+    def _insert_employee(self, employee_id, name, email, password, leave_balance, leave_history, role=EMPLOYEE_ROLE):
+        self.db[employee_id] = {
+            "name": name,
+            "email": email,
+            "password": password,
+            "role": role,
+            "leave_balance": dict(leave_balance),
+            "leave_history": [],
+        }
+        self._request_index[employee_id] = {}
+        for record in leave_history or []:
+            self._add_record(employee_id, record)
+
+    def add_employees(self, employees):
+        count = 0
+        last_request = 0
+        for employee_id, employee in employees:
+            self._insert_employee(employee_id, employee["name"], employee["email"], employee["password"],
+                                  employee["leave_balance"], employee["leave_history"], employee.get("role", EMPLOYEE_ROLE))
+            for record in employee["leave_history"]:
+                last_request = max(last_request, _request_number(record.get("request_id")))
+            count += 1
+        with self._request_lock:
+            self._last_request = max(self._last_request, last_request)
+        self._notify(None)
+        return count
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    employee_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'employee'
+);
+CREATE TABLE IF NOT EXISTS leave_balance (
+    employee_id TEXT NOT NULL REFERENCES employees(employee_id),
+    leave_type TEXT NOT NULL,
+    days INTEGER NOT NULL,
+    PRIMARY KEY (employee_id, leave_type)
+);
+CREATE TABLE IF NOT EXISTS leave_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id TEXT NOT NULL REFERENCES employees(employee_id),
+    request_id TEXT,
+    type TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    days INTEGER NOT NULL,
+    reason TEXT,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leave_history_employee ON leave_history (employee_id, id);
+CREATE INDEX IF NOT EXISTS idx_leave_history_request ON leave_history (employee_id, request_id);
+"""
+
+HISTORY_COLUMNS = ("request_id", "type", "start_date", "end_date", "days", "reason", "status")
+
+
+class SQLiteStore(LeaveStore):
+    """SQLite store in WAL mode. Safe to share between threads and processes."""
+
+    def __init__(self, path: str, seed: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        # Databases created before roles existed
+        if "role" not in {column[1] for column in conn.execute("PRAGMA table_info(employees)")}:
+            conn.execute(f"ALTER TABLE employees ADD COLUMN role TEXT NOT NULL DEFAULT '{EMPLOYEE_ROLE}'")
+        if seed:
+            # Check and seed in one write transaction so concurrent processes seed only once
+            with self._transaction() as conn:
+                if conn.execute("SELECT 1 FROM employees LIMIT 1").fetchone() is None:
+                    for employee_id, employee in seed.items():
+                        self._insert_employee(conn, employee_id, employee["name"], employee["email"],
+                                              employee["password"], employee["leave_balance"],
+                                              employee["leave_history"], employee.get("role", EMPLOYEE_ROLE))
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # Connections run in autocommit mode, so transactions are opened explicitly.
+        # IMMEDIATE takes the write lock up front: read-then-write sequences inside
+        # the block cannot interleave with another writer in any process.
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _history_row_to_dict(self, row) -> Dict[str, Any]:
+        record = dict(zip(HISTORY_COLUMNS, row))
+        # Seeded records may not have a request ID or a reason; keep the dict shape of EMPLOYEE_DB
+        if record["request_id"] is None:
+            del record["request_id"]
+        if record["reason"] is None:
+            del record["reason"]
+        return record
+
+    def get_employee(self, employee_id):
+        row = self._conn().execute(
+            "SELECT name, email, password, role FROM employees WHERE employee_id = ?", (employee_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"name": row[0], "email": row[1], "password": row[2], "role": row[3]}
+
+    def employee_exists(self, employee_id):
+        return self._conn().execute(
+            "SELECT 1 FROM employees WHERE employee_id = ?", (employee_id,)
+        ).fetchone() is not None
+
+    def get_leave_balance(self, employee_id):
+        rows = self._conn().execute(
+            "SELECT leave_type, days FROM leave_balance WHERE employee_id = ? ORDER BY rowid", (employee_id,)
+        ).fetchall()
+        return dict(rows)
+
+    def get_leave_history(self, employee_id):
+        rows = self._conn().execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM leave_history WHERE employee_id = ? ORDER BY id",
+            (employee_id,),
+        ).fetchall()
+        return [self._history_row_to_dict(row) for row in rows]
+
+    def get_leave_record(self, employee_id, request_id):
+        row = self._conn().execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM leave_history WHERE employee_id = ? AND request_id = ?",
+            (employee_id, request_id),
+        ).fetchone()
+        return self._history_row_to_dict(row) if row is not None else None
+
+    def employee_ids(self):
+        return [row[0] for row in self._conn().execute("SELECT employee_id FROM employees ORDER BY employee_id")]
+
+    def iter_leave_data(self):
+        # Three scans merged on employee_id, all in one read transaction so they
+        # see the same snapshot (WAL readers don't block writers). The rows are
+        # fetched before the first yield, so a caller that stops early (or never
+        # closes the generator) doesn't keep the transaction open.
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            employees = conn.execute("SELECT employee_id, name FROM employees ORDER BY employee_id").fetchall()
+            balances = iter(conn.execute(
+                "SELECT employee_id, leave_type, days FROM leave_balance ORDER BY employee_id, rowid"
+            ).fetchall())
+            history = iter(conn.execute(
+                f"SELECT employee_id, {', '.join(HISTORY_COLUMNS)} FROM leave_history ORDER BY employee_id, id"
+            ).fetchall())
+        finally:
+            conn.execute("COMMIT")
+        balance_row = next(balances, None)
+        history_row = next(history, None)
+        for employee_id, name in employees:
+            leave_balance = {}
+            while balance_row is not None and balance_row[0] <= employee_id:
+                if balance_row[0] == employee_id:
+                    leave_balance[balance_row[1]] = balance_row[2]
+                balance_row = next(balances, None)
+            leave_history = []
+            while history_row is not None and history_row[0] <= employee_id:
+                if history_row[0] == employee_id:
+                    leave_history.append(self._history_row_to_dict(history_row[1:]))
+                history_row = next(history, None)
+            yield employee_id, name, leave_balance, leave_history
+
+    def add_leave_record(self, employee_id, record):
+        with self._conn() as conn:
+            self._insert_record(conn, employee_id, record)
+        self._notify([employee_id])
+
+    def _insert_record(self, conn, employee_id, record):
+        return conn.execute(
+            f"INSERT INTO leave_history (employee_id, {', '.join(HISTORY_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (employee_id, *(record.get(column) for column in HISTORY_COLUMNS)),
+        )
+
+    def set_leave_status(self, employee_id, request_id, status):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE leave_history SET status = ? WHERE employee_id = ? AND request_id = ?",
+                (status, employee_id, request_id),
+            )
+        self._notify([employee_id])
+
+    def adjust_leave_balance(self, employee_id, leave_type, delta):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE leave_balance SET days = days + ? WHERE employee_id = ? AND leave_type = ?",
+                (delta, employee_id, leave_type),
+            )
+        self._notify([employee_id])
+
+    def submit_leave(self, employee_id, record, reject_insufficient=False):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT days FROM leave_balance WHERE employee_id = ? AND leave_type = ?",
+                (employee_id, record["type"]),
+            ).fetchone()
+            balance = row[0] if row is not None else None
+            status = _submission_status(balance, record["days"])
+            if status is None:
+                if reject_insufficient:
+                    return {"request_id": None, "status": None, "balance": balance}
+                status = "pending manager approval"
+            if status == "approved":
+                conn.execute(
+                    "UPDATE leave_balance SET days = days - ? WHERE employee_id = ? AND leave_type = ?",
+                    (record["days"], employee_id, record["type"]),
+                )
+            # The AUTOINCREMENT row ID is the store-wide request sequence
+            cursor = self._insert_record(conn, employee_id, {**record, "request_id": None, "status": status})
+            request_id = f"REQ{cursor.lastrowid}"
+            conn.execute("UPDATE leave_history SET request_id = ? WHERE id = ?", (request_id, cursor.lastrowid))
+        self._notify([employee_id])
+        return {"request_id": request_id, "status": status, "balance": balance}
+
+    def submit_leave_batch(self, requests, chunk_size=500):
+        employee_ids = list({employee_id for employee_id, _ in requests})
+        with self._transaction() as conn:
+            balances: Dict[str, Dict[str, int]] = {employee_id: {} for employee_id in employee_ids}
+            for start in range(0, len(employee_ids), chunk_size):
+                chunk = employee_ids[start:start + chunk_size]
+                rows = conn.execute(
+                    f"SELECT employee_id, leave_type, days FROM leave_balance "
+                    f"WHERE employee_id IN ({', '.join('?' * len(chunk))})", chunk,
+                )
+                for employee_id, leave_type, days in rows:
+                    balances[employee_id][leave_type] = days
+            before = {employee_id: dict(b) for employee_id, b in balances.items()}
+            plan = _plan_batch(requests, balances)
+            conn.executemany(
+                "UPDATE leave_balance SET days = ? WHERE employee_id = ? AND leave_type = ?",
+                [(days, employee_id, leave_type) for employee_id, b in balances.items()
+                 for leave_type, days in b.items() if before[employee_id][leave_type] != days],
+            )
+            # Reserve a block of row IDs (the write lock is held); as in submit_leave
+            # the row ID is the request number
+            first = conn.execute(
+                "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'leave_history'), 0), "
+                "COALESCE((SELECT MAX(id) FROM leave_history), 0)) + 1"
+            ).fetchone()[0]
+            rows = []
+            results = []
+            for number, (employee_id, record), (status, balance) in zip(range(first, first + len(requests)), requests, plan):
+                request_id = f"REQ{number}"
+                stored = {**record, "request_id": request_id, "status": status}
+                rows.append((number, employee_id, *(stored.get(column) for column in HISTORY_COLUMNS)))
+                results.append({"request_id": request_id, "status": status, "balance": balance})
+            conn.executemany(
+                f"INSERT INTO leave_history (id, employee_id, {', '.join(HISTORY_COLUMNS)}) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        self._notify(employee_ids)
+        return results
+
+    def change_leave_status(self, employee_id, request_id, new_status):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, status, type, days FROM leave_history WHERE employee_id = ? AND request_id = ?",
+                (employee_id, request_id),
+            ).fetchone()
+            if row is None:
+                return None
+            record_id, old_status, leave_type, days = row
+            conn.execute("UPDATE leave_history SET status = ? WHERE id = ?", (new_status, record_id))
+            balance_row = conn.execute(
+                "SELECT days FROM leave_balance WHERE employee_id = ? AND leave_type = ?",
+                (employee_id, leave_type),
+            ).fetchone()
+            change = _balance_change(old_status, new_status, balance_row[0] if balance_row else None, days)
+            if change in ("deducted", "restored"):
+                conn.execute(
+                    "UPDATE leave_balance SET days = days + ? WHERE employee_id = ? AND leave_type = ?",
+                    (-days if change == "deducted" else days, employee_id, leave_type),
+                )
+        self._notify([employee_id])
+        return {"old_status": old_status, "type": leave_type, "days": days, "balance_change": change}
+
+    def add_employee(self, employee_id, name, email, password, leave_balance, leave_history=None, role=EMPLOYEE_ROLE):
+        with self._transaction() as conn:
+            self._insert_employee(conn, employee_id, name, email, password, leave_balance, leave_history, role)
+        self._notify([employee_id])
+
+    def _insert_employee(self, conn, employee_id, name, email, password, leave_balance, leave_history,
+                         role=EMPLOYEE_ROLE):
+        conn.execute(
+            "INSERT INTO employees (employee_id, name, email, password, role) VALUES (?, ?, ?, ?, ?)",
+            (employee_id, name, email, password, role),
+        )
+        conn.executemany(
+            "INSERT INTO leave_balance (employee_id, leave_type, days) VALUES (?, ?, ?)",
+            [(employee_id, leave_type, days) for leave_type, days in leave_balance.items()],
+        )
+        for record in leave_history or []:
+            self._insert_record(conn, employee_id, record)
+
+    def add_employees(self, employees, batch_size=1000):
+        # One transaction and one executemany per table and batch; per-employee
+        # inserts would spend most of their time in statement overhead
+        employees = iter(employees)
+        count = 0
+        last_request = 0
+        with self._transaction() as conn:
+            while True:
+                batch = list(islice(employees, batch_size))
+                if not batch:
+                    break
+                conn.executemany(
+                    "INSERT INTO employees (employee_id, name, email, password, role) VALUES (?, ?, ?, ?, ?)",
+                    [(employee_id, e["name"], e["email"], e["password"], e.get("role", EMPLOYEE_ROLE))
+                     for employee_id, e in batch],
+                )
+                conn.executemany(
+                    "INSERT INTO leave_balance (employee_id, leave_type, days) VALUES (?, ?, ?)",
+                    [(employee_id, leave_type, days)
+                     for employee_id, e in batch for leave_type, days in e["leave_balance"].items()],
+                )
+                records = [(employee_id, record) for employee_id, e in batch for record in e["leave_history"]]
+                conn.executemany(
+                    f"INSERT INTO leave_history (employee_id, {', '.join(HISTORY_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(employee_id, *(record.get(column) for column in HISTORY_COLUMNS)) for employee_id, record in records],
+                )
+                last_request = max([last_request] + [_request_number(r.get("request_id")) for _, r in records])
+                count += len(batch)
+            if last_request:
+                # Keep REQ<rowid> IDs of later submissions clear of the loaded ones
+                conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'leave_history'", (last_request,))
+        self._notify(None)
+        return count
+
+
+# --- Active store ---
+_store: Optional[LeaveStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> LeaveStore:
+    """
+    Return the process-wide store.
+
+    Uses SQLite when the LEAVE_DB_PATH environment variable is set (seeded from
+    EMPLOYEE_DB on first use), otherwise the in-memory EMPLOYEE_DB.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                db_path = os.getenv("LEAVE_DB_PATH")
+                _store = SQLiteStore(db_path, seed=EMPLOYEE_DB) if db_path else MemoryStore()
+    return _store
+
+def set_store(store: LeaveStore) -> None:
+    """Replace the process-wide store (e.g. to point at a different database)."""
+    global _store
+    with _store_lock:
+        _store = store
@@ -1,137 +1,262 @@
 # leave_tools.py
-from datetime import datetime
-from typing import Optional, List, Dict, Any
-from leave_data import EMPLOYEE_DB, LEAVE_TYPES, LEAVE_POLICIES, extract_leave_details
+import asyncio
+from datetime import date, datetime
+from typing import Optional, List, Dict, Any, Tuple, Union
+from holiday_calendar import DEFAULT_REGION, get_holiday_calendar
+from leave_data import LEAVE_TYPES, LEAVE_POLICIES, SENSITIVE_LEAVE_TYPES, extract_leave_details
+from leave_store import get_store
+from tool_cache import cached_tool, tool_cache
+from tool_output import ToolResult, error, table
 
-def check_leave_balance(employee_id: str) -> str:
-    """Check the current leave balance for the specified employee."""
-    if employee_id not in EMPLOYEE_DB:
-        return f"Employee ID {employee_id} not found."
-    
-    balance = EMPLOYEE_DB[employee_id]["leave_balance"]
-    name = EMPLOYEE_DB[employee_id]["name"]
-    
-    response = f"Leave balance for {name} (ID: {employee_id}):\n"
-    for leave_type, days in balance.items():
-        response += f"- {leave_type.capitalize()} leave: {days} days\n"
-    
-    return response
+# Holidays listed when no range is asked for
+UPCOMING_HOLIDAYS = 5
+# Absences get_team_absences lists before giving only the total
+MAX_LISTED_ABSENCES = 50
+NO_WORKING_DAYS = "The requested dates fall entirely on weekends or company holidays, so no leave is needed."
+INVALID_DATE = "Invalid date format. Please use YYYY-MM-DD format."
+END_BEFORE_START = "End date must be after start date."
+# The leave a new request overlaps, as the tools report it
+OVERLAP_COLUMNS = ("type", "start_date", "end_date", "status", "request_id")
 
-def view_leave_history(employee_id: str) -> str:
-    """View leave history for an employee"""
-    if employee_id not in EMPLOYEE_DB:
-        return f"Employee ID {employee_id} not found."
-    
-    history = EMPLOYEE_DB[employee_id]["leave_history"]
-    name = EMPLOYEE_DB[employee_id]["name"]
-    
-    if not history:
-        return f"{name} has no leave history."
-    
-    response = f"Leave history for {name} (ID: {employee_id}):\n"
-    for record in history:
-        response += (f"- {record['type'].capitalize()} leave: {record['start_date']} to {record['end_date']} "
-                    f"({record['days']} days) - {record['status']}\n")
-    
-    return response
+# The tools return a ToolResult (see tool_output.py): compact data for the
+# LLM, rendered to the familiar English text for people.
 
-def request_leave(employee_id: str, leave_type: str, start_date: str, end_date: str, reason: str = "") -> str:
-    """Submit a leave request"""
-    if employee_id not in EMPLOYEE_DB:
-        return f"Employee ID {employee_id} not found."
-    
-    if leave_type.lower() not in LEAVE_TYPES:
-        return f"Invalid leave type. Available types: {', '.join(LEAVE_TYPES)}."
-    
+def leave_days(start: datetime, end: datetime) -> int:
+    """Business days charged for a leave from start to end (inclusive)."""
+    # Imports NumPy, so only once a request comes in
+    from business_days import get_business_calendar
+    return get_business_calendar().count(start.date(), end.date())
+
+def _employee_not_found(employee_id: str) -> ToolResult:
+    return error(f"Employee ID {employee_id} not found.")
+
+def _overlaps(conflicts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return table(OVERLAP_COLUMNS, ([c[column] for column in OVERLAP_COLUMNS] for c in conflicts))
+
+def _parse_range(start_date: str, end_date: str) -> Union[Tuple[datetime, datetime], ToolResult]:
+    """(start, end) datetimes, or the error result for bad input."""
     try:
         start = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
     except ValueError:
-        return "Invalid date format. Please use YYYY-MM-DD format."
-    
+        return error(INVALID_DATE)
     if start > end:
-        return "End date must be after start date."
-    
-    # Calculate business days
-    delta = end - start
-    days = delta.days + 1
-    
-    leave_type = leave_type.lower()
-    
-    # Check if leave balance is sufficient for annual, sick, personal leave
-    if leave_type in EMPLOYEE_DB[employee_id]["leave_balance"]:
-        if EMPLOYEE_DB[employee_id]["leave_balance"][leave_type] < days:
-            return f"Insufficient {leave_type} leave balance. You requested {days} days but have {EMPLOYEE_DB[employee_id]['leave_balance'][leave_type]} days available. Your request has been forwarded to your manager for special approval."
-    
-    # Determine if the request can be auto-approved
-    can_auto_approve = False
-    status = "pending manager approval"
-    
-    # Auto-approve if it's a standard leave type with sufficient balance
-    if leave_type in EMPLOYEE_DB[employee_id]["leave_balance"]:
-        if EMPLOYEE_DB[employee_id]["leave_balance"][leave_type] >= days:
-            can_auto_approve = True
-            status = "approved"
+        return error(END_BEFORE_START)
+    return start, end
+
+def _holidays(holidays: List[Dict[str, str]]) -> Dict[str, Any]:
+    return table(("date", "name"), ([holiday["date"], holiday["name"]] for holiday in holidays))
+
+@cached_tool()
+def check_leave_balance(employee_id: str) -> ToolResult:
+    """Check the current leave balance for the specified employee."""
+    store = get_store()
+    employee = store.get_employee(employee_id)
+    if employee is None:
+        return _employee_not_found(employee_id)
+    
+    balance = store.get_leave_balance(employee_id)
+    return ToolResult("balance", {"balance": dict(balance)},
+                      display={"employee_id": employee_id, "name": employee["name"]})
+
+@cached_tool()
+def view_leave_history(employee_id: str) -> ToolResult:
+    """View leave history for an employee"""
+    store = get_store()
+    employee = store.get_employee(employee_id)
+    if employee is None:
+        return _employee_not_found(employee_id)
+    
+    history = store.get_leave_history(employee_id)
+    return ToolResult("history", {
+        "history": table(("type", "start_date", "end_date", "days", "status", "request_id"),
+                         ([record["type"], record["start_date"], record["end_date"], record["days"],
+                           record["status"], record.get("request_id")] for record in history)),
+    }, display={"employee_id": employee_id, "name": employee["name"]})
+
+def request_leave(employee_id: str, leave_type: str, start_date: str, end_date: str, reason: str = "") -> ToolResult:
+    """Submit a leave request"""
+    store = get_store()
+    if not store.employee_exists(employee_id):
+        return _employee_not_found(employee_id)
     
-    request_id = f"REQ{len(EMPLOYEE_DB[employee_id]['leave_history']) + 1}"
+    if leave_type.lower() not in LEAVE_TYPES:
+        return error(f"Invalid leave type. Available types: {', '.join(LEAVE_TYPES)}.")
     
-    new_request = {
-        "request_id": request_id,
-        "type": leave_type,
-        "start_date": start_date,
-        "end_date": end_date,
-        "days": days,
-        "reason": reason,
-        "status": status
-    }
+    parsed = _parse_range(start_date, end_date)
+    if isinstance(parsed, ToolResult):
+        return parsed
+    start, end = parsed
     
-    # For auto-approved requests, deduct from balance
-    if can_auto_approve and leave_type in EMPLOYEE_DB[employee_id]["leave_balance"]:
-        EMPLOYEE_DB[employee_id]["leave_balance"][leave_type] -= days
+    # Calculate business days; weekends and company holidays are not charged
+    days = leave_days(start, end)
+    if days == 0:
+        return error(NO_WORKING_DAYS)
     
-    # Add to history
-    EMPLOYEE_DB[employee_id]["leave_history"].append({
-        "type": leave_type,
-        "start_date": start_date,
-        "end_date": end_date,
-        "days": days,
-        "status": status
-    })
+    leave_type = leave_type.lower()
     
-    if can_auto_approve:
-        return f"Leave request automatically approved! Request ID: {request_id}. Status: {status}."
-    else:
-        return f"Your leave request has been submitted (Request ID: {request_id}). Status: {status}. You will be notified once your manager reviews it."
+    # Overlapping approved or pending leave is refused or flagged, as in check_and_process_leave
+    from leave_intervals import OVERLAP_POLICY, get_interval_index
+    intervals = get_interval_index()
+    with intervals.employee_lock(employee_id):
+        conflicts = intervals.overlapping(employee_id, start_date, end_date)
+        if conflicts and OVERLAP_POLICY == "reject":
+            return ToolResult("overlap", {"overlaps": _overlaps(conflicts)})
+        # Check the balance, deduct it and store the request in one atomic step.
+        # Requests exceeding an annual/sick/personal balance are not stored.
+        result = store.submit_leave(employee_id, {
+            "type": leave_type,
+            "start_date": start_date,
+            "end_date": end_date,
+            "days": days,
+            "reason": reason
+        }, reject_insufficient=True)
+    tool_cache.invalidate(employee_id)
+    
+    # A request ID of None means the balance was insufficient and nothing was stored
+    data = {"request_id": result["request_id"], "status": result["status"], "days": days}
+    if result["request_id"] is None:
+        data["balance"] = result["balance"]
+    if conflicts:
+        data["overlaps"] = _overlaps(conflicts)
+    return ToolResult("leave_request", data, display={"type": leave_type})
 
-def get_leave_policy(leave_type: Optional[str] = None) -> str:
+@cached_tool(per_employee=False)
+def get_leave_policy(leave_type: Optional[str] = None) -> ToolResult:
     """Get information about leave policies"""
     if leave_type and leave_type.lower() in LEAVE_POLICIES:
-        return f"{leave_type.capitalize()} Leave Policy: {LEAVE_POLICIES[leave_type.lower()]}"
-    
-    response = "Leave Policies:\n"
-    for leave_type, policy in LEAVE_POLICIES.items():
-        response += f"- {leave_type.capitalize()} Leave: {policy}\n\n"
-    
-    return response
+        return ToolResult("policies", {"policies": {leave_type.lower(): LEAVE_POLICIES[leave_type.lower()]}})
+    return ToolResult("policies", {"policies": dict(LEAVE_POLICIES), "all": True})
 
-def get_holidays() -> str:
-    """Get list of upcoming holidays"""
-    # In a real system, this would be connected to a calendar
-    holidays = [
-        {"date": "2025-05-26", "name": "Memorial Day"},
-        {"date": "2025-07-04", "name": "Independence Day"},
-        {"date": "2025-09-01", "name": "Labor Day"},
-        {"date": "2025-11-27", "name": "Thanksgiving"},
-        {"date": "2025-12-25", "name": "Christmas"}
-    ]
-    
-    response = "Upcoming Holidays:\n"
-    for holiday in holidays:
-        response += f"- {holiday['date']}: {holiday['name']}\n"
+@cached_tool(per_employee=False)
+def search_leave_policies(query: str, top_k: int = 3) -> ToolResult:
+    """
+    Find the leave policy passages that answer a question, instead of reading every policy.
+
+    Args:
+        query: The question or keywords (e.g. "doctor's note for sick leave")
+        top_k: Number of passages to return (1-10)
+
+    Returns:
+        The best matching passages, each with its policy and section
+    """
+    from policy_search import get_policy_index, passage_source
+    results = get_policy_index().search(query, max(1, min(int(top_k), 10)))
+    return ToolResult("policy_passages", {
+        "passages": table(("source", "text"), ([passage_source(passage), passage["text"]] for _, passage in results)),
+    }, display={"query": query})
+
+def get_holidays(start_date: Optional[str] = None, end_date: Optional[str] = None, region: Optional[str] = None) -> ToolResult:
+    """
+    List company holidays: the next few from today, or all in a date range.
+
+    Args:
+        start_date: First day of the range (YYYY-MM-DD); omit for upcoming holidays
+        end_date: Last day of the range (YYYY-MM-DD); defaults to the end of start_date's year
+        region: Holiday region, e.g. "US" or "UK" (optional; defaults to the company's region)
+
+    Returns:
+        The holidays, each with date and name
+    """
+    # The calendar caches its formatted answers per day, so this is not a cached_tool;
+    # the lookups behind the data are a bisect or two
+    calendar = get_holiday_calendar()
+    if region and region.upper() not in calendar.regions():
+        return error(f"Unknown holiday region {region}. Available regions: {', '.join(calendar.regions())}.")
+    region = (region or DEFAULT_REGION).upper()
+    if not start_date and not end_date:
+        today = date.today()
+        return ToolResult("holidays", {
+            "region": region,
+            "holidays": _holidays(calendar.upcoming(today, UPCOMING_HOLIDAYS, region)),
+        }, text=calendar.format_upcoming(UPCOMING_HOLIDAYS, region, today))
     
-    return response
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else datetime.now()
+        end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime(start.year, 12, 31)
+    except ValueError:
+        return error(INVALID_DATE)
+    if start > end:
+        return error(END_BEFORE_START)
+    start, end = start.date(), end.date()
+    return ToolResult("holidays", {
+        "region": region,
+        "holidays": _holidays(calendar.between(start, end, region)),
+    }, display={"start_date": start.isoformat(), "end_date": end.isoformat()},
+        text=calendar.format_between(start, end, region))
+
+def get_leave_analytics(employee_id: str, report: str = "summary", leave_type: Optional[str] = None,
+                        days_ahead: int = 30) -> ToolResult:
+    """
+    Team-wide leave analytics across all employees.
 
-def update_leave_status(employee_id: str, request_id: str, new_status: str) -> str:
+    Args:
+        employee_id: The ID of the employee asking; only managers see who is away
+            and the sensitive leave types (sick, bereavement, ...)
+        report: "summary" (leave taken, pending and remaining per type this year, and
+            balance distribution), "upcoming" (who is away in the next days_ahead days)
+            or "trends" (approved leave days per month over the last 12 months)
+        leave_type: Limit the report to one leave type (optional)
+        days_ahead: How many days ahead the "upcoming" report looks
+
+    Returns:
+        The report's figures
+    """
+    store = get_store()
+    if not store.employee_exists(employee_id):
+        return _employee_not_found(employee_id)
+    # Imports pandas and NumPy, so only once a report is asked for
+    from leave_analytics import report_result
+    return report_result(report.strip().lower(), leave_type.strip().lower() if leave_type else None, days_ahead,
+                         restricted=not store.is_manager(employee_id))
+
+def get_team_absences(employee_id: str, start_date: str, end_date: Optional[str] = None,
+                      leave_type: Optional[str] = None) -> ToolResult:
+    """
+    List everyone on approved or pending leave between two dates (e.g. "who is out next week").
+
+    Args:
+        employee_id: The ID of the employee asking; only managers see who is away,
+            everyone else gets the number of absences
+        start_date: First day of the period (YYYY-MM-DD)
+        end_date: Last day of the period (YYYY-MM-DD); defaults to start_date
+        leave_type: Only list this leave type (optional)
+
+    Returns:
+        The absences in the period, by start date
+    """
+    store = get_store()
+    if not store.employee_exists(employee_id):
+        return _employee_not_found(employee_id)
+    manager = store.is_manager(employee_id)
+    leave_type = leave_type.lower() if leave_type else None
+    if not manager and leave_type in SENSITIVE_LEAVE_TYPES:
+        return error(f"Only managers can see {leave_type} leave across the team.")
+
+    parsed = _parse_range(start_date, end_date or start_date)
+    if isinstance(parsed, ToolResult):
+        return parsed
+    start, end = parsed
+    period = start_date if start == end else f"{start_date} to {end_date}"
+    
+    from leave_intervals import get_interval_index
+    intervals = get_interval_index()
+    total = intervals.absence_count(start.date(), end.date(), leave_type)
+    if not manager:
+        return ToolResult("absences", {"total": total}, display={"period": period})
+    absences = intervals.absences(start.date(), end.date(), leave_type, limit=MAX_LISTED_ABSENCES) if total else []
+    
+    rows = []
+    for absence in absences:
+        employee = store.get_employee(absence["employee_id"])
+        rows.append([employee["name"] if employee else absence["employee_id"], absence["employee_id"], absence["type"],
+                     absence["start_date"], absence["end_date"], absence["status"]])
+    return ToolResult("absences", {
+        "total": total,
+        "absences": table(("name", "employee_id", "type", "start_date", "end_date", "status"), rows),
+    }, display={"period": period})
+
+def update_leave_status(employee_id: str, request_id: str, new_status: str) -> ToolResult:
     """
     Update the status of a leave request in the database.
     
@@ -141,50 +266,26 @@ def update_leave_status(employee_id: str, request_id: str, new_status: str) -> s
         new_status: The new status to set (e.g., 'approved', 'rejected')
     
     Returns:
-        A message indicating the result of the update
+        The old and new status and how the balance changed
     """
-    if employee_id not in EMPLOYEE_DB:
-        return f"Employee ID {employee_id} not found."
-    
-    # Find the request in the history
-    for record in EMPLOYEE_DB[employee_id]["leave_history"]:
-        if record.get("request_id") == request_id:
-            old_status = record["status"]
-            
-            # Update the status
-            record["status"] = new_status
-            
-            # If newly approved, deduct from balance
-            if new_status == "approved" and old_status != "approved":
-                leave_type = record["type"]
-                days = record["days"]
-                
-                # Only deduct if it's a type that has a balance
-                if leave_type in EMPLOYEE_DB[employee_id]["leave_balance"]:
-                    # Check if there's enough balance
-                    if EMPLOYEE_DB[employee_id]["leave_balance"][leave_type] >= days:
-                        EMPLOYEE_DB[employee_id]["leave_balance"][leave_type] -= days
-                        return f"Leave request {request_id} status updated from '{old_status}' to '{new_status}'. {days} days deducted from {leave_type} leave balance."
-                    else:
-                        return f"Warning: Insufficient balance for {leave_type} leave. Status updated but balance not adjusted. Please review."
-                
-                return f"Leave request {request_id} status updated from '{old_status}' to '{new_status}'."
-            
-            # If changing from approved to another status, restore the balance
-            if old_status == "approved" and new_status != "approved":
-                leave_type = record["type"]
-                days = record["days"]
-                
-                # Only add back if it's a type that has a balance
-                if leave_type in EMPLOYEE_DB[employee_id]["leave_balance"]:
-                    EMPLOYEE_DB[employee_id]["leave_balance"][leave_type] += days
-                    return f"Leave request {request_id} status updated from '{old_status}' to '{new_status}'. {days} days restored to {leave_type} leave balance."
-            
-            return f"Leave request {request_id} status updated from '{old_status}' to '{new_status}'."
-    
-    return f"No leave request with ID {request_id} found for employee {employee_id}."
+    store = get_store()
+    if not store.employee_exists(employee_id):
+        return _employee_not_found(employee_id)
+    
+    # Update the status and the balance together
+    result = store.change_leave_status(employee_id, request_id, new_status)
+    tool_cache.invalidate(employee_id)
+    if result is None:
+        return error(f"No leave request with ID {request_id} found for employee {employee_id}.")
+    
+    return ToolResult("status_update", {
+        "old_status": result["old_status"],
+        "type": result["type"],
+        "days": result["days"],
+        "balance_change": result["balance_change"],
+    }, display={"request_id": request_id, "new_status": new_status})
 
-def check_and_process_leave(employee_id: str, leave_type: str, start_date: str, end_date: str, reason: str = "") -> str:
+def check_and_process_leave(employee_id: str, leave_type: str, start_date: str, end_date: str, reason: str = "") -> ToolResult:
     """
     Check leave balance, process the leave request, and update the database accordingly.
     
@@ -196,76 +297,56 @@ def check_and_process_leave(employee_id: str, leave_type: str, start_date: str,
         reason: The reason for the leave request (optional)
     
     Returns:
-        A message indicating the result of the leave request processing
+        The request ID and status, the balance, and any overlapping leave
     """
-    if employee_id not in EMPLOYEE_DB:
-        return f"Employee ID {employee_id} not found."
+    store = get_store()
+    if not store.employee_exists(employee_id):
+        return _employee_not_found(employee_id)
     
     if leave_type.lower() not in LEAVE_TYPES:
-        return f"Invalid leave type. Available types: {', '.join(LEAVE_TYPES)}."
-    
-    try:
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-    except ValueError:
-        return "Invalid date format. Please use YYYY-MM-DD format."
+        return error(f"Invalid leave type. Available types: {', '.join(LEAVE_TYPES)}.")
     
-    if start > end:
-        return "End date must be after start date."
+    parsed = _parse_range(start_date, end_date)
+    if isinstance(parsed, ToolResult):
+        return parsed
+    start, end = parsed
     
-    # Calculate business days
-    delta = end - start
-    days = delta.days + 1
+    # Calculate business days; weekends and company holidays are not charged
+    days = leave_days(start, end)
+    if days == 0:
+        return error(NO_WORKING_DAYS)
     
     leave_type = leave_type.lower()
-    name = EMPLOYEE_DB[employee_id]["name"]
-    
-    # First, check the balance
-    balance_info = ""
-    has_sufficient_balance = True
-    auto_approve = False
-    
-    if leave_type in EMPLOYEE_DB[employee_id]["leave_balance"]:
-        current_balance = EMPLOYEE_DB[employee_id]["leave_balance"][leave_type]
-        balance_info = f"Current {leave_type} leave balance: {current_balance} days."
-        
-        if current_balance >= days:
-            has_sufficient_balance = True
-            auto_approve = True
-            balance_info += f" You have sufficient balance for this {days}-day request."
-        else:
-            has_sufficient_balance = False
-            balance_info += f" You have insufficient balance for this {days}-day request."
-    
-    # Now process the leave request
-    request_id = f"REQ{len(EMPLOYEE_DB[employee_id]['leave_history']) + 1}"
-    
-    if auto_approve:
-        status = "approved"
-        # Deduct from balance
-        if leave_type in EMPLOYEE_DB[employee_id]["leave_balance"]:
-            EMPLOYEE_DB[employee_id]["leave_balance"][leave_type] -= days
-        
-        approval_msg = f"Leave request automatically approved! Request ID: {request_id}."
-    else:
-        status = "pending manager approval"
-        approval_msg = f"Your leave request has been submitted (Request ID: {request_id}). Status: {status}. You will be notified once your manager reviews it."
     
-    # Add to history
-    EMPLOYEE_DB[employee_id]["leave_history"].append({
-        "request_id": request_id,
-        "type": leave_type,
-        "start_date": start_date,
-        "end_date": end_date,
-        "days": days,
-        "reason": reason,
-        "status": status
-    })
-    
-    # Return a comprehensive message
-    return f"{balance_info}\n{approval_msg}"
+    # Overlapping approved or pending leave is refused (or flagged, see
+    # leave_intervals.OVERLAP_POLICY); the employee's lock keeps a concurrent
+    # request from slipping in between the check and the submission
+    from leave_intervals import OVERLAP_POLICY, get_interval_index
+    intervals = get_interval_index()
+    with intervals.employee_lock(employee_id):
+        conflicts = intervals.overlapping(employee_id, start_date, end_date)
+        if conflicts and OVERLAP_POLICY == "reject":
+            return ToolResult("overlap", {"overlaps": _overlaps(conflicts)})
+        # Check the balance, deduct it and store the request in one atomic step
+        result = store.submit_leave(employee_id, {
+            "type": leave_type,
+            "start_date": start_date,
+            "end_date": end_date,
+            "days": days,
+            "reason": reason
+        })
+    tool_cache.invalidate(employee_id)
+    
+    data = {"request_id": result["request_id"], "status": result["status"], "days": days}
+    # The balance before this request; types without a balance (maternity, ...) have none
+    if result["balance"] is not None:
+        data["balance_before"] = result["balance"]
+    if conflicts:
+        data["overlaps"] = _overlaps(conflicts)
+    return ToolResult("leave_processed", data,
+                      display={"type": leave_type, "start_date": start_date, "end_date": end_date})
 
-def parse_nlp_leave_request(employee_id: str, prompt: str) -> str:
+def parse_nlp_leave_request(employee_id: str, prompt: str) -> ToolResult:
     """
     Parses a natural language leave request to extract details and submit it. 
     Use this when a user asks to take time off.
@@ -273,7 +354,7 @@ def parse_nlp_leave_request(employee_id: str, prompt: str) -> str:
         employee_id: The ID of the employee requesting leave.
         prompt: The user's natural language request (e.g., 'I need sick leave tomorrow').
     Returns:
-        A message indicating success, failure, or if more information is needed.
+        The outcome of the request, or which details are missing.
     """
     details = extract_leave_details(prompt)
     
@@ -284,7 +365,7 @@ def parse_nlp_leave_request(employee_id: str, prompt: str) -> str:
         missing_info.append("start date")
     
     if missing_info:
-        return f"I need more information to process your leave request. Please provide: {', '.join(missing_info)}."
+        return ToolResult("needs_info", {"missing": missing_info})
     
     # If end date wasn't specified, use start date
     if not details["end_date"]:
@@ -297,4 +378,16 @@ def parse_nlp_leave_request(employee_id: str, prompt: str) -> str:
         details["start_date"],
         details["end_date"],
         details["reason"] or "No reason provided"
-    )
\ No newline at end of file
+    )
+
+# --- Async support ---
+async def run_tool_async(func, *args, **kwargs):
+    """
+    Run a tool (or store helper) from async code without stalling the event loop.
+
+    Stores that can block (SQLite) are called from a worker thread; the in-memory
+    store answers in microseconds, so it is called inline to skip the thread hop.
+    """
+    if get_store().blocking:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return func(*args, **kwargs)
@@ -0,0 +1,205 @@
+# llm_cache.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage, message_to_dict, messages_from_dict
+
+# --- LLM response cache ---
+# Opt-in cache in front of the agent's LLM call. Keys cover the static prompt
+# prefix (system prompt, tool schemas, model), the date and the conversation
+# messages. Each lookup tries an exact key first, then a key with normalized
+# user text ("What is the sick leave policy?" == "what is the sick leave policy").
+#
+# Responses are shared between employees only when nothing personal is
+# involved. A response is scoped to one employee if the conversation contains
+# tool calls or tool results, if the response calls a tool (tool arguments
+# carry the employee ID), or if it mentions the employee's name or ID.
+#
+# Enable with LLM_CACHE_BACKEND=memory or LLM_CACHE_BACKEND=sqlite
+# (LLM_CACHE_PATH sets the database file, LLM_CACHE_MAX_ENTRIES the size).
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_SQLITE_PATH = "llm_cache.db"
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", text.lower().strip()))
+
+
+def _serialize(messages: Sequence[BaseMessage], normalize: bool) -> str:
+    parts = []
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        if normalize and isinstance(message, HumanMessage):
+            content = normalize_text(content)
+        tool_calls = getattr(message, "tool_calls", None) or []
+        parts.append([message.type, content, [[c["name"], c["args"]] for c in tool_calls]])
+    return json.dumps(parts, sort_keys=True, separators=(",", ":"))
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """LRU dict of serialized responses."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """SQLite table of serialized responses, evicting the least recently used rows."""
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn().execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO llm_cache (key, value, last_used) VALUES (?, ?, ?)",
+                     (key, value, time.time()))
+        excess = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute("DELETE FROM llm_cache WHERE key IN "
+                         "(SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)", (excess,))
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class LLMResponseCache:
+    """Looks up and stores agent responses; see the module comment for the key and scoping rules."""
+
+    def __init__(self, backend, prefix_parts: Sequence[Any]):
+        self.backend = backend
+        # Anything that changes the request besides the messages: system prompt, tool schemas, model
+        self.prefix = _digest(json.dumps(list(prefix_parts), sort_keys=True, default=str))
+        self._lock = threading.Lock()
+        self.counters = {"exact_hits": 0, "normalized_hits": 0, "misses": 0, "stores": 0, "scoped_stores": 0}
+        self.miss_seconds = 0.0
+        self.hit_seconds = 0.0
+
+    def _keys(self, messages: Sequence[BaseMessage], scope: str, current_date: str) -> List[str]:
+        exact = _serialize(messages, normalize=False)
+        normalized = _serialize(messages, normalize=True)
+        return [_digest(self.prefix, current_date, scope, exact), _digest(self.prefix, current_date, scope, normalized)]
+
+    def lookup(self, messages: Sequence[BaseMessage], employee_id: str, current_date: str) -> Optional[AIMessage]:
+        start = time.perf_counter()
+        for scope in ("*", employee_id):
+            for kind, key in zip(("exact_hits", "normalized_hits"), self._keys(messages, scope, current_date)):
+                value = self.backend.get(key)
+                if value is not None:
+                    message = messages_from_dict([json.loads(value)])[0]
+                    # A fresh ID, otherwise add_messages would treat it as an update of the cached message
+                    message.id = None
+                    with self._lock:
+                        self.counters[kind] += 1
+                        self.hit_seconds += time.perf_counter() - start
+                    return message
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def store(self, messages: Sequence[BaseMessage], employee_id: str, employee_name: Optional[str],
+              current_date: str, response: AIMessage, seconds: float) -> None:
+        """Save a response; seconds is how long the LLM call took (for the latency-saved estimate)."""
+        personal = (
+            any(isinstance(m, ToolMessage) or getattr(m, "tool_calls", None) for m in messages)
+            or bool(response.tool_calls)
+            or employee_id in str(response.content)
+            or bool(employee_name and employee_name.split()[0] in str(response.content))
+        )
+        scope = employee_id if personal else "*"
+        value = json.dumps(message_to_dict(response))
+        for key in self._keys(messages, scope, current_date):
+            self.backend.set(key, value)
+        with self._lock:
+            self.counters["stores"] += 1
+            self.counters["scoped_stores"] += personal
+            self.miss_seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts, hit rate and estimated seconds saved (average LLM latency per hit)."""
+        with self._lock:
+            hits = self.counters["exact_hits"] + self.counters["normalized_hits"]
+            lookups = hits + self.counters["misses"]
+            avg_llm = self.miss_seconds / self.counters["stores"] if self.counters["stores"] else 0.0
+            return {
+                **self.counters,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "entries": len(self.backend),
+                "avg_llm_seconds": avg_llm,
+                "latency_saved_s": max(hits * avg_llm - self.hit_seconds, 0.0),
+            }
+
+
+def create_llm_cache_from_env(prefix_parts: Union[Sequence[Any], Callable[[], Sequence[Any]]]) -> Optional[LLMResponseCache]:
+    """
+    Build the cache configured by LLM_CACHE_BACKEND, or None when caching is off.
+
+    prefix_parts may be a callable, so an expensive prefix (the bound tool schemas)
+    is only computed when a cache is actually configured.
+    """
+    backend_name = os.getenv("LLM_CACHE_BACKEND", "").lower()
+    max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    if backend_name == "memory":
+        backend = MemoryCacheBackend(max_entries)
+    elif backend_name == "sqlite":
+        backend = SQLiteCacheBackend(os.getenv("LLM_CACHE_PATH", DEFAULT_SQLITE_PATH), max_entries)
+    else:
+        return None
+    return LLMResponseCache(backend, prefix_parts() if callable(prefix_parts) else prefix_parts)
@@ -0,0 +1,354 @@
+# model_router.py
+import inspect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.runnables.config import ensure_config, merge_configs
+
+from intent_router import classify_intent
+from tool_selection import ToolSelector, tool_hints
+from tracing import annotate, token_usage
+from turn_budget import BudgetExceeded, CallBudget
+
+# --- Tiered model routing ---
+# Most agent turns are one-tool lookups that a small model handles as well as
+# gpt-4o, faster and for a fraction of the price. score_turn() rates a turn's
+# complexity from 0 to 1 (intent, how many tools it likely needs, whether it
+# writes, how long the conversation is), and the ModelRouter sends it to the
+# first tier of a ladder whose max_score covers it; the last tier takes the rest.
+#
+# The ladder comes from LEAVE_MODEL_LADDER as "model:max_score,...,model",
+# cheapest first (default DEFAULT_LADDER). A response with malformed tool calls
+# (unparsable arguments, an unknown tool, missing required arguments) or an
+# empty one is retried one tier up, and the rest of the turn stays on the tier
+# that answered: each response records its tier in response_metadata
+# ("model_tier"), and later calls in the turn start from the highest one.
+#
+# Attempts on a tier below the last may still be rejected, so their config
+# carries ESCALABLE_METADATA: stream_message holds their tokens back until the
+# router accepts the answer, and drops those of rejected attempts.
+#
+# ModelRouterStats keeps calls, latency, tokens and escalations per tier. The
+# tier runnables are built by a factory, once per tier and bound tool subset
+# (see tool_selection.py), so tests and benchmarks can put fake chat models on
+# the ladder.
+
+DEFAULT_LADDER = "gpt-4o-mini:0.4,gpt-4o"
+# Run metadata key set on attempts whose answer may still be escalated
+ESCALABLE_METADATA = "model_escalable"
+# Conversation length (messages sent to the model) from which a turn counts as long
+LONG_CONVERSATION_MESSAGES = 12
+LONG_MESSAGE_WORDS = 40
+
+# Hint groups (tool_selection.TOOL_HINTS) of turns that submit or change leave
+WRITE_HINTS = ("request", "status")
+
+# Score contributions
+OPEN_ENDED_SCORE = 0.2      # no confident intent match
+EXTRA_TOOL_SCORE = 0.25     # per likely tool beyond the first, up to 2
+WRITE_SCORE = 0.25          # the turn submits or changes leave
+TEAM_SCORE = 0.15           # reasoning over team-wide results
+LONG_CONVERSATION_SCORE = 0.1
+LONG_MESSAGE_SCORE = 0.1
+
+
+class TurnScore(NamedTuple):
+    score: float
+    intent: Optional[str]
+    tools: Tuple[str, ...]
+    messages: int
+
+
+def score_turn(messages: Sequence[BaseMessage]) -> TurnScore:
+    """
+    Complexity of the current turn, from 0 (one simple lookup) to 1.
+
+    Args:
+        messages: The conversation as sent to the model; the turn is the last
+            user message and what followed it
+
+    Returns:
+        The score with the intent, the likely tools and the message count behind it
+    """
+    last_human = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+    text = last_human.content.lower() if last_human is not None and isinstance(last_human.content, str) else ""
+    intent, confidence = classify_intent(text)
+    tools = tool_hints(text)
+
+    score = 0.0 if intent is not None and confidence >= 0.5 else OPEN_ENDED_SCORE
+    score += EXTRA_TOOL_SCORE * min(max(len(tools) - 1, 0), 2)
+    if any(name in tools for name in WRITE_HINTS):
+        score += WRITE_SCORE
+    if "team" in tools:
+        score += TEAM_SCORE
+    if len(messages) > LONG_CONVERSATION_MESSAGES:
+        score += LONG_CONVERSATION_SCORE
+    if len(text.split()) > LONG_MESSAGE_WORDS:
+        score += LONG_MESSAGE_SCORE
+    return TurnScore(min(score, 1.0), intent, tools, len(messages))
+
+
+class ModelTier(NamedTuple):
+    name: str
+    model: str
+    max_score: float = 1.0
+
+
+def parse_ladder(spec: str) -> List[ModelTier]:
+    """Tiers from "model:max_score,...,model" (cheapest first); the last tier takes every score."""
+    tiers = []
+    parts = [part.strip() for part in spec.split(",") if part.strip()]
+    for number, part in enumerate(parts):
+        model, _, max_score = part.partition(":")
+        last = number == len(parts) - 1
+        tiers.append(ModelTier(model, model, 1.0 if last or not max_score else float(max_score)))
+    if not tiers:
+        raise ValueError("LEAVE_MODEL_LADDER names no models")
+    return tiers
+
+
+def load_ladder() -> List[ModelTier]:
+    return parse_ladder(os.getenv("LEAVE_MODEL_LADDER", DEFAULT_LADDER))
+
+
+def malformed_reason(response: AIMessage, required_args: Optional[Dict[str, Sequence[str]]] = None) -> Optional[str]:
+    """
+    Why a response can't be used as is, or None if it can.
+
+    Args:
+        response: The model's answer
+        required_args: Required argument names per tool; when given, calls to
+            other tools or without a required argument are malformed
+    """
+    if getattr(response, "invalid_tool_calls", None):
+        return "invalid_tool_call"
+    if required_args is not None:
+        for call in response.tool_calls:
+            if call["name"] not in required_args:
+                return "unknown_tool"
+            if any(arg not in call["args"] for arg in required_args[call["name"]]):
+                return "missing_argument"
+    if not response.tool_calls and not (response.content.strip() if isinstance(response.content, str) else response.content):
+        return "empty_response"
+    return None
+
+
+def required_arguments(tools: Sequence[Callable]) -> Dict[str, Tuple[str, ...]]:
+    """Required parameter names of each tool function."""
+    return {
+        tool.__name__: tuple(name for name, parameter in inspect.signature(tool).parameters.items()
+                             if parameter.default is inspect.Parameter.empty)
+        for tool in tools
+    }
+
+
+class ModelRouterStats:
+    """Calls, latency, tokens and escalations per tier."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tiers: Dict[str, Dict[str, float]] = {}
+        self.reasons: Dict[str, int] = {}
+
+    def _entry(self, tier: str) -> Dict[str, float]:
+        return self.tiers.setdefault(tier, {"calls": 0, "routed": 0, "escalated": 0, "seconds": 0.0,
+                                            "input_tokens": 0, "output_tokens": 0})
+
+    def record_route(self, tier: str) -> None:
+        """A turn's call started on this tier."""
+        with self._lock:
+            self._entry(tier)["routed"] += 1
+
+    def record_call(self, tier: str, seconds: float, usage: Dict[str, int]) -> None:
+        with self._lock:
+            entry = self._entry(tier)
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["input_tokens"] += usage.get("input_tokens", 0)
+            entry["output_tokens"] += usage.get("output_tokens", 0)
+
+    def record_escalation(self, tier: str, reason: str) -> None:
+        """The tier's answer was rejected (reason) and the call went one tier up."""
+        with self._lock:
+            self._entry(tier)["escalated"] += 1
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per tier: calls, share of first choices, escalation rate, mean latency and tokens."""
+        with self._lock:
+            routed = sum(entry["routed"] for entry in self.tiers.values())
+            report = {}
+            for tier, entry in self.tiers.items():
+                calls = entry["calls"]
+                report[tier] = {
+                    "calls": calls,
+                    "routed_share": entry["routed"] / routed if routed else 0.0,
+                    "escalations": entry["escalated"],
+                    "escalation_rate": entry["escalated"] / calls if calls else 0.0,
+                    "avg_latency_ms": entry["seconds"] / calls * 1000 if calls else 0.0,
+                    "input_tokens": entry["input_tokens"],
+                    "output_tokens": entry["output_tokens"],
+                    "tokens_per_call": (entry["input_tokens"] + entry["output_tokens"]) / calls if calls else 0.0,
+                }
+            return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self.tiers.clear()
+            self.reasons.clear()
+
+
+model_router_stats = ModelRouterStats()
+
+
+class ModelRouter:
+    """
+    Sends each agent call to a tier of the ladder and escalates bad answers.
+
+    invoke()/ainvoke() take the agent prompt's inputs like the prompt | LLM
+    runnable they replace. The response's response_metadata records the tier
+    ("model_tier") and the attempts it took ("model_calls").
+    """
+
+    def __init__(self, ladder: Sequence[ModelTier], build: Callable[[ModelTier, Sequence[Callable]], Any],
+                 tools: Optional[Sequence[Callable]] = None, stats: Optional[ModelRouterStats] = None,
+                 selector: Optional[ToolSelector] = None):
+        """
+        Args:
+            ladder: Tiers, cheapest first
+            build: Returns the prompt | LLM runnable of a tier with the given tools bound
+            tools: The agent's tool functions, to bind and check tool calls against
+            stats: Where to record calls (default: model_router_stats)
+            selector: Picks the tools to bind per turn (default: bind every tool)
+        """
+        if not ladder:
+            raise ValueError("the model ladder needs at least one tier")
+        self.ladder = list(ladder)
+        self.build = build
+        self.tools = list(tools) if tools is not None else []
+        self.required_args = required_arguments(tools) if tools is not None else None
+        self.stats = stats if stats is not None else model_router_stats
+        self.selector = selector
+        self._all_tools = tuple(tool.__name__ for tool in self.tools)
+        self._positions = {tier.name: position for position, tier in enumerate(self.ladder)}
+        # Pre-bound runnables per (tier, tool subset); every tool is bound up front
+        self._runnables: Dict[Tuple[str, Tuple[str, ...]], Any] = {}
+        self._lock = threading.Lock()
+        for position in range(len(self.ladder)):
+            self._runnable(position, self._all_tools)
+
+    @classmethod
+    def single(cls, runnable: Any, name: str = "default") -> "ModelRouter":
+        """A one-tier router around an existing runnable (no scoring, no escalation, no tool selection)."""
+        return cls([ModelTier(name, name)], lambda tier, tools: runnable)
+
+    def _runnable(self, position: int, names: Tuple[str, ...]) -> Any:
+        tier = self.ladder[position]
+        runnable = self._runnables.get((tier.name, names))
+        if runnable is None:
+            with self._lock:
+                runnable = self._runnables.get((tier.name, names))
+                if runnable is None:
+                    by_name = {tool.__name__: tool for tool in self.tools}
+                    runnable = self._runnables[(tier.name, names)] = self.build(tier, [by_name[name] for name in names])
+        return runnable
+
+    def select(self, messages: Sequence[BaseMessage]) -> Tuple[int, TurnScore]:
+        """Position of the tier for the next call, and the turn's score."""
+        score = score_turn(messages)
+        position = next((number for number, tier in enumerate(self.ladder) if score.score <= tier.max_score),
+                        len(self.ladder) - 1)
+        # Stay on the highest tier the turn has used so far
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, AIMessage):
+                position = max(position, self._positions.get(message.response_metadata.get("model_tier"), 0))
+        return position, score
+
+    def _route(self, inputs: Dict[str, Any]) -> Tuple[int, Tuple[str, ...]]:
+        position, score = self.select(inputs["messages"])
+        names = self.selector.select(inputs["messages"]) if self.selector is not None else self._all_tools
+        self.stats.record_route(self.ladder[position].name)
+        annotate(complexity=round(score.score, 2), tools_bound=len(names))
+        return position, names
+
+    def _accept(self, position: int, names: Tuple[str, ...], response: AIMessage, seconds: float,
+                calls: int) -> bool:
+        """Record the call (the turn's calls-th attempt); False if the answer is escalated to the next tier."""
+        tier = self.ladder[position]
+        self.stats.record_call(tier.name, seconds, token_usage(response))
+        required_args = self.required_args
+        if required_args is not None and self.selector is not None:
+            if any(call["name"] not in names for call in response.tool_calls):
+                self.selector.stats.record_unbound_call()
+            required_args = {name: required_args[name] for name in names}
+        reason = malformed_reason(response, required_args)
+        if reason is not None and position < len(self.ladder) - 1:
+            self.stats.record_escalation(tier.name, reason)
+            return False
+        response.response_metadata["model_tier"] = tier.name
+        response.response_metadata["model_calls"] = calls
+        annotate(model=tier.model, model_tier=tier.name)
+        return True
+
+    def _config(self, position: int, config: Any) -> Any:
+        """The config of an attempt on the tier at position, tagged if its answer may still be escalated."""
+        if position == len(self.ladder) - 1:
+            return config
+        # Merged into the surrounding run's config, which keeps its metadata (e.g. langgraph_node)
+        return merge_configs(ensure_config(config), {"metadata": {ESCALABLE_METADATA: True}})
+
+    def _escalate_error(self, position: int, error: Exception) -> None:
+        # A failing cheaper model (rate limit, outage) hands over to the next tier
+        if position == len(self.ladder) - 1:
+            raise error
+        self.stats.record_escalation(self.ladder[position].name, "error")
+
+    def invoke(self, inputs: Dict[str, Any], config: Any = None, cancel: Optional[threading.Event] = None,
+               budget: Optional[CallBudget] = None) -> AIMessage:
+        """
+        Args:
+            inputs: The agent prompt's variables
+            config: Runnable config passed to the tier runnables
+            cancel: Set when the turn's deadline passed; no further attempts are made
+            budget: The model calls left in the turn; an attempt past it raises BudgetExceeded("llm_calls")
+        """
+        position, names = self._route(inputs)
+        calls = 0
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise BudgetExceeded("deadline")
+            if budget is not None:
+                budget.start()
+            calls += 1
+            start = time.perf_counter()
+            try:
+                response = self._runnable(position, names).invoke(inputs, self._config(position, config))
+            except Exception as error:
+                self._escalate_error(position, error)
+            else:
+                if self._accept(position, names, response, time.perf_counter() - start, calls):
+                    return response
+            position += 1
+
+    async def ainvoke(self, inputs: Dict[str, Any], config: Any = None,
+                      budget: Optional[CallBudget] = None) -> AIMessage:
+        position, names = self._route(inputs)
+        calls = 0
+        while True:
+            if budget is not None:
+                budget.start()
+            calls += 1
+            start = time.perf_counter()
+            try:
+                response = await self._runnable(position, names).ainvoke(inputs, self._config(position, config))
+            except Exception as error:
+                self._escalate_error(position, error)
+            else:
+                if self._accept(position, names, response, time.perf_counter() - start, calls):
+                    return response
+            position += 1
@@ -0,0 +1,74 @@
+# pages/1_Leave_Analytics.py
+from datetime import date
+
+import streamlit as st
+
+from leave_analytics import get_analytics, pool_sensitive_types
+from leave_data import SENSITIVE_LEAVE_TYPES
+from leave_store import get_store
+
+# Configure the page
+st.set_page_config(page_title="Leave Analytics", page_icon="📊", layout="wide")
+
+st.title("📊 Leave Analytics")
+
+# Streamlit shares session state between pages, so the login on the main page applies here
+if not st.session_state.get("authenticated"):
+    st.info("Please log in on the main page to view leave analytics.")
+    st.stop()
+
+# The columnar view is built on the first report and kept current after that
+with st.spinner("Loading leave data..."):
+    analytics = get_analytics()
+    analytics.refresh()
+
+with st.sidebar:
+    st.subheader("📅 Report Options")
+    year = st.number_input("Year", min_value=2000, max_value=2100, value=date.today().year, step=1)
+    days_ahead = st.slider("Upcoming absences (days ahead)", min_value=7, max_value=180, value=30, step=7)
+    months = st.slider("Trend (months)", min_value=3, max_value=36, value=12, step=3)
+
+# Only managers see who is away and the sensitive leave types; everyone else
+# gets counts, with sick, bereavement, ... pooled into "leave"
+manager = get_store().is_manager(st.session_state.employee_id)
+utilization = analytics.utilization(int(year))
+balances = analytics.balance_summary()
+trend = analytics.monthly_trend(months)
+if not manager:
+    utilization = pool_sensitive_types(utilization)
+    balances = balances[~balances.index.isin(SENSITIVE_LEAVE_TYPES)]
+    trend = pool_sensitive_types(trend, columns=True)
+absent = analytics.absence_count(days_ahead)
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Employees", f"{analytics.employee_count():,}")
+col2.metric(f"Days taken in {year}", f"{int(utilization['taken'].sum()):,}")
+col3.metric("Days pending approval", f"{int(utilization['pending'].sum()):,}")
+col4.metric("Away today", f"{int(absent.iloc[0]):,}")
+
+st.divider()
+st.subheader("📈 Utilization")
+col1, col2 = st.columns([3, 2])
+with col1:
+    st.dataframe(utilization.assign(utilization=(utilization["utilization"] * 100).round(1))
+                 .rename(columns={"utilization": "utilization %"}), use_container_width=True)
+with col2:
+    st.bar_chart(utilization["utilization"].dropna())
+
+st.subheader("💼 Remaining Balances")
+st.dataframe(balances.round(1), use_container_width=True)
+
+st.divider()
+st.subheader("🏖️ Upcoming Absences")
+st.line_chart(absent)
+absences = analytics.upcoming_absences(days_ahead)
+st.caption(f"{len(absences):,} approved or pending absences in the next {days_ahead} days")
+if manager:
+    st.dataframe(absences, use_container_width=True, hide_index=True)
+else:
+    st.caption("Only managers can see who is away.")
+
+st.divider()
+st.subheader("🗓️ Monthly Trend")
+trend.index = trend.index.astype(str)
+st.bar_chart(trend)
@@ -0,0 +1,178 @@
+# policy_search.py
+import glob
+import heapq
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from leave_data import LEAVE_POLICIES
+
+# --- Policy search ---
+# get_leave_policy() without a leave type returns every policy, and the model
+# reads all of it to answer one question; with a full employee handbook that
+# cost grows with the handbook. This module splits the policy documents into
+# passages and ranks them for a question with BM25, so the search tool returns
+# only the few passages that answer it.
+#
+# The corpus is LEAVE_POLICIES plus every .md/.txt file under
+# LEAVE_POLICY_DIR (if set). Documents are split at blank lines and Markdown
+# headings, and long paragraphs into windows of PASSAGE_WORDS words; each
+# passage keeps its document title and section heading.
+#
+# The index is an inverted index (term -> passages and their BM25 score for
+# the term) built once, on first use; a query sums the postings of its own
+# terms with np.bincount and picks the top k with argpartition.
+# Passages far below the best match are dropped (MIN_RELATIVE_SCORE).
+
+PASSAGE_WORDS = 120
+DEFAULT_TOP_K = 3
+# Passages scoring below this fraction of the best one are left out; they
+# usually share only a common word ("days", "leave") with the question
+MIN_RELATIVE_SCORE = 0.25
+# BM25 parameters (the usual defaults)
+K1 = 1.5
+B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_HEADING = re.compile(r"^#{1,6}\s+(.*)$")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it its me my of on or our "
+    "the their there this to was we what when where which who will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords; a trailing plural "s" is dropped."""
+    return [token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+            for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def split_passages(title: str, text: str, max_words: int = PASSAGE_WORDS) -> List[Dict[str, str]]:
+    """Passages of a document: paragraphs (long ones windowed), each with the section heading above it."""
+    passages = []
+    section = ""
+    for block in re.split(r"\n\s*\n", text):
+        lines = []
+        for line in block.strip().splitlines():
+            heading = _HEADING.match(line.strip())
+            if heading:
+                section = heading.group(1).strip()
+            else:
+                lines.append(line.strip())
+        words = " ".join(lines).split()
+        for first in range(0, len(words), max_words):
+            passages.append({"title": title, "section": section, "text": " ".join(words[first:first + max_words])})
+    return passages
+
+
+def load_documents(directory: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(title, text) of the built-in policies and of the handbook files in directory."""
+    documents = [(f"{leave_type.capitalize()} Leave Policy", policy) for leave_type, policy in LEAVE_POLICIES.items()]
+    directory = directory if directory is not None else os.getenv("LEAVE_POLICY_DIR")
+    if directory:
+        for path in sorted(glob.glob(os.path.join(directory, "**", "*.md"), recursive=True) +
+                           glob.glob(os.path.join(directory, "**", "*.txt"), recursive=True)):
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            heading = _HEADING.match(text.lstrip().split("\n", 1)[0])
+            title = heading.group(1).strip() if heading else os.path.splitext(os.path.basename(path))[0]
+            documents.append((title, text))
+    return documents
+
+
+class PolicyIndex:
+    """BM25 index over policy passages."""
+
+    def __init__(self, documents: Iterable[Tuple[str, str]], max_words: int = PASSAGE_WORDS):
+        self.passages: List[Dict[str, str]] = []
+        for title, text in documents:
+            self.passages.extend(split_passages(title, text, max_words))
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for number, passage in enumerate(self.passages):
+            # Title and heading words count as part of the passage
+            terms = Counter(tokenize(f"{passage['title']} {passage['section']} {passage['text']}"))
+            lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                postings.setdefault(term, []).append((number, frequency))
+        count = len(self.passages)
+        lengths = np.array(lengths, dtype=np.float64)
+        norms = K1 * (1 - B + B * lengths / lengths.mean()) if count else lengths
+        # Each posting stores its finished BM25 term score (its "impact"), so a
+        # query is a sum of precomputed arrays
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, entries in postings.items():
+            numbers, frequencies = np.array(entries, dtype=np.int64).T
+            idf = math.log(1 + (count - len(entries) + 0.5) / (len(entries) + 0.5))
+            self._postings[term] = (numbers.astype(np.int32),
+                                    (idf * frequencies * (K1 + 1) / (frequencies + norms[numbers])).astype(np.float32))
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K,
+               min_relative_score: float = MIN_RELATIVE_SCORE) -> List[Tuple[float, Dict[str, str]]]:
+        """
+        The passages that best match the query.
+
+        Args:
+            query: Free-text question or keywords
+            top_k: Number of passages to return at most
+            min_relative_score: Drop passages scoring below this fraction of the best
+
+        Returns:
+            (score, passage) pairs, best first; passages have title, section and
+            text. Passages sharing no term with the query are left out.
+        """
+        matched = [self._postings[term] for term in set(tokenize(query)) if term in self._postings]
+        if not matched or top_k < 1:
+            return []
+        numbers = np.concatenate([numbers for numbers, _ in matched])
+        scores = np.bincount(numbers, weights=np.concatenate([impacts for _, impacts in matched]),
+                             minlength=len(self.passages))
+        # BM25 impacts are positive, so the matching passages are the nonzero scores
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        # Best first; ties go to the earlier passage
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        best = float(scores[candidates[0]])
+        return [(float(scores[number]), self.passages[number]) for number in candidates.tolist()
+                if scores[number] >= best * min_relative_score]
+
+
+def passage_source(passage: Dict[str, str]) -> str:
+    """"Document > Section" (or just the document title) of a passage."""
+    return f"{passage['title']} > {passage['section']}" if passage["section"] else passage["title"]
+
+
+def format_passages(query: str, results: List[Tuple[float, Dict[str, str]]]) -> str:
+    """The passages as text, the way the search tool's result reads to a person."""
+    if not results:
+        return f"No policy passages match \"{query}\"."
+    response = ""
+    for _, passage in results:
+        response += f"[{passage_source(passage)}]\n{passage['text']}\n\n"
+    return response.rstrip() + "\n"
+
+
+# --- Process-wide index ---
+_index: Optional[PolicyIndex] = None
+_index_lock = threading.Lock()
+
+def get_policy_index() -> PolicyIndex:
+    """Return the policy index, building it from load_documents() on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PolicyIndex(load_documents())
+    return _index
+
+def set_policy_index(index: PolicyIndex) -> None:
+    """Replace the policy index (e.g. after the handbook changed)."""
+    global _index
+    with _index_lock:
+        _index = index
@@ -0,0 +1,71 @@
+# session_store.py
+import asyncio
+import os
+import sqlite3
+from typing import TYPE_CHECKING, Any, AsyncIterator, Optional
+
+if TYPE_CHECKING:
+    # langgraph is imported when the first checkpointer is created, not with this module
+    from langgraph.checkpoint.base import BaseCheckpointSaver, CheckpointTuple
+
+# --- Conversation sessions ---
+# The compiled graph keeps each employee's conversation in a LangGraph
+# checkpointer, keyed by a per-employee thread ID, so a turn only sends the new
+# message. Sessions live in memory by default; set LEAVE_SESSION_DB to a file
+# path to keep them in SQLite, where they survive a Streamlit restart and are
+# shared by every app process.
+
+
+def thread_id_for(employee_id: str) -> str:
+    return f"leave-session:{employee_id}"
+
+
+def session_config(employee_id: str) -> dict:
+    """RunnableConfig selecting the employee's conversation thread."""
+    return {"configurable": {"thread_id": thread_id_for(employee_id)}}
+
+
+def _sqlite_saver_class():
+    # langgraph-checkpoint-sqlite is only needed when LEAVE_SESSION_DB is set
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    class ThreadedSqliteSaver(SqliteSaver):
+        """
+        SqliteSaver that also works under ainvoke/astream.
+
+        SqliteSaver only implements the sync interface; the async methods run
+        the sync ones in a worker thread (the saver serializes access with its
+        own lock), so one checkpointer serves process_message and aprocess_message.
+        """
+
+        async def aget_tuple(self, config) -> Optional["CheckpointTuple"]:
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator["CheckpointTuple"]:
+            items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+            for item in items:
+                yield item
+
+        async def aput(self, config, checkpoint, metadata, new_versions) -> Any:
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+            await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id: str) -> None:
+            await asyncio.to_thread(self.delete_thread, thread_id)
+
+    return ThreadedSqliteSaver
+
+
+def create_checkpointer(path: Optional[str] = None) -> "BaseCheckpointSaver":
+    """SQLite checkpointer for path (or LEAVE_SESSION_DB), otherwise an in-memory one."""
+    path = path or os.getenv("LEAVE_SESSION_DB")
+    if not path:
+        from langgraph.checkpoint.memory import InMemorySaver
+        return InMemorySaver()
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    saver = _sqlite_saver_class()(conn)
+    saver.setup()
+    return saver
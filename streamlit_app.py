@@ -6,11 +6,24 @@ import os
 # Import functions from our modules
 from leave_data import verify_credentials, get_employee_name
 from leave_tools import check_leave_balance, view_leave_history, get_leave_policy, get_holidays, parse_nlp_leave_request
-from leave_graph import process_message
+# Tools return structured results; quick actions show them the way the chat would
+from tool_output import render_markdown
 
 # Configure the page
 st.set_page_config(page_title="HR Leave Management Assistant", page_icon="🗓️", layout="wide")
 
+# The agent (LLM client and compiled graph) is built on first use after login and
+# shared by every session and rerun of this server process
+@st.cache_resource(show_spinner="Starting the assistant...")
+def get_assistant():
+    import leave_graph
+    leave_graph.get_agent_runnable()
+    leave_graph.get_graph()
+    # Index the policy handbook now rather than on the first policy question
+    from policy_search import get_policy_index
+    get_policy_index()
+    return leave_graph
+
 # Initialize session state
 if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
@@ -30,6 +43,8 @@ if "first_login" not in st.session_state:
 # Custom function to reset the conversation
 def reset_conversation():
     st.session_state.messages = []
+    # Also drop the agent's checkpointed conversation so it starts fresh
+    get_assistant().reset_session(st.session_state.employee_id)
     
 # Custom function to handle logout
 def handle_logout():
@@ -86,11 +101,15 @@ if not st.session_state.authenticated:
                 st.session_state.authenticated = True
                 st.session_state.employee_id = employee_id
                 st.session_state.employee_name = employee_name
+                # Pick up the conversation where it was left (it survives app restarts with LEAVE_SESSION_DB)
+                st.session_state.messages = get_assistant().load_history(employee_id)
                 st.session_state.first_login = True
                 st.rerun()
             else:
                 st.error("Invalid credentials. Please try again.")
 else:
+    from history_manager import is_displayed
+
     # Add welcome message if this is the first login
     if st.session_state.first_login:
         greeting_message = f"Hello {st.session_state.employee_name}! 👋 How can I assist you with leave management today?"
@@ -101,6 +120,9 @@ else:
     message_container = st.container()
     with message_container:
         for message in st.session_state.messages:
+            # The history also holds tool calls and results for the agent; only show the chat
+            if not is_displayed(message):
+                continue
             with st.chat_message(message["role"]):
                 st.write(message["content"])
     
@@ -108,26 +130,27 @@ else:
     st.divider()
     st.subheader("🚀 Quick Actions")
     
+    # Quick actions and the leave form call the tools directly; record_exchange also
+    # writes each exchange to the agent's thread so follow-up questions can refer to it
+    def quick_action(user_message, result):
+        get_assistant().record_exchange(st.session_state.employee_id, user_message, result)
+        st.session_state.messages.append({"role": "user", "content": user_message})
+        st.session_state.messages.append({"role": "assistant", "content": render_markdown(result)})
+
     col1, col2, col3 = st.columns(3)
     with col1:
         if st.button("Check Leave Balance", use_container_width=True):
-            result = check_leave_balance(st.session_state.employee_id)
-            st.session_state.messages.append({"role": "user", "content": "Check my leave balance"})
-            st.session_state.messages.append({"role": "assistant", "content": result})
+            quick_action("Check my leave balance", check_leave_balance(st.session_state.employee_id))
             st.rerun()
     
     with col2:
         if st.button("View Leave History", use_container_width=True):
-            result = view_leave_history(st.session_state.employee_id)
-            st.session_state.messages.append({"role": "user", "content": "Show my leave history"})
-            st.session_state.messages.append({"role": "assistant", "content": result})
+            quick_action("Show my leave history", view_leave_history(st.session_state.employee_id))
             st.rerun()
     
     with col3:
         if st.button("View Holidays", use_container_width=True):
-            result = get_holidays()
-            st.session_state.messages.append({"role": "user", "content": "Show upcoming holidays"})
-            st.session_state.messages.append({"role": "assistant", "content": result})
+            quick_action("Show upcoming holidays", get_holidays())
             st.rerun()
     
     # Request Leave form
@@ -157,18 +180,14 @@ else:
             if reason:
                 request_text += f" because {reason}"
                 
-            st.session_state.messages.append({"role": "user", "content": request_text})
-            
             with st.spinner("Processing your request..."):
-                result = parse_nlp_leave_request(st.session_state.employee_id, request_text)
-                st.session_state.messages.append({"role": "assistant", "content": result})
+                quick_action(request_text, parse_nlp_leave_request(st.session_state.employee_id, request_text))
             
             st.rerun()
     
     # Leave Policies section
     with st.expander("View Leave Policies"):
-        policies = get_leave_policy()
-        st.write(policies)
+        st.markdown(render_markdown(get_leave_policy()))
     
     # Chat input - Process with LangGraph
 if prompt := st.chat_input("How can I assist with your leave management needs?"):
@@ -176,23 +195,36 @@ if prompt := st.chat_input("How can I assist with your leave management needs?")
     # or add it and then pass history carefully. Let's add it first.
     st.session_state.messages.append({"role": "user", "content": prompt})
 
-    # Display the latest user message immediately (optional but good UX)
-    # You might need to adjust placement depending on st.rerun behaviour
-    # Consider adding this display logic within the main message loop before chat_input
-
-    with st.spinner("Thinking..."):
-        # Call process_message, passing history *before* the new prompt, and the new prompt itself
-        # Unpack the returned tuple: response text and the new full history
-        response_text, updated_history = process_message(
-            employee_id=st.session_state.employee_id,
-            # Pass the history *before* adding the current user 'prompt'
-            current_messages=st.session_state.messages[:-1], 
-            # Pass the current user input message using the correct variable 'prompt'
-            new_user_message=prompt 
-        )
-        
-        # Update the session state history with the complete history returned by the function
-        st.session_state.messages = updated_history
+    # Display the latest user message immediately
+    with st.chat_message("user"):
+        st.write(prompt)
+
+    # Stream the answer as it is generated instead of waiting for the whole graph run
+    with st.chat_message("assistant"):
+        tool_status = st.empty()
+        final_event = {}
+
+        def response_tokens():
+            # Pass the history *before* adding the current user 'prompt', and the prompt itself
+            for event in get_assistant().stream_message(
+                employee_id=st.session_state.employee_id,
+                displayed_history=st.session_state.messages[:-1],
+                new_user_message=prompt
+            ):
+                if event["type"] == "token":
+                    yield event["content"]
+                elif event["type"] == "tool_start":
+                    tool_status.caption(f"🔧 Running {event['name']}...")
+                elif event["type"] == "tool_end":
+                    tool_status.caption(f"✅ {event['name']} done")
+                elif event["type"] == "done":
+                    final_event.update(event)
+
+        st.write_stream(response_tokens())
+        tool_status.empty()
+
+    # Update the session state history with the complete history returned by the stream
+    st.session_state.messages = final_event["history"]
 
     # Rerun to display the updated message list (which now includes the assistant's response)
-    st.rerun()
\ No newline at end of file
+    st.rerun()
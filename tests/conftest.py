@@ -0,0 +1,44 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-tests")  # never used: every test plays a fake model
+
+import leave_graph
+from benchmarks.fake_llm import ScriptedChatModel
+from benchmarks.scenarios import benchmark_store
+from leave_store import set_store
+from tool_cache import tool_cache
+from turn_budget import TurnBudget, turn_budget_stats
+
+
+@pytest.fixture
+def store():
+    """A fresh in-memory store with employees B00000..B00009."""
+    store = benchmark_store(10)
+    set_store(store)
+    tool_cache.clear()
+    return store
+
+
+@pytest.fixture
+def agent(store):
+    """
+    Returns play(script, budget=None, latency=0.0): puts a ScriptedChatModel
+    with that script behind the agent, with fresh sessions and budget counters.
+    """
+    def play(script, budget=None, latency=0.0, runnable=None):
+        model = ScriptedChatModel(script=script, reply="Is there anything else I can help with?", latency=latency)
+        leave_graph.set_agent_runnable(runnable or leave_graph.agent_prompt | model.bind_tools(leave_graph.tools))
+        leave_graph.set_turn_budget(budget or TurnBudget())
+        leave_graph.set_checkpointer(leave_graph.create_checkpointer())
+        leave_graph.set_llm_cache(None)
+        leave_graph.history_manager.reset()
+        turn_budget_stats.reset()
+        return model
+
+    yield play
+    leave_graph.set_turn_budget(TurnBudget())
@@ -0,0 +1,88 @@
+# tests/test_access_control.py
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+from langchain_core.messages import ToolMessage
+
+import leave_graph
+from leave_analytics import report_result
+from leave_store import SQLiteStore
+from leave_tools import check_and_process_leave, get_leave_analytics, get_team_absences
+from tool_output import records
+
+MANAGER = "M00001"
+
+
+@pytest.fixture
+def team(store):
+    """The store with a manager and some sick and annual leave in the coming weeks."""
+    store.add_employee(MANAGER, "Mia Manager", "mia@company.com", "pw", {"annual": 20}, role="manager")
+    monday = date.today() + timedelta(days=7 - date.today().weekday())
+    check_and_process_leave("B00001", "sick", monday.isoformat(), monday.isoformat(), "Flu")
+    check_and_process_leave("B00002", "annual", monday.isoformat(), (monday + timedelta(days=1)).isoformat(), "Trip")
+    return store, monday.isoformat()
+
+
+def test_roles_are_stored(tmp_path, team):
+    store, _ = team
+    assert store.is_manager(MANAGER) and not store.is_manager("B00001") and not store.is_manager("nobody")
+    sqlite_store = SQLiteStore(str(tmp_path / "leave.db"))
+    sqlite_store.add_employee("E1", "Ann", "ann@company.com", "pw", {"annual": 1}, role="manager")
+    sqlite_store.add_employees([("E2", {"name": "Ben", "email": "ben@company.com", "password": "pw",
+                                        "leave_balance": {}, "leave_history": []})])
+    assert sqlite_store.is_manager("E1") and not sqlite_store.is_manager("E2")
+
+
+def test_databases_without_roles_are_upgraded(tmp_path):
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE employees (employee_id TEXT PRIMARY KEY, name TEXT NOT NULL, "
+                     "email TEXT NOT NULL, password TEXT NOT NULL)")
+        conn.execute("INSERT INTO employees VALUES ('E1', 'Ann', 'ann@company.com', 'pw')")
+    assert SQLiteStore(path).get_employee("E1")["role"] == "employee"
+
+
+def test_only_managers_see_who_is_away(team):
+    _, monday = team
+    listed = get_team_absences(MANAGER, monday)
+    assert {row["name"] for row in records(listed.data["absences"])} == {"Bench User 1", "Bench User 2"}
+
+    counted = get_team_absences("B00003", monday)
+    assert counted.data == {"total": 2}
+    assert "Bench User" not in counted.text and "sick" not in counted.text
+    assert get_team_absences("B00003", monday, leave_type="sick").error
+    assert get_team_absences("nobody", monday).error
+
+
+def test_restricted_reports_pool_sensitive_types(team):
+    upcoming = report_result("upcoming", days_ahead=30, restricted=True)
+    assert upcoming.data["total"] == 2 and "absences" not in upcoming.data
+    assert "Bench User" not in upcoming.text
+
+    summary = report_result("summary", restricted=True)
+    types = [row["type"] for row in records(summary.data["utilization"])]
+    assert "sick" not in types and "leave" in types
+    assert "sick" not in [row["type"] for row in records(summary.data["balances"])]
+
+    trends = report_result("trends", restricted=True)
+    assert "sick" not in trends.data["months"]["columns"]
+    assert report_result("trends", leave_type="sick", restricted=True).error
+
+    assert "absences" in get_leave_analytics(MANAGER, "upcoming").data
+    assert "absences" not in get_leave_analytics("B00003", "upcoming").data
+
+
+@pytest.mark.parametrize("tool, args", [
+    ("get_leave_analytics", {"report": "upcoming"}),
+    ("get_team_absences", {"start_date": "{monday}"}),
+])
+def test_agent_cannot_ask_as_someone_else(agent, team, tool, args):
+    _, monday = team
+    question = "Who else is out in the coming weeks?"
+    args = {"employee_id": MANAGER, **{key: value.format(monday=monday) for key, value in args.items()}}
+    agent({question: [{"tool": tool, "args": args}, {"reply": "Two people."}]})
+    leave_graph.process_message("B00003", [], question)
+    messages = leave_graph.get_graph().get_state(leave_graph.session_config("B00003")).values["messages"]
+    result = next(message for message in messages if isinstance(message, ToolMessage))
+    assert result.artifact["total"] == 2 and "absences" not in result.artifact
@@ -0,0 +1,25 @@
+# tests/test_history_manager.py
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from history_manager import SUMMARY_PREFIX, HistoryManager
+
+
+def conversation(session, turns=3):
+    return [message for turn in range(turns)
+            for message in (HumanMessage(f"{session} question {turn}"), AIMessage(f"{session} answer {turn}"))]
+
+
+def test_summaries_keep_the_most_recent_sessions():
+    manager = HistoryManager(max_turns=1, max_sessions=2)
+    manager.window("a", conversation("a"))
+    manager.window("b", conversation("b"))
+    # Using "a" again makes "b" the least recently used session
+    manager.window("a", conversation("a"))
+    manager.window("c", conversation("c"))
+    assert list(manager._summaries) == ["a", "c"]
+
+    # An evicted session's summary is rebuilt from its messages
+    window = manager.window("b", conversation("b"))
+    assert isinstance(window[0], SystemMessage) and window[0].content.startswith(SUMMARY_PREFIX)
+    assert "b question 1" in window[0].content
+    assert list(manager._summaries) == ["c", "b"]
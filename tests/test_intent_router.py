@@ -0,0 +1,62 @@
+# tests/test_intent_router.py
+from datetime import date
+
+import pytest
+
+import leave_graph
+from intent_router import holiday_query
+
+TODAY = date(2026, 10, 17)
+
+
+@pytest.mark.parametrize("message, query", [
+    ("Show upcoming holidays", {}),
+    ("show us the holidays", {}),
+    ("May I see the holidays?", {}),
+    ("holidays in the UK", {"region": "UK"}),
+    ("holidays in December", {"start_date": "2026-12-01", "end_date": "2026-12-31"}),
+    ("holidays in March", {"start_date": "2027-03-01", "end_date": "2027-03-31"}),
+    ("holidays this month", {"start_date": "2026-10-01", "end_date": "2026-10-31"}),
+    ("UK holidays 2027", {"region": "UK", "start_date": "2027-01-01", "end_date": "2027-12-31"}),
+    ("US holidays in sept 2027", {"region": "US", "start_date": "2027-09-01", "end_date": "2027-09-30"}),
+])
+def test_holiday_questions_become_arguments(message, query):
+    assert holiday_query(message, ["UK", "US"], TODAY) == query
+
+
+@pytest.mark.parametrize("message", [
+    "holidays in Germany", "holidays in the netherlands", "holidays last year", "holidays in uk",
+])
+def test_unreadable_holiday_questions_go_to_the_agent(message):
+    assert holiday_query(message, ["UK", "US"], TODAY) is None
+
+
+def test_router_answers_with_the_region_and_range(agent):
+    model = agent({})
+    answer, _ = leave_graph.process_message("B00001", [], "UK holidays 2024")
+    assert "Boxing Day" in answer and "2024-12-26" in answer and "2025" not in answer
+    assert model.last_messages is None  # answered without the model
+
+    agent({"holidays in Germany": [{"reply": "I only know the UK and US holidays."}]})
+    answer, _ = leave_graph.process_message("B00002", [], "holidays in Germany")
+    assert answer == "I only know the UK and US holidays."
+
+
+def test_questions_about_colleagues_go_to_the_agent(agent, store):
+    store.add_employee("E900", "Carol White", "carol@company.com", "pw", {"annual": 20})
+    store.add_employee("E901", "Bob Jones", "bob@company.com", "pw", {"annual": 12})
+    agent({"What is Carol's leave balance?": [{"reply": "I can only look up your own balance."}],
+           "leave balance of B00002": [{"reply": "I can only look up your own balance."}]})
+    for message in ("What is Carol's leave balance?", "leave balance of B00002"):
+        answer, _ = leave_graph.process_message("B00001", [], message)
+        assert answer == "I can only look up your own balance."
+
+    # Employees added later are known too
+    store.add_employee("E902", "Dana Green", "dana@company.com", "pw", {"annual": 5})
+    agent({"Dana leave balance": [{"reply": "I can only look up your own balance."}]})
+    assert leave_graph.process_message("B00001", [], "Dana leave balance")[0] == "I can only look up your own balance."
+
+    # A user's own name is not someone else, whatever it is
+    model = agent({})
+    answer, _ = leave_graph.process_message("E901", [], "Bob here, what's my leave balance?")
+    assert "12" in answer and model.last_messages is None
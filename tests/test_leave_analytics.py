@@ -0,0 +1,19 @@
+# tests/test_leave_analytics.py
+from datetime import date, timedelta
+
+from leave_analytics import report_result
+
+
+def leave(leave_type, day):
+    return {"type": leave_type, "start_date": day, "end_date": day, "days": 1, "reason": ""}
+
+
+def test_upcoming_peak_counts_the_same_absences_as_the_total(store):
+    # Pending leave of one type on the last day of the window, next to approved annual leave today
+    last = (date.today() + timedelta(days=30)).isoformat()
+    store.submit_leave("B00001", leave("bereavement", last))
+    store.submit_leave("B00002", leave("annual", date.today().isoformat()))
+
+    upcoming = report_result("upcoming", leave_type="bereavement", days_ahead=30)
+    assert upcoming.data["total"] == 1
+    assert (upcoming.data["busiest_day"], upcoming.data["busiest_count"]) == (last, 1)
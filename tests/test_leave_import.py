@@ -0,0 +1,55 @@
+# tests/test_leave_import.py
+import pandas as pd
+
+import leave_import
+from leave_tools import check_and_process_leave
+from benchmarks.scenarios import benchmark_store
+
+
+def requests(*rows):
+    return pd.DataFrame([dict(zip(("employee_id", "leave_type", "start_date", "end_date"), row)) for row in rows])
+
+
+def test_rows_overlapping_stored_leave_are_refused(store):
+    existing = check_and_process_leave("B00001", "annual", "2030-03-04", "2030-03-06", "Trip").data["request_id"]
+    results = leave_import.import_leave_requests(requests(
+        ("B00001", "annual", "2030-03-05", "2030-03-05"),
+        ("B00001", "annual", "2030-03-11", "2030-03-11"),
+        ("B00002", "annual", "2030-03-05", "2030-03-05"),
+    ))
+    assert results["status"].tolist() == ["overlap", "approved", "approved"]
+    assert existing in results["overlap"][0]
+    assert pd.isna(results["request_id"][0])
+    # The refused row was not stored
+    assert [leave["start_date"] for leave in store.get_leave_history("B00001")] == ["2030-03-04", "2030-03-11"]
+
+
+def test_rows_overlapping_earlier_rows_of_the_batch_are_refused(store):
+    results = leave_import.import_leave_requests(requests(
+        ("B00001", "annual", "2030-03-04", "2030-03-08"),
+        ("B00001", "sick", "2030-03-06", "2030-03-06"),
+        ("B00001", "sick", "2030-03-06", "2030-03-07"),
+    ), dry_run=True)
+    assert results["status"].tolist() == ["valid", "overlap", "overlap"]
+    assert "row 0 of this import" in results["overlap"][1]
+    # The refused row 1 doesn't block row 2 a second time
+    assert "row 1" not in results["overlap"][2]
+
+
+def test_flag_policy_imports_overlapping_rows(store, monkeypatch):
+    monkeypatch.setattr(leave_import, "OVERLAP_POLICY", "flag")
+    results = leave_import.import_leave_requests(requests(
+        ("B00001", "annual", "2030-03-04", "2030-03-05"),
+        ("B00001", "annual", "2030-03-05", "2030-03-06"),
+    ))
+    assert results["status"].tolist() == ["approved", "approved"]
+    assert pd.isna(results["overlap"][0]) and "row 0 of this import" in results["overlap"][1]
+
+
+def test_import_into_another_store_checks_that_store(store):
+    other = benchmark_store(3)
+    other.submit_leave("B00001", {"type": "annual", "start_date": "2030-03-04", "end_date": "2030-03-04",
+                                  "days": 1, "reason": ""})
+    row = ("B00001", "annual", "2030-03-04", "2030-03-04")
+    assert leave_import.import_leave_requests(requests(row), other)["status"].tolist() == ["overlap"]
+    assert leave_import.import_leave_requests(requests(row))["status"].tolist() == ["approved"]
@@ -0,0 +1,60 @@
+# tests/test_leave_store.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.scenarios import benchmark_store
+from leave_store import MemoryStore, SQLiteStore
+
+LEAVE = {"type": "annual", "start_date": "2030-03-04", "end_date": "2030-03-04", "days": 1, "reason": "Trip"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def any_store(request, tmp_path):
+    """A memory or SQLite store with employees B00000..B00002."""
+    if request.param == "memory":
+        return benchmark_store(3)
+    return SQLiteStore(str(tmp_path / "leave.db"), seed=benchmark_store(3).db)
+
+
+def test_concurrent_submissions_never_overdraw(any_store):
+    # 40 one-day requests against 20 days of annual leave, from 8 threads
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: any_store.submit_leave("B00001", LEAVE, reject_insufficient=True),
+                                 range(40)))
+    approved = [result["request_id"] for result in results if result["status"] == "approved"]
+    assert len(approved) == len(set(approved)) == 20
+    assert any_store.get_leave_balance("B00001")["annual"] == 0
+    assert len(any_store.get_leave_history("B00001")) == 20
+
+
+def test_concurrent_status_changes_keep_the_balance(any_store):
+    request_ids = [any_store.submit_leave("B00001", LEAVE)["request_id"] for _ in range(10)]
+    # Every request is cancelled twice at once; each restores its day only once
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda request_id: any_store.change_leave_status("B00001", request_id, "cancelled"),
+                      request_ids * 2))
+    assert any_store.get_leave_balance("B00001")["annual"] == 20
+
+
+def test_memory_status_writes_take_the_employee_lock():
+    store = MemoryStore(benchmark_store(3).db)
+    request_id = store.submit_leave("B00001", LEAVE)["request_id"]
+    with store._employee_lock("B00001"):
+        writer = threading.Thread(target=store.set_leave_status, args=("B00001", request_id, "cancelled"))
+        writer.start()
+        writer.join(0.1)
+        assert writer.is_alive()
+    writer.join()
+    assert store.get_leave_record("B00001", request_id)["status"] == "cancelled"
+
+
+def test_sqlite_bulk_read_does_not_hold_its_transaction(tmp_path):
+    store = SQLiteStore(str(tmp_path / "leave.db"), seed=benchmark_store(3).db)
+    rows = store.iter_leave_data()
+    employee_id, _, balance, _ = next(rows)
+    # A caller that stops after the first employee leaves no transaction open
+    assert not store._conn().in_transaction
+    assert (employee_id, balance["annual"]) == ("B00000", 20)
+    rows.close()
@@ -0,0 +1,23 @@
+# tests/test_sessions.py
+import leave_graph
+from leave_tools import parse_nlp_leave_request
+
+
+def test_form_submission_is_visible_to_the_next_turn(agent):
+    model = agent({})
+    result = parse_nlp_leave_request("B00001", "I'd like to request annual leave from 2030-03-04 to 2030-03-05")
+    request_id = result.data["request_id"]
+    leave_graph.record_exchange("B00001", "I'd like to request annual leave from 2030-03-04 to 2030-03-05", result)
+
+    leave_graph.process_message("B00001", [], "Please withdraw the request I just made.")
+    assert any(request_id in str(message.content) for message in model.last_messages)
+    assert [entry["role"] for entry in leave_graph.load_history("B00001")] == ["user", "assistant"] * 2
+
+
+def test_displayed_history_is_only_extended(agent):
+    agent({})
+    shown = [{"role": "assistant", "content": "Hello!"}]
+    _, history = leave_graph.process_message("B00001", shown, "Please withdraw the request I just made.")
+    assert history[0] == shown[0] and history[1] == {"role": "user", "content": "Please withdraw the request I just made."}
+    # The greeting was only displayed, so the thread doesn't have it
+    assert leave_graph.load_history("B00001")[0]["role"] == "user"
@@ -0,0 +1,60 @@
+# tests/test_stream_message.py
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import leave_graph
+from benchmarks.fake_llm import FakeToolChatModel, ScriptedChatModel
+from model_router import ModelRouter, ModelRouterStats, ModelTier
+from turn_budget import BUDGET_MESSAGES, TurnBudget
+
+QUESTION = "Can you look into my leave situation and tell me if I should take time off next month?"
+BALANCE = {"tool": "check_leave_balance", "args": {"employee_id": "{employee_id}"}}
+
+
+def streamed_text(employee_id, message):
+    events = list(leave_graph.stream_message(employee_id, [], message))
+    return "".join(event["content"] for event in events if event["type"] == "token"), events[-1]
+
+
+def test_answer_is_streamed_once(agent):
+    agent({QUESTION: [BALANCE, {"reply": "You have plenty of leave left."}]})
+    text, done = streamed_text("B00001", QUESTION)
+    assert text == "You have plenty of leave left." == done["response"]
+
+
+def test_partial_answer_after_deadline_is_streamed_once(agent):
+    # The agent node itself returns the partial answer when its LLM call is cancelled
+    agent({QUESTION: [{"reply": "too late"}]}, TurnBudget(5, 5, 0.1), latency=0.5)
+    text, done = streamed_text("B00001", QUESTION)
+    assert text == done["response"]
+    assert text.count(BUDGET_MESSAGES["deadline"]) == 1
+
+
+def test_partial_answer_from_budget_node_is_streamed_once(agent):
+    agent({QUESTION: [BALANCE] * 5 + [{"reply": "done"}]}, TurnBudget(1, 10, 60))
+    text, done = streamed_text("B00001", QUESTION)
+    assert text == done["response"]
+    assert text.count(BUDGET_MESSAGES["tool_iterations"]) == 1
+    assert "Annual leave: 20 days" in text
+
+
+class GuessingModel(FakeToolChatModel):
+    """A cheap tier that writes some text, then cuts its tool call off."""
+
+    def _respond(self, messages, **kwargs):
+        message = AIMessage(content="You have 99 days left.", invalid_tool_calls=[{
+            "name": "check_leave_balance", "args": '{"employee_id": "B0', "id": "call_guess",
+            "error": "Function arguments are not valid JSON"}])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def test_rejected_attempt_is_not_streamed(agent):
+    model = ScriptedChatModel(script={QUESTION: [BALANCE, {"reply": "You have plenty of leave left."}]})
+    stats = ModelRouterStats()
+    tiers = {"mini": leave_graph.agent_prompt | GuessingModel().bind_tools(leave_graph.tools),
+             "big": leave_graph.agent_prompt | model.bind_tools(leave_graph.tools)}
+    agent({}, runnable=ModelRouter([ModelTier("mini", "mini"), ModelTier("big", "big")],
+                                   lambda tier, tools: tiers[tier.name], leave_graph.tools, stats))
+    text, done = streamed_text("B00001", QUESTION)
+    assert text == "You have plenty of leave left." == done["response"]
+    assert stats.report()["mini"]["escalations"] == 1
@@ -0,0 +1,20 @@
+# tests/test_tool_output.py
+import json
+
+from leave_data import LEAVE_POLICIES
+from leave_tools import get_leave_policy, search_leave_policies
+from tool_output import ToolResult, _compact, table
+
+
+def test_policies_go_to_the_llm_as_plain_lines():
+    content = get_leave_policy().content()
+    assert content.splitlines() == [f"{leave_type}: {policy}" for leave_type, policy in LEAVE_POLICIES.items()]
+    assert len(content) < len(json.dumps(_compact(get_leave_policy().data), separators=(",", ":")))
+
+
+def test_policy_passages_go_to_the_llm_as_plain_lines():
+    result = search_leave_policies("Do I need a doctor's note for sick leave?", 1)
+    (source, text), = result.data["passages"]["rows"]
+    assert result.content() == f"[{source}] {text}"
+    empty = ToolResult("policy_passages", {"passages": table(("source", "text"), [])}, display={"query": "x"})
+    assert empty.content() == "No matching policy passages."
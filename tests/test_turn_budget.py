@@ -0,0 +1,66 @@
+# tests/test_turn_budget.py
+import asyncio
+
+import pytest
+
+import leave_graph
+from benchmarks.fake_llm import ScriptedChatModel
+from model_router import ModelRouter, ModelRouterStats, ModelTier
+from turn_budget import BUDGET_MESSAGES, BudgetExceeded, CallBudget, TurnBudget, turn_usage
+
+QUESTION = "Can you look into my leave situation and tell me if I should take time off next month?"
+SCRIPT = {QUESTION: [{"tool": "check_leave_balance", "args": {"employee_id": "{employee_id}"}},
+                     {"reply": "You have plenty of leave left."}]}
+
+
+def ladder(stats):
+    """mini and small always cut their tool calls off; big answers properly."""
+    models = {"mini": ScriptedChatModel(script=SCRIPT, malformed_rate=1.0),
+              "small": ScriptedChatModel(script=SCRIPT, malformed_rate=1.0),
+              "big": ScriptedChatModel(script=SCRIPT)}
+    router = ModelRouter([ModelTier("mini", "mini"), ModelTier("small", "small"), ModelTier("big", "big")],
+                         lambda tier, tools: leave_graph.agent_prompt | models[tier.name].bind_tools(tools),
+                         leave_graph.tools, stats)
+    return router, models
+
+
+def turn_messages(employee_id):
+    return leave_graph.get_graph().get_state(leave_graph.session_config(employee_id)).values["messages"]
+
+
+def test_call_budget_counts_attempts():
+    budget = CallBudget(2)
+    budget.start()
+    budget.start()
+    with pytest.raises(BudgetExceeded) as exceeded:
+        budget.start()
+    assert exceeded.value.reason == "llm_calls" and budget.calls == 2
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_escalation_stops_at_the_call_budget(agent, use_async):
+    stats = ModelRouterStats()
+    router, models = ladder(stats)
+    agent({}, TurnBudget(6, 2, 60), runnable=router)
+    if use_async:
+        answer, _ = asyncio.run(leave_graph.aprocess_message("B00001", [], QUESTION))
+    else:
+        answer, _ = leave_graph.process_message("B00001", [], QUESTION)
+
+    assert answer.startswith(BUDGET_MESSAGES["llm_calls"])
+    # The third attempt, on the top tier, is never made
+    assert models["big"].last_messages is None
+    assert stats.report()["small"]["escalations"] == 1
+    # The rejected attempts count toward the turn
+    assert turn_usage(turn_messages("B00001"))[0] == 2
+
+
+def test_escalations_within_the_budget_are_counted(agent):
+    stats = ModelRouterStats()
+    router, _ = ladder(stats)
+    agent({}, TurnBudget(6, 4, 60), runnable=router)
+    answer, _ = leave_graph.process_message("B00001", [], QUESTION)
+
+    assert answer == "You have plenty of leave left."
+    # Three attempts for the tool call, then the answer from the tier the turn escalated to
+    assert turn_usage(turn_messages("B00001"))[0] == 4
@@ -0,0 +1,139 @@
+# tool_cache.py
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from tracing import annotate
+
+# --- Read-only tool cache ---
+# The LLM often calls the same lookup tools several times in one turn. Results
+# are cached per employee and dropped by invalidate(employee_id), which the
+# write paths in leave_tools.py call after every change. Entries also expire
+# after a TTL, which bounds staleness when another process writes to a shared
+# SQLite store. Cached ToolResults are shared between callers, which only
+# read them (their JSON is rendered once and kept).
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_TTL_SECONDS = 60.0
+
+
+class ToolCache:
+    """Thread-safe LRU cache with TTL, per-employee invalidation and hit/miss counters."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._employee_keys: Dict[str, Set[Hashable]] = {}
+        # Bumped on every invalidation so a read that raced with a write is not cached
+        self._versions: Dict[Optional[str], int] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, tool: str, counter: str) -> None:
+        counts = self._counters.setdefault(tool, {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0})
+        counts[counter] += 1
+
+    def version(self, employee_id: Optional[str]) -> int:
+        with self._lock:
+            return self._versions.get(employee_id, 0)
+
+    def get(self, tool: str, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(tool, "hits")
+                return True, entry[1]
+            self._count(tool, "misses")
+            return False, None
+
+    def put(self, tool: str, key: Hashable, value: Any, employee_id: Optional[str], version: int) -> None:
+        with self._lock:
+            if self._versions.get(employee_id, 0) != version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if employee_id is not None:
+                self._employee_keys.setdefault(employee_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, _ = self._entries.popitem(last=False)
+                self._count(old_key[0], "evictions")
+                if old_key[1] is not None:
+                    keys = self._employee_keys.get(old_key[1])
+                    if keys is not None:
+                        keys.discard(old_key)
+
+    def invalidate(self, employee_id: str) -> None:
+        """Drop every cached result for an employee. Called after each write."""
+        with self._lock:
+            self._versions[employee_id] = self._versions.get(employee_id, 0) + 1
+            for key in self._employee_keys.pop(employee_id, ()):
+                if self._entries.pop(key, None) is not None:
+                    self._count(key[0], "invalidations")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._employee_keys.clear()
+            self._versions = {k: v + 1 for k, v in self._versions.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-tool hits, misses, evictions and invalidations, plus totals and the current size."""
+        with self._lock:
+            tools = {tool: dict(counts) for tool, counts in self._counters.items()}
+            hits = sum(c["hits"] for c in tools.values())
+            misses = sum(c["misses"] for c in tools.values())
+            return {
+                "size": len(self._entries),
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "tools": tools,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+tool_cache = ToolCache()
+
+
+def cached_tool(per_employee: bool = True) -> Callable:
+    """
+    Memoize a read-only tool in tool_cache.
+
+    With per_employee=True the tool must take an employee_id argument, and the
+    entry is dropped when that employee's data changes. Tools that don't read
+    employee data (policies) use per_employee=False and rely on the TTL.
+    functools.wraps keeps the signature and docstring used for the tool schema.
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        tool = func.__name__
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tool_cache.enabled:
+                return func(*args, **kwargs)
+            # Bind so positional (router) and keyword (ToolNode) calls share an entry
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            employee_id = bound.arguments["employee_id"] if per_employee else None
+            key = (tool, employee_id, tuple(bound.arguments.items()))
+            hit, value = tool_cache.get(tool, key)
+            annotate(cache_hit=hit)
+            if hit:
+                return value
+            version = tool_cache.version(employee_id)
+            value = func(*args, **kwargs)
+            tool_cache.put(tool, key, value, employee_id, version)
+            return value
+
+        return wrapper
+    return decorator
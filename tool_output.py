@@ -0,0 +1,340 @@
+# tool_output.py
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# --- Structured tool results ---
+# The tools in leave_tools.py return a ToolResult: a kind ("balance",
+# "history", ...) and a small payload of plain data. The LLM gets the payload
+# as compact JSON: no prose, and lists as a header plus comma-separated rows
+# (see _compact). Values the model already has (the employee's name, the dates
+# and leave type it just passed in) go in `display` and stay out of its copy.
+#
+# The English text (router fast path, benchmarks, logs) and the Markdown the
+# Streamlit quick actions show are rendered from the same payload by the
+# renderers registered below, one per kind, so every surface says the same
+# thing. In the graph, the ToolMessage content is the JSON and its artifact
+# the full payload (see tool_output()), for a UI to render later.
+#
+# Policy results are mostly prose, where JSON quoting and escaping cost more
+# tokens than the keys save; kinds in TEXT_CONTENT go to the LLM as plain
+# lines instead (no headings or bullets, unlike the English text).
+
+Payload = Dict[str, Any]
+
+
+class ToolResult:
+    """A tool's answer: kind, LLM-facing data, display-only extras and the rendered text."""
+
+    __slots__ = ("kind", "data", "display", "_text", "_content")
+
+    def __init__(self, kind: str, data: Payload, display: Optional[Payload] = None, text: Optional[str] = None):
+        self.kind = kind
+        self.data = data
+        self.display = display or {}
+        self._text = text
+        self._content: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """The answer as English text for people."""
+        if self._text is None:
+            self._text = RENDERERS[self.kind]({**self.display, **self.data})
+        return self._text
+
+    @property
+    def error(self) -> Optional[str]:
+        return self.data.get("error")
+
+    def content(self) -> str:
+        """The payload as compact JSON (plain lines for TEXT_CONTENT kinds), what the LLM reads."""
+        if self._content is None:
+            if self.kind in TEXT_CONTENT:
+                self._content = TEXT_CONTENT[self.kind](self.data)
+            else:
+                self._content = json.dumps(_compact(self.data), separators=(",", ":"), ensure_ascii=False, default=str)
+        return self._content
+
+    def artifact(self) -> Payload:
+        """Everything a UI needs to render the result, kind included."""
+        return {"kind": self.kind, **self.display, **self.data}
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"ToolResult({self.kind!r}, {self.data!r})"
+
+
+def error(message: str) -> ToolResult:
+    """A failed call; the message is what the user should be told."""
+    return ToolResult("error", {"error": message})
+
+
+def table(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Payload:
+    """A list of records as one header plus value rows, the compact form for the LLM."""
+    return {"columns": list(columns), "rows": [list(row) for row in rows]}
+
+
+def records(table: Payload) -> List[Payload]:
+    """The rows of a table() as dicts."""
+    return [dict(zip(table["columns"], row)) for row in table["rows"]]
+
+
+_DELIMITERS = frozenset(',"\n')
+
+def _compact(value: Any) -> Any:
+    # Tables go to the LLM as comma-separated lines: one string for the header,
+    # one per row, which takes fewer tokens than quoting every cell. Tables with
+    # a comma, quote or newline in a cell (policy text) keep their nested rows.
+    # Two-column tables with unique keys (date -> holiday) become an object.
+    if isinstance(value, dict):
+        if "columns" in value and "rows" in value:
+            keys = [row[0] for row in value["rows"]]
+            if len(value["columns"]) == 2 and all(isinstance(key, str) for key in keys) and len(set(keys)) == len(keys):
+                return dict(value["rows"])
+            cells = [["" if cell is None else str(cell) for cell in row] for row in value["rows"]]
+            if any(_DELIMITERS.intersection(cell) for row in cells for cell in row):
+                return {"columns": ",".join(value["columns"]), "rows": value["rows"]}
+            return {"columns": ",".join(value["columns"]), "rows": [",".join(row) for row in cells]}
+        return {key: _compact(item) for key, item in value.items()}
+    return value
+
+
+def _policy_lines(payload: Payload) -> str:
+    return "\n".join(f"{leave_type}: {policy}" for leave_type, policy in payload["policies"].items())
+
+
+def _passage_lines(payload: Payload) -> str:
+    if not payload["passages"]["rows"]:
+        return "No matching policy passages."
+    return "\n".join(f"[{source}] {text}" for source, text in payload["passages"]["rows"])
+
+
+TEXT_CONTENT: Dict[str, Callable[[Payload], str]] = {
+    "policies": _policy_lines,
+    "policy_passages": _passage_lines,
+}
+
+
+def tool_output(result: Union[ToolResult, str]) -> Tuple[str, Optional[Payload]]:
+    """(content, artifact) of a result, for tools with response_format="content_and_artifact"."""
+    if isinstance(result, ToolResult):
+        return result.content(), result.artifact()
+    return str(result), None
+
+
+# --- Rendering ---
+RENDERERS: Dict[str, Callable[[Payload], str]] = {}
+
+def renderer(kind: str) -> Callable:
+    def register(func: Callable[[Payload], str]) -> Callable[[Payload], str]:
+        RENDERERS[kind] = func
+        return func
+    return register
+
+
+def render(result: Union[ToolResult, Payload, str]) -> str:
+    """English text of a ToolResult, of its artifact, or a string unchanged."""
+    if isinstance(result, ToolResult):
+        return result.text
+    if isinstance(result, dict):
+        return RENDERERS[result["kind"]](result)
+    return str(result)
+
+
+def render_markdown(result: Union[ToolResult, Payload, str]) -> str:
+    """
+    Markdown for the Streamlit quick actions: tables become Markdown tables,
+    everything else is the English text.
+    """
+    payload = result.artifact() if isinstance(result, ToolResult) else result
+    if not isinstance(payload, dict):
+        return str(payload)
+    tables = [(key, value) for key, value in payload.items() if isinstance(value, dict) and "columns" in value]
+    if not tables or not any(value["rows"] for _, value in tables):
+        return render(payload)
+    # The first line of the text is the heading ("Leave history for ...:")
+    text = render(payload).split("\n", 1)[0]
+    for _, value in tables:
+        if not value["rows"]:
+            continue
+        header = [column.replace("_", " ").capitalize() for column in value["columns"]]
+        text += "\n\n| " + " | ".join(header) + " |\n|" + "---|" * len(header) + "\n"
+        text += "".join("| " + " | ".join("" if cell is None else str(cell) for cell in row) + " |\n"
+                        for row in value["rows"])
+    return text
+
+
+@renderer("error")
+def _render_error(payload: Payload) -> str:
+    return payload["error"]
+
+
+@renderer("balance")
+def _render_balance(payload: Payload) -> str:
+    response = f"Leave balance for {payload['name']} (ID: {payload['employee_id']}):\n"
+    for leave_type, days in payload["balance"].items():
+        response += f"- {leave_type.capitalize()} leave: {days} days\n"
+    return response
+
+
+@renderer("history")
+def _render_history(payload: Payload) -> str:
+    history = records(payload["history"])
+    if not history:
+        return f"{payload['name']} has no leave history."
+    response = f"Leave history for {payload['name']} (ID: {payload['employee_id']}):\n"
+    for record in history:
+        response += (f"- {record['type'].capitalize()} leave: {record['start_date']} to {record['end_date']} "
+                     f"({record['days']} days) - {record['status']}\n")
+    return response
+
+
+def overlap_message(conflicts: List[Payload]) -> str:
+    """Describe the leave a new request overlaps."""
+    listed = "; ".join(
+        f"{c['type']} leave {c['start_date']} to {c['end_date']} ({c['status']}"
+        + (f", {c['request_id']})" if c["request_id"] else ")")
+        for c in conflicts
+    )
+    return f"These dates overlap your existing leave: {listed}."
+
+
+@renderer("overlap")
+def _render_overlap(payload: Payload) -> str:
+    return f"{overlap_message(records(payload['overlaps']))} Please cancel or change it before requesting these dates."
+
+
+@renderer("leave_request")
+def _render_leave_request(payload: Payload) -> str:
+    # request_leave: strict balance check, short confirmation
+    note = f"\nNote: {overlap_message(records(payload['overlaps']))}" if "overlaps" in payload else ""
+    if payload["request_id"] is None:
+        return (f"Insufficient {payload['type']} leave balance. You requested {payload['days']} days but have "
+                f"{payload['balance']} days available. Your request has been forwarded to your manager for special approval.")
+    if payload["status"] == "approved":
+        return f"Leave request automatically approved! Request ID: {payload['request_id']}. Status: {payload['status']}.{note}"
+    return (f"Your leave request has been submitted (Request ID: {payload['request_id']}). Status: {payload['status']}. "
+            f"You will be notified once your manager reviews it.{note}")
+
+
+@renderer("leave_processed")
+def _render_leave_processed(payload: Payload) -> str:
+    # check_and_process_leave: balance summary, then the outcome
+    days, balance = payload["days"], payload.get("balance_before")
+    balance_info = ""
+    if balance is not None:
+        balance_info = f"Current {payload['type']} leave balance: {balance} days."
+        if balance >= days:
+            balance_info += f" You have sufficient balance for this {days}-day request."
+        else:
+            balance_info += f" You have insufficient balance for this {days}-day request."
+    if payload["status"] == "approved":
+        approval_msg = f"Leave request automatically approved! Request ID: {payload['request_id']}."
+    else:
+        approval_msg = (f"Your leave request has been submitted (Request ID: {payload['request_id']}). "
+                        f"Status: {payload['status']}. You will be notified once your manager reviews it.")
+    if "overlaps" in payload:
+        approval_msg += f"\nNote: {overlap_message(records(payload['overlaps']))} Your manager will see the overlap."
+    return f"{balance_info}\n{approval_msg}"
+
+
+@renderer("status_update")
+def _render_status_update(payload: Payload) -> str:
+    request_id, old_status, new_status = payload["request_id"], payload["old_status"], payload["new_status"]
+    leave_type, days = payload["type"], payload["days"]
+    change = payload["balance_change"]
+    if change == "deducted":
+        return f"Leave request {request_id} status updated from '{old_status}' to '{new_status}'. {days} days deducted from {leave_type} leave balance."
+    if change == "insufficient":
+        return f"Warning: Insufficient balance for {leave_type} leave. Status updated but balance not adjusted. Please review."
+    if change == "restored":
+        return f"Leave request {request_id} status updated from '{old_status}' to '{new_status}'. {days} days restored to {leave_type} leave balance."
+    return f"Leave request {request_id} status updated from '{old_status}' to '{new_status}'."
+
+
+@renderer("needs_info")
+def _render_needs_info(payload: Payload) -> str:
+    return f"I need more information to process your leave request. Please provide: {', '.join(payload['missing'])}."
+
+
+@renderer("policies")
+def _render_policies(payload: Payload) -> str:
+    policies = payload["policies"]
+    if len(policies) == 1 and not payload.get("all"):
+        (leave_type, policy), = policies.items()
+        return f"{leave_type.capitalize()} Leave Policy: {policy}"
+    response = "Leave Policies:\n"
+    for leave_type, policy in policies.items():
+        response += f"- {leave_type.capitalize()} Leave: {policy}\n\n"
+    return response
+
+
+@renderer("policy_passages")
+def _render_policy_passages(payload: Payload) -> str:
+    if not payload["passages"]["rows"]:
+        return f"No policy passages match \"{payload['query']}\"."
+    return "\n".join(f"[{source}]\n{text}\n" for source, text in payload["passages"]["rows"])
+
+
+@renderer("holidays")
+def _render_holidays(payload: Payload) -> str:
+    from holiday_calendar import format_holidays
+    title = (f"Holidays from {payload['start_date']} to {payload['end_date']}:" if "start_date" in payload
+             else "Upcoming Holidays:")
+    return format_holidays(title, records(payload["holidays"]))
+
+
+@renderer("absences")
+def _render_absences(payload: Payload) -> str:
+    if not payload["total"]:
+        return f"No one is on leave {payload['period']}."
+    if "absences" not in payload:
+        # Restricted to the count for employees who are not managers
+        return f"{payload['total']} absences {payload['period']}. Only managers can see who is away."
+    response = f"{payload['total']} absences {payload['period']}:\n"
+    for absence in records(payload["absences"]):
+        response += (f"- {absence['name']} ({absence['employee_id']}): {absence['type']} leave {absence['start_date']} to "
+                     f"{absence['end_date']} - {absence['status']}\n")
+    if payload["total"] > len(payload["absences"]["rows"]):
+        response += f"... and {payload['total'] - len(payload['absences']['rows'])} more.\n"
+    return response
+
+
+@renderer("analytics")
+def _render_analytics(payload: Payload) -> str:
+    report = payload["report"]
+    if report == "summary":
+        response = f"Leave utilization {payload['year']} ({payload['employees']} employees):\n"
+        for row in records(payload["utilization"]):
+            share = f"{row['utilization']:.0%} used" if row["utilization"] is not None else "no balance"
+            response += (f"- {row['type'].capitalize()}: {row['taken']} days taken, {row['pending']} pending, "
+                         f"{row['remaining']} remaining ({share})\n")
+        if payload["balances"]["rows"]:
+            response += "Remaining balance per employee:\n"
+            for row in records(payload["balances"]):
+                response += (f"- {row['type'].capitalize()}: mean {row['mean']:.1f}, median {row['median']:.0f} days; "
+                             f"{row['at_zero']} of {row['employees']} employees at zero\n")
+        return response
+    if report == "upcoming":
+        if not payload["total"]:
+            return f"No absences in the next {payload['days_ahead']} days."
+        response = (f"{payload['total']} absences in the next {payload['days_ahead']} days "
+                    f"(busiest day {payload['busiest_day']}, {payload['busiest_count']} away)")
+        if "absences" not in payload:
+            # Restricted to the counts for employees who are not managers
+            return f"{response}. Only managers can see who is away."
+        response += ":\n"
+        for row in records(payload["absences"]):
+            response += (f"- {row['name']} ({row['employee_id']}): {row['type']} leave "
+                         f"{row['start_date']} to {row['end_date']} - {row['status']}\n")
+        if payload["total"] > len(payload["absences"]["rows"]):
+            response += f"... and {payload['total'] - len(payload['absences']['rows'])} more.\n"
+        return response
+    # trends
+    response = "Approved leave days per month:\n"
+    types = payload["months"]["columns"][2:]
+    for month, total, *days in payload["months"]["rows"]:
+        parts = ", ".join(f"{name} {count}" for name, count in zip(types, days) if count)
+        response += f"- {month}: {total} days" + (f" ({parts})" if parts else "") + "\n"
+    return response
@@ -0,0 +1,182 @@
+# tool_selection.py
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from history_manager import count_tokens
+
+# --- Per-turn tool selection ---
+# Binding every tool sends all of their JSON schemas on every LLM call, most of
+# them irrelevant to the turn (a balance question doesn't need the analytics
+# report or update_leave_status). The ToolSelector picks the tools a turn can
+# use from the words of the user's message (TOOL_HINTS, the same hints the
+# model router scores complexity with) and the conversation phase:
+#
+# - a reply to the assistant's question ("From 2025-11-10 to 2025-11-12") keeps
+#   the tools of the message the question was about
+# - a message with no hints gets every selectable tool
+#
+# parse_nlp_leave_request is never selected: the model reads the dates and leave
+# type itself and passes them to check_and_process_leave. The subset is a
+# function of the conversation, so it stays the same for every call of a turn
+# and for cached responses. The ModelRouter binds each subset once per tier and
+# reuses the runnable. Set LEAVE_TOOL_SELECTION=0 to bind every tool.
+
+# Words hinting at each group of tools a message will need
+TOOL_HINTS = {
+    "balance": re.compile(r"\b(balances?|left|remaining|available|how many days)\b"),
+    "history": re.compile(r"\b(history|records?|past|previous|taken so far)\b"),
+    "request": re.compile(r"\b(request|apply|book|take|taking|submit|time off|day off|days off)\b"),
+    "status": re.compile(r"\b(cancel|withdraw|approve|reject|status)\b"),
+    "holidays": re.compile(r"\bholidays?\b"),
+    "policy": re.compile(r"\b(polic(y|ies)|rules?|allowed|entitle\w*|doctor'?s? note|notice)\b"),
+    "team": re.compile(r"\b(who|team|everyone|colleagues?|trends?|utili[sz]ation|report)\b"),
+}
+
+# Tools bound for each hint group
+TOOL_GROUPS = {
+    "balance": ("check_leave_balance",),
+    "history": ("view_leave_history",),
+    "request": ("check_leave_balance", "check_and_process_leave"),
+    "status": ("view_leave_history", "update_leave_status"),
+    "holidays": ("get_holidays",),
+    "policy": ("search_leave_policies", "get_leave_policy"),
+    "team": ("get_team_absences", "get_leave_analytics"),
+}
+
+# Bound only when selection is off
+UNSELECTED_TOOLS = ("parse_nlp_leave_request",)
+
+
+def tool_hints(text: str) -> Tuple[str, ...]:
+    """Hint groups (TOOL_HINTS keys) found in a lower-cased message."""
+    return tuple(name for name, pattern in TOOL_HINTS.items() if pattern.search(text))
+
+
+def _text(message: BaseMessage) -> str:
+    return message.content.lower() if isinstance(message.content, str) else ""
+
+
+def turn_hints(messages: Sequence[BaseMessage]) -> Tuple[str, ...]:
+    """
+    Hint groups of the current turn.
+
+    Args:
+        messages: The conversation as sent to the model; the turn is the last
+            user message and what followed it
+
+    Returns:
+        The groups hinted by the last user message, plus those of the one
+        before it when the last message answers a question the assistant asked
+    """
+    humans = [number for number, message in enumerate(messages) if isinstance(message, HumanMessage)]
+    if not humans:
+        return ()
+    last = humans[-1]
+    hints = tool_hints(_text(messages[last]))
+    previous = messages[last - 1] if last > 0 else None
+    asked = (isinstance(previous, AIMessage) and not previous.tool_calls
+             and _text(previous).rstrip().endswith("?"))
+    if asked and len(humans) > 1:
+        hints += tuple(name for name in tool_hints(_text(messages[humans[-2]])) if name not in hints)
+    return hints
+
+
+def tool_selection_enabled() -> bool:
+    return os.getenv("LEAVE_TOOL_SELECTION", "1").lower() not in ("0", "false", "no", "off")
+
+
+def schema_tokens(tools: Sequence[Callable]) -> int:
+    """Tokens of the tools' JSON schemas as sent to the model."""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+    return count_tokens(json.dumps([convert_to_openai_tool(tool) for tool in tools]))
+
+
+class ToolSelectionStats:
+    """Calls per tool subset, schema tokens sent against binding every tool, and unbound tool calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.tools_bound = 0
+        self.schema_tokens = 0
+        self.full_schema_tokens = 0
+        self.unbound_calls = 0
+        self.subsets: Dict[Tuple[str, ...], int] = {}
+
+    def record(self, names: Tuple[str, ...], tokens: int, full_tokens: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.tools_bound += len(names)
+            self.schema_tokens += tokens
+            self.full_schema_tokens += full_tokens
+            self.subsets[names] = self.subsets.get(names, 0) + 1
+
+    def record_unbound_call(self) -> None:
+        """The model called a tool that wasn't bound for the turn."""
+        with self._lock:
+            self.unbound_calls += 1
+
+    def report(self) -> Dict[str, object]:
+        with self._lock:
+            calls = self.calls
+            return {
+                "calls": calls,
+                "avg_tools": self.tools_bound / calls if calls else 0.0,
+                "schema_tokens_per_call": self.schema_tokens / calls if calls else 0.0,
+                "full_schema_tokens_per_call": self.full_schema_tokens / calls if calls else 0.0,
+                "schema_tokens_saved": self.full_schema_tokens - self.schema_tokens,
+                "unbound_calls": self.unbound_calls,
+                "subsets": len(self.subsets),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = self.tools_bound = self.schema_tokens = self.full_schema_tokens = 0
+            self.unbound_calls = 0
+            self.subsets.clear()
+
+
+tool_selection_stats = ToolSelectionStats()
+
+
+class ToolSelector:
+    """Picks the tools to bind for a turn out of the agent's tools."""
+
+    def __init__(self, tools: Sequence[Callable], stats: Optional[ToolSelectionStats] = None):
+        """
+        Args:
+            tools: Every tool the agent has, in binding order
+            stats: Where to record selections (default: tool_selection_stats)
+        """
+        self.tools = list(tools)
+        self.stats = stats if stats is not None else tool_selection_stats
+        self.default = tuple(tool.__name__ for tool in self.tools if tool.__name__ not in UNSELECTED_TOOLS)
+        self._by_name = {tool.__name__: tool for tool in self.tools}
+        self._tokens: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+
+    def select(self, messages: Sequence[BaseMessage]) -> Tuple[str, ...]:
+        """Names of the tools to bind for the next call, in binding order."""
+        wanted = {name for group in turn_hints(messages) for name in TOOL_GROUPS[group]}
+        names = tuple(name for name in self.default if name in wanted) or self.default
+        self.stats.record(names, self._schema_tokens(names), self._schema_tokens(self.names()))
+        return names
+
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self._by_name)
+
+    def tools_for(self, names: Sequence[str]) -> List[Callable]:
+        return [self._by_name[name] for name in names]
+
+    def _schema_tokens(self, names: Tuple[str, ...]) -> int:
+        tokens = self._tokens.get(names)
+        if tokens is None:
+            tokens = schema_tokens(self.tools_for(names))
+            with self._lock:
+                self._tokens[names] = tokens
+        return tokens
@@ -0,0 +1,304 @@
+# tracing.py
+import atexit
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# --- Tracing and latency metrics ---
+# Spans cover a conversation turn, each graph node, each tool call and each LLM
+# call. Every finished span updates in-memory metrics (count, errors, latency
+# histogram, tokens, cache hits) that can be written as Prometheus text; spans
+# of sampled turns are also appended to a JSONL file, one object per line.
+#
+# Tracing is off unless configured. Disabled, span() returns a shared no-op
+# object, so the instrumented code pays one attribute check per span.
+#
+#   LEAVE_TRACE=1                  enable with in-memory metrics only
+#   LEAVE_TRACE_JSONL=traces.jsonl append sampled spans to this file
+#   LEAVE_TRACE_PROMETHEUS=m.prom  rewrite this file with the metrics
+#   LEAVE_TRACE_SAMPLE_RATE=0.1    fraction of turns written to JSONL (default 1)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMETHEUS_WRITE_INTERVAL = 10.0
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("leave_current_span", default=None)
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """One timed operation. Use as a context manager; set() adds attributes while it runs."""
+
+    __slots__ = ("tracer", "kind", "name", "attrs", "trace_id", "span_id", "parent_id",
+                 "sampled", "start", "duration", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", kind: str, name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        parent = _current_span.get()
+        self.span_id = os.urandom(8).hex()
+        if parent is None:
+            # Root span: the sampling decision covers the whole trace
+            self.trace_id = self.span_id
+            self.parent_id = None
+            self.sampled = random.random() < self.tracer.sample_rate
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.sampled = parent.sampled
+        self._token = _current_span.set(self)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration = time.time() - self.start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _current_span.reset(self._token)
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "error": self.error,
+            **self.attrs,
+        }
+
+
+class _SpanMetrics:
+    __slots__ = ("count", "errors", "seconds", "buckets", "input_tokens", "output_tokens", "cache_hits")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_hits = 0
+
+
+class Tracer:
+    """Creates spans, aggregates their metrics and writes the configured sinks."""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.jsonl_path: Optional[str] = None
+        self.prometheus_path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._metrics: Dict[Tuple[str, str], _SpanMetrics] = {}
+        self._jsonl = None
+        self._last_prometheus_write = 0.0
+
+    def configure(self, enabled: bool = True, sample_rate: float = 1.0,
+                  jsonl_path: Optional[str] = None, prometheus_path: Optional[str] = None) -> None:
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+            self.sample_rate = sample_rate
+            self.jsonl_path = jsonl_path
+            self.prometheus_path = prometheus_path
+            if jsonl_path:
+                self._jsonl = open(jsonl_path, "a", encoding="utf-8")
+            self.enabled = enabled
+
+    def span(self, kind: str, name: str, **attrs: Any):
+        """Context manager timing one operation; a no-op while tracing is disabled."""
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, kind, name, attrs)
+
+    def _finish(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) if span.sampled and self._jsonl is not None else None
+        with self._lock:
+            metrics = self._metrics.get((span.kind, span.name))
+            if metrics is None:
+                metrics = self._metrics[(span.kind, span.name)] = _SpanMetrics()
+            metrics.count += 1
+            metrics.errors += span.error is not None
+            metrics.seconds += span.duration
+            metrics.buckets[bisect.bisect_left(LATENCY_BUCKETS, span.duration)] += 1
+            metrics.input_tokens += span.attrs.get("input_tokens", 0)
+            metrics.output_tokens += span.attrs.get("output_tokens", 0)
+            metrics.cache_hits += span.attrs.get("cache_hit", False) is True
+            if line is not None:
+                self._jsonl.write(line + "\n")
+            if span.parent_id is None:
+                if self._jsonl is not None:
+                    self._jsonl.flush()
+                write_prometheus = (self.prometheus_path is not None
+                                    and time.monotonic() - self._last_prometheus_write >= PROMETHEUS_WRITE_INTERVAL)
+            else:
+                write_prometheus = False
+        if write_prometheus:
+            self.write_prometheus()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-span metrics keyed by "kind:name": count, errors, mean/total latency, tokens, cache hits."""
+        with self._lock:
+            return {
+                f"{kind}:{name}": {
+                    "count": m.count,
+                    "errors": m.errors,
+                    "total_seconds": m.seconds,
+                    "mean_ms": m.seconds / m.count * 1000 if m.count else 0.0,
+                    "input_tokens": m.input_tokens,
+                    "output_tokens": m.output_tokens,
+                    "cache_hits": m.cache_hits,
+                }
+                for (kind, name), m in sorted(self._metrics.items())
+            }
+
+    def prometheus_text(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted((key, m) for key, m in self._metrics.items())
+            lines = [
+                "# HELP leave_span_seconds Latency of traced operations.",
+                "# TYPE leave_span_seconds histogram",
+            ]
+            for (kind, name), m in items:
+                labels = f'kind="{kind}",name="{name}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, m.buckets):
+                    cumulative += count
+                    lines.append(f'leave_span_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'leave_span_seconds_bucket{{{labels},le="+Inf"}} {m.count}')
+                lines.append(f"leave_span_seconds_sum{{{labels}}} {m.seconds:.6f}")
+                lines.append(f"leave_span_seconds_count{{{labels}}} {m.count}")
+            lines += ["# HELP leave_span_errors_total Traced operations that raised.",
+                      "# TYPE leave_span_errors_total counter"]
+            lines += [f'leave_span_errors_total{{kind="{k}",name="{n}"}} {m.errors}' for (k, n), m in items]
+            lines += ["# HELP leave_cache_hits_total Traced operations answered from a cache.",
+                      "# TYPE leave_cache_hits_total counter"]
+            lines += [f'leave_cache_hits_total{{kind="{k}",name="{n}"}} {m.cache_hits}' for (k, n), m in items]
+            lines += ["# HELP leave_llm_tokens_total Tokens sent to and received from the LLM.",
+                      "# TYPE leave_llm_tokens_total counter"]
+            for (kind, name), m in items:
+                if kind == "llm":
+                    lines.append(f'leave_llm_tokens_total{{name="{name}",direction="input"}} {m.input_tokens}')
+                    lines.append(f'leave_llm_tokens_total{{name="{name}",direction="output"}} {m.output_tokens}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Optional[str] = None) -> None:
+        """Rewrite the Prometheus file atomically (a scraper never sees half a file)."""
+        path = path or self.prometheus_path
+        if not path:
+            return
+        text = self.prometheus_text()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        self._last_prometheus_write = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.flush()
+        if self.prometheus_path:
+            self.write_prometheus()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+
+tracer = Tracer()
+
+
+def annotate(**attrs: Any) -> None:
+    """Add attributes to the innermost open span, if any (e.g. cache_hit from a cached tool)."""
+    if tracer.enabled:
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attrs)
+
+
+def token_usage(message: Any) -> Dict[str, int]:
+    """input_tokens/output_tokens span attributes from a chat model response's usage metadata."""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return {}
+    return {"input_tokens": usage.get("input_tokens", 0), "output_tokens": usage.get("output_tokens", 0)}
+
+
+def traced(kind: str, name: Optional[str] = None) -> Callable:
+    """Run a function (sync or async) inside a span named after it."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with tracer.span(kind, span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(kind, span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_from_env() -> None:
+    jsonl_path = os.getenv("LEAVE_TRACE_JSONL") or None
+    prometheus_path = os.getenv("LEAVE_TRACE_PROMETHEUS") or None
+    enabled = os.getenv("LEAVE_TRACE", "").lower() in ("1", "true", "yes") or bool(jsonl_path or prometheus_path)
+    if enabled:
+        tracer.configure(
+            sample_rate=float(os.getenv("LEAVE_TRACE_SAMPLE_RATE", "1")),
+            jsonl_path=jsonl_path,
+            prometheus_path=prometheus_path,
+        )
+
+
+configure_from_env()
+atexit.register(tracer.flush)
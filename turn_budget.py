@@ -0,0 +1,238 @@
+# turn_budget.py
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from tool_output import render
+
+# --- Per-turn budgets ---
+# A confused model can keep calling tools, and every round trip is another
+# gpt-4o call while the user waits. Each turn gets a budget:
+#
+#   LEAVE_MAX_TOOL_ITERATIONS   agent -> action rounds (default 6)
+#   LEAVE_MAX_LLM_CALLS         model calls, escalations included (default 10)
+#   LEAVE_TURN_DEADLINE         wall-clock seconds for the turn (default 60, 0 = none)
+#
+# The graph checks the budget before running tools and before calling the
+# model again; once it's spent, the "budget" node ends the turn with a partial
+# answer built from the tool results so far. An LLM call still running at the
+# deadline is cancelled: under ainvoke/astream the request task is cancelled,
+# under invoke/stream the node stops waiting for the worker thread running it
+# and sets its cancel event, so the model router makes no further attempts.
+#
+# The model router also checks the call budget before each attempt, so a
+# turn whose answers keep being escalated stops at max_llm_calls rather than
+# after the whole ladder; the attempts it made count toward the turn, whether
+# their answers were accepted, rejected or abandoned (see CallBudget).
+#
+# TurnBudgetStats counts turns, exhausted budgets per reason and cancelled
+# calls; exhausted turns also get a "budget" span named after the reason.
+
+DEFAULT_MAX_TOOL_ITERATIONS = 6
+DEFAULT_MAX_LLM_CALLS = 10
+DEFAULT_DEADLINE_SECONDS = 60.0
+# Worker threads for deadline-bounded LLM calls on the sync path (created on demand)
+LLM_CALL_WORKERS = 64
+
+BUDGET_MESSAGES = {
+    "deadline": "This is taking longer than it should, so I stopped here.",
+    "tool_iterations": "This needed more steps than I can take for one message, so I stopped here.",
+    "llm_calls": "This needed more steps than I can take for one message, so I stopped here.",
+}
+NOT_RUN = "Not run: the turn ran out of time or steps."
+
+
+class BudgetExceeded(Exception):
+    """The turn's budget ran out (reason: deadline, tool_iterations or llm_calls)."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CallBudget:
+    """
+    The model calls one agent step may make. The model router calls start()
+    before each attempt; calls counts every attempt started, so the agent node
+    can charge the turn for them even when the step ends with BudgetExceeded.
+    """
+
+    def __init__(self, max_calls: int):
+        self.max_calls = max_calls
+        self.calls = 0
+
+    def start(self) -> None:
+        """Count one more attempt, or raise BudgetExceeded("llm_calls") if none are left."""
+        if self.calls >= self.max_calls:
+            raise BudgetExceeded("llm_calls")
+        self.calls += 1
+
+
+class TurnBudget(NamedTuple):
+    max_tool_iterations: int = DEFAULT_MAX_TOOL_ITERATIONS
+    max_llm_calls: int = DEFAULT_MAX_LLM_CALLS
+    deadline_seconds: float = DEFAULT_DEADLINE_SECONDS
+
+    def deadline(self) -> Optional[float]:
+        """Deadline (time.time()) of a turn starting now, or None without one."""
+        return time.time() + self.deadline_seconds if self.deadline_seconds > 0 else None
+
+    def exhausted(self, messages: Sequence[BaseMessage], deadline: Optional[float], next_step: str) -> Optional[str]:
+        """
+        Why the turn can't take its next step, or None if it can.
+
+        Args:
+            messages: The conversation; the turn is everything after the last user message
+            deadline: The turn's deadline (time.time()), or None
+            next_step: "tools" to run the last message's tool calls, "llm" to call the model
+        """
+        if deadline is not None and time.time() >= deadline:
+            return "deadline"
+        llm_calls, tool_iterations = turn_usage(messages)
+        if next_step == "tools" and tool_iterations > self.max_tool_iterations:
+            return "tool_iterations"
+        if next_step == "llm" and llm_calls >= self.max_llm_calls:
+            return "llm_calls"
+        return None
+
+    def calls_left(self, messages: Sequence[BaseMessage]) -> CallBudget:
+        """The model calls the turn's next agent step may make."""
+        return CallBudget(self.max_llm_calls - turn_usage(messages)[0])
+
+
+def load_turn_budget() -> TurnBudget:
+    return TurnBudget(
+        int(os.getenv("LEAVE_MAX_TOOL_ITERATIONS", DEFAULT_MAX_TOOL_ITERATIONS)),
+        int(os.getenv("LEAVE_MAX_LLM_CALLS", DEFAULT_MAX_LLM_CALLS)),
+        float(os.getenv("LEAVE_TURN_DEADLINE", DEFAULT_DEADLINE_SECONDS)),
+    )
+
+
+def _turn_messages(messages: Sequence[BaseMessage]) -> Sequence[BaseMessage]:
+    last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+    return messages[last_human + 1:]
+
+
+def turn_usage(messages: Sequence[BaseMessage]) -> Tuple[int, int]:
+    """Model calls (the router's "model_calls" per response, 1 if unset) and tool rounds of the current turn."""
+    llm_calls = tool_iterations = 0
+    for message in _turn_messages(messages):
+        if isinstance(message, AIMessage):
+            llm_calls += message.response_metadata.get("model_calls", 1)
+            tool_iterations += bool(message.tool_calls)
+    return llm_calls, tool_iterations
+
+
+def partial_answer(messages: Sequence[BaseMessage], reason: str) -> str:
+    """What to tell the user when the turn's budget runs out: the reason and the tool results so far."""
+    found = []
+    for message in _turn_messages(messages):
+        if (isinstance(message, ToolMessage) and isinstance(message.artifact, dict)
+                and message.artifact.get("kind") != "error"):
+            text = render(message.artifact).strip()
+            # A model going in circles repeats the same lookup
+            if text not in found:
+                found.append(text)
+    if not found:
+        return f"{BUDGET_MESSAGES[reason]} Please try again, or split the question into smaller ones."
+    return "\n\n".join([f"{BUDGET_MESSAGES[reason]} Here is what I found so far:", *found,
+                        "Ask again if you need the rest."])
+
+
+class TurnBudgetStats:
+    """Turns, exhausted budgets per reason and cancelled LLM calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.exhausted: Dict[str, int] = {}
+        self.cancelled_calls = 0
+
+    def record_turn(self) -> None:
+        with self._lock:
+            self.turns += 1
+
+    def record_exhausted(self, reason: str) -> None:
+        with self._lock:
+            self.exhausted[reason] = self.exhausted.get(reason, 0) + 1
+
+    def record_cancelled(self) -> None:
+        with self._lock:
+            self.cancelled_calls += 1
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            exhausted = sum(self.exhausted.values())
+            return {
+                "turns": self.turns,
+                "exhausted": exhausted,
+                "exhausted_rate": exhausted / self.turns if self.turns else 0.0,
+                "by_reason": dict(self.exhausted),
+                "cancelled_calls": self.cancelled_calls,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.turns = 0
+            self.exhausted.clear()
+            self.cancelled_calls = 0
+
+
+turn_budget_stats = TurnBudgetStats()
+
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(LLM_CALL_WORKERS, thread_name_prefix="leave-llm")
+    return _executor
+
+
+def call_before(deadline: Optional[float], call: Callable[[threading.Event], Any]) -> Any:
+    """
+    Run call(cancel) and return its result, unless the deadline passes first.
+
+    Without a deadline the call runs inline. Otherwise it runs in a worker
+    thread (with the caller's context, so spans and callbacks still apply);
+    at the deadline cancel is set and BudgetExceeded("deadline") is raised
+    while the worker winds down on its own.
+    """
+    if deadline is None:
+        return call(threading.Event())
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise BudgetExceeded("deadline")
+    cancel = threading.Event()
+    future = _get_executor().submit(contextvars.copy_context().run, call, cancel)
+    try:
+        return future.result(timeout=remaining)
+    except concurrent.futures.TimeoutError:
+        cancel.set()
+        future.cancel()
+        turn_budget_stats.record_cancelled()
+        raise BudgetExceeded("deadline") from None
+
+
+async def acall_before(deadline: Optional[float], call: Callable[[], Awaitable[Any]]) -> Any:
+    """Await call(), cancelling it with BudgetExceeded("deadline") if the deadline passes first."""
+    if deadline is None:
+        return await call()
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise BudgetExceeded("deadline")
+    try:
+        return await asyncio.wait_for(call(), remaining)
+    except asyncio.TimeoutError:
+        turn_budget_stats.record_cancelled()
+        raise BudgetExceeded("deadline") from None